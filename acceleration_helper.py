@@ -1,140 +1,199 @@
-# Recovery Score Calculations: Acceleration helper
-# Script created 3/25/2024
-# Last revision 12/3/2024
-
-from numpy import sqrt
-#import pandas as pd
-
-def get_max_accelerations_x(roi_values_df) -> list[float]:
-    ''' Create a list with the maximum absolute values 
-        for each attempt   
-
-    Args:
-        selected_data_list: list with a list of dataframes. 
-        One per event with three columns (AccX, AccY and AccZ)
-
-    Returns:
-        list [float]
-    '''
-   
-    amax_x_list:list[float] = []
-        
-    for i in range (len (roi_values_df)):
-        amax_x:float = roi_values_df[i]['Acc_X'].abs().max()
-        amax_x_list.append(amax_x)
-    
-    return amax_x_list
-
-def get_max_accelerations_y(roi_values_df) -> list[float]:
-    ''' Create a list with the maximum absolute values 
-        for each attempt 
-        
-    Args:
-        selected_data_list: list with a list of dataframes. 
-        One per event with three columns (AccX, AccY and AccZ)
-
-    Returns:
-        list [float]
-    '''
-   
-    amax_y_list:list[float] = []
-        
-    for i in range (len (roi_values_df)):
-        amax_y:float = roi_values_df[i]['Acc_Y'].abs().max()
-        amax_y_list.append(amax_y)
-    
-    return amax_y_list
-        
-def get_max_accelerations_z(roi_values_df) -> list[float]:
-    ''' Create a list with the maximum absolute values for each attempt 
-        for 'Acc_Z'
-
-    Args:
-        selected_data_list: list with a list of dataframes. 
-        One per event with three columns (Acc_X, Acc_Y and Acc_Z)
-
-    Returns:
-        list [float]
-
-    '''
-   
-    amax_z_list:list[float] = []
-        
-    for i in range (len (roi_values_df)):
-        amax_z:float = roi_values_df[i]['Acc_Z'].abs().max()
-        #amax_z:float = roi_values_df[i]['Acc_Z'].min() # since we care about falling this will pick the max negative acceleration
-        amax_z_list.append(amax_z)
-    
-    return amax_z_list
-
-def get_sa(amax_x_list, amax_y_list, amax_z_list) -> float:
-    ''' Calculate the squared root (SQRT) of the sum of the squares 
-        of each max acceleration on each axis (AccX, AccY, AccZ)
-        for the successful attempt
-
-    Args:
-        amax_x_list: list with the max absolute accelerations on AccX per event.
-                    last argument of this list is the succesful attempt
-        amax_y_list: list with the max absolute accelerations on AccY per event.
-                    last argument of this list is the succesful attempt
-        amax_z_list: list with the max absolute accelerations on AccZ per event.
-                    last argument of this list is the succesful attempt
-        
-    Returns:
-        float
-
-    '''
-    
-    i: int = len(amax_z_list)-1
-    sa:float = sqrt(amax_x_list[i] ** 2  + amax_y_list[i] ** 2 + amax_z_list[i] ** 2)
-    
-    return sa     
-    
-def get_sa_2axes(amax_x_list, amax_y_list) -> float:
-    ''' Calculate the squared root (SQRT) of the sum of the squares 
-        of each max acceleration on the X and Y axes only for the successful attempt.
-
-    Args:
-        amax_x_list: list with the max absolute accelerations on AccX per event.
-                    last argument of this list is the succesful attempt
-        amax_y_list: list with the max absolute accelerations on AccY per event.
-                    last argument of this list is the succesful attempt
-         
-    Returns:
-        float
-
-    '''
-       
-    i: int = len(amax_x_list)-1
-    sa_2axes:float = sqrt(amax_x_list[i] ** 2  + amax_y_list[i] ** 2)
-    
-    return sa_2axes
-
-def get_sumua(amax_x_list, amax_y_list, amax_z_list) -> float:
-    ''' Calculate the squared root (SQRT) of the sum of the squares 
-        of each max acceleration on each axis (AccX, AccY, AccZ)
-        for each of the the unsuccessful attempts
-
-    Args:
-        amax_x_list: list with the max absolute accelerations on AccX per event.
-                    last argument of this list is the succesful attempt
-        amax_y_list: list with the max absolute accelerations on AccY per event.
-                    last argument of this list is the succesful attempt
-        amax_z_list: list with the max absolute accelerations on AccZ per event.
-                    last argument of this list is the succesful attempt
-        
-    Returns:
-        float
-
-    '''
-    
-    ua_list:list[float] = []
-    
-    for i in range (len (amax_z_list)-1):
-        
-        ua: float = sqrt(amax_x_list[i] ** 2  + amax_y_list[i] ** 2 + amax_z_list[i] ** 2)
-        ua_list.append(ua)
-        
-    sumua: float = sum(ua_list)
-   
-    return sumua
\ No newline at end of file
+# Recovery Score Calculations: Acceleration helper
+# Script created 3/25/2024
+# Last revision 10/17/2026
+
+import numpy as np
+
+from numpy import sqrt
+from numpy.typing import NDArray
+
+from instrumentation_helper import instrument
+#import pandas as pd
+
+def get_max_accelerations_x(roi_values_df) -> list[float]:
+    ''' Create a list with the maximum absolute values 
+        for each attempt   
+
+    Args:
+        selected_data_list: list with a list of dataframes. 
+        One per event with three columns (AccX, AccY and AccZ)
+
+    Returns:
+        list [float]
+    '''
+   
+    amax_x_list:list[float] = []
+        
+    for i in range (len (roi_values_df)):
+        amax_x:float = roi_values_df[i]['Acc_X'].abs().max()
+        amax_x_list.append(amax_x)
+    
+    return amax_x_list
+
+def get_max_accelerations_y(roi_values_df) -> list[float]:
+    ''' Create a list with the maximum absolute values 
+        for each attempt 
+        
+    Args:
+        selected_data_list: list with a list of dataframes. 
+        One per event with three columns (AccX, AccY and AccZ)
+
+    Returns:
+        list [float]
+    '''
+   
+    amax_y_list:list[float] = []
+        
+    for i in range (len (roi_values_df)):
+        amax_y:float = roi_values_df[i]['Acc_Y'].abs().max()
+        amax_y_list.append(amax_y)
+    
+    return amax_y_list
+        
+def get_max_accelerations_z(roi_values_df) -> list[float]:
+    ''' Create a list with the maximum absolute values for each attempt 
+        for 'Acc_Z'
+
+    Args:
+        selected_data_list: list with a list of dataframes. 
+        One per event with three columns (Acc_X, Acc_Y and Acc_Z)
+
+    Returns:
+        list [float]
+
+    '''
+   
+    amax_z_list:list[float] = []
+        
+    for i in range (len (roi_values_df)):
+        amax_z:float = roi_values_df[i]['Acc_Z'].abs().max()
+        #amax_z:float = roi_values_df[i]['Acc_Z'].min() # since we care about falling this will pick the max negative acceleration
+        amax_z_list.append(amax_z)
+    
+    return amax_z_list
+
+def get_sa(amax_x_list, amax_y_list, amax_z_list) -> float:
+    ''' Calculate the squared root (SQRT) of the sum of the squares 
+        of each max acceleration on each axis (AccX, AccY, AccZ)
+        for the successful attempt
+
+    Args:
+        amax_x_list: list with the max absolute accelerations on AccX per event.
+                    last argument of this list is the succesful attempt
+        amax_y_list: list with the max absolute accelerations on AccY per event.
+                    last argument of this list is the succesful attempt
+        amax_z_list: list with the max absolute accelerations on AccZ per event.
+                    last argument of this list is the succesful attempt
+        
+    Returns:
+        float
+
+    '''
+    
+    i: int = len(amax_z_list)-1
+    sa:float = sqrt(amax_x_list[i] ** 2  + amax_y_list[i] ** 2 + amax_z_list[i] ** 2)
+    
+    return sa     
+    
+def get_sa_2axes(amax_x_list, amax_y_list) -> float:
+    ''' Calculate the squared root (SQRT) of the sum of the squares 
+        of each max acceleration on the X and Y axes only for the successful attempt.
+
+    Args:
+        amax_x_list: list with the max absolute accelerations on AccX per event.
+                    last argument of this list is the succesful attempt
+        amax_y_list: list with the max absolute accelerations on AccY per event.
+                    last argument of this list is the succesful attempt
+         
+    Returns:
+        float
+
+    '''
+       
+    i: int = len(amax_x_list)-1
+    sa_2axes:float = sqrt(amax_x_list[i] ** 2  + amax_y_list[i] ** 2)
+    
+    return sa_2axes
+
+def get_sumua(amax_x_list, amax_y_list, amax_z_list) -> float:
+    ''' Calculate the squared root (SQRT) of the sum of the squares 
+        of each max acceleration on each axis (AccX, AccY, AccZ)
+        for each of the the unsuccessful attempts
+
+    Args:
+        amax_x_list: list with the max absolute accelerations on AccX per event.
+                    last argument of this list is the succesful attempt
+        amax_y_list: list with the max absolute accelerations on AccY per event.
+                    last argument of this list is the succesful attempt
+        amax_z_list: list with the max absolute accelerations on AccZ per event.
+                    last argument of this list is the succesful attempt
+        
+    Returns:
+        float
+
+    '''
+    
+    ua_list:list[float] = []
+    
+    for i in range (len (amax_z_list)-1):
+        
+        ua: float = sqrt(amax_x_list[i] ** 2  + amax_y_list[i] ** 2 + amax_z_list[i] ** 2)
+        ua_list.append(ua)
+        
+    sumua: float = sum(ua_list)
+   
+    return sumua
+
+@instrument('get_max_accelerations')
+def get_max_accelerations(acc: NDArray[np.float64], starts: NDArray[np.intp], ends: NDArray[np.intp]) -> NDArray[np.float64]:
+    ''' Calculates the maximum absolute acceleration on each axis for each attempt
+        (replaces get_number_roi_sd + get_max_accelerations_x/_y/_z)
+        Each region is reduced directly on a view of its rows: max absolute value = max(max, -min), so neither
+        the rows nor their absolute values are copied, and the temporary arrays only hold 3 values per region.
+        Rows outside the regions are never read. Overlapping regions are allowed
+
+    Args:
+        acc: (n, 3) array with Acc_X, Acc_Y and Acc_Z
+        starts: first row of each region
+        ends: row after the last row of each region
+
+    Returns:
+        NDArray[np.float64]: (number of regions, 3) array with the max absolute Acc_X, Acc_Y and Acc_Z
+            of each region (NaN for an empty region)
+    '''
+    n: int = len(acc)
+    starts = np.clip(np.asarray(starts, dtype = np.intp), 0, n)
+    ends = np.clip(np.asarray(ends, dtype = np.intp), starts, n)
+    amax: NDArray[np.float64] = np.full((len(starts), acc.shape[1]), np.nan)
+
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        if end > start:
+            region: NDArray = acc[start:end]
+            # float64 before the negation, so the minimum of an int16 (compact) array cannot overflow
+            amax[i] = np.maximum(region.max(axis = 0), -region.min(axis = 0).astype(np.float64))
+
+    return amax
+
+def get_sa_2axes_array(amax: NDArray[np.float64]) -> float:
+    ''' Same as get_sa_2axes, from the array returned by get_max_accelerations
+
+    Args:
+        amax: (number of regions, 3) array with the max absolute accelerations per event.
+              last row is the succesful attempt
+
+    Returns:
+        float
+    '''
+    return float(np.sqrt(np.sum(amax[-1, :2] ** 2)))
+
+def get_sumua_array(amax: NDArray[np.float64]) -> float:
+    ''' Same as get_sumua, from the array returned by get_max_accelerations
+
+    Args:
+        amax: (number of regions, 3) array with the max absolute accelerations per event.
+              last row is the succesful attempt
+
+    Returns:
+        float
+    '''
+    return float(np.sum(np.sqrt(np.sum(amax[:-1] ** 2, axis = 1))))
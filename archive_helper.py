@@ -0,0 +1,448 @@
+# Recovery Score Calculations: archive_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: compressed archive of the recording corpus. Many cases are packed in one directory: 'data.bin' holds the
+# columns of every case in chunks of CHUNK_SIZE rows, each column of a chunk compressed on its own with zlib, and
+# 'manifest.json' indexes them (byte offset and length of every chunk column, rows and first/last timestamp of
+# every chunk, fingerprint of the source CSV). A case, or a time range of a case, is read by decompressing only
+# the chunks it needs, without parsing any CSV.
+# Columns are stored losslessly (read_archived_file returns the same values as read_csv_file):
+#   - timeStamp: int64 ns, delta-encoded (the constant 5 ms steps compress to almost nothing)
+#   - Acc_X, Acc_Y, Acc_Z: as integers of 10^-DECIMALS m/s^2 (int32) when that gives back the exact float64 values
+#     (the sensor writes 6 decimals), otherwise the float64 values; bytes are shuffled (all first bytes, then all
+#     second bytes, ...) before compression, which groups the bytes that change little
+# Cases whose source CSV has not changed are skipped when packing again; a changed case is appended again and its
+# manifest entry replaced (the old chunks stay in data.bin until the archive is packed into a new directory).
+# Only one process should pack into an archive at a time; any number can read it.
+# Usage: python archive_helper.py pack <directory or glob> [--archive recordings_archive]
+#        python archive_helper.py list [--archive recordings_archive]
+#        python archive_helper.py verify <directory or glob> [--archive recordings_archive]
+
+import argparse
+import json
+import os
+import zlib
+import numpy as np
+import pandas as pd
+
+from numpy.typing import NDArray
+
+import config
+from batch_helper import find_case_files
+from cache_helper import get_content_hash, get_file_fingerprint, load_cached_columns
+from compact_helper import compact_frame
+from CSV_helper import lock_file, rename
+from file_helper import read_csv_file
+
+ARCHIVE_VERSION: int = 1
+ARCHIVE_DIR: str = 'recordings_archive'
+MANIFEST_FILE: str = 'manifest.json'
+DATA_FILE: str = 'data.bin'
+COLUMNS: list[str] = ['timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z']
+
+# Rows per chunk (the smallest unit read from the archive); 65536 rows are about 5.5 minutes at 200 Hz
+CHUNK_SIZE: int = 2 ** 16
+
+# Decimals written by the sensor (accelerations are stored as integers of 10^-DECIMALS when that is lossless)
+DECIMALS: int = 6
+
+def shuffle_bytes(values: NDArray) -> bytes:
+    '''Groups the bytes of an array by position (all first bytes, then all second bytes, ...)
+
+    Args:
+        values (NDArray): array of fixed-size numbers
+
+    Returns:
+        bytes: shuffled bytes
+    '''
+    values = np.ascontiguousarray(values)
+
+    return values.view(np.uint8).reshape(-1, values.itemsize).T.tobytes()
+
+def unshuffle_bytes(data: bytes, dtype) -> NDArray:
+    '''Inverse of shuffle_bytes
+
+    Args:
+        data (bytes): shuffled bytes
+        dtype: dtype of the array
+
+    Returns:
+        NDArray: array
+    '''
+    itemsize: int = np.dtype(dtype).itemsize
+
+    return np.frombuffer(data, dtype = np.uint8).reshape(itemsize, -1).T.copy().view(dtype).ravel()
+
+def encode_column(column: str, values: NDArray) -> tuple:
+    '''Encodes one column of a chunk
+
+    Args:
+        column (str): column name
+        values (NDArray): values of the chunk (timeStamp as int64 ns)
+
+    Returns:
+        tuple: encoding name and uncompressed bytes
+    '''
+    if column == 'timeStamp':
+        return 'delta', shuffle_bytes(np.diff(values, prepend = np.int64(0)))
+
+    scaled: NDArray[np.float64] = np.rint(values * 10.0 ** DECIMALS)
+
+    # Decimal encoding only if every value comes back bit for bit (and fits in int32)
+    if np.all(np.abs(scaled) < 2 ** 31) and np.array_equal(scaled / 10.0 ** DECIMALS, values):
+        return 'decimal', shuffle_bytes(scaled.astype(np.int32))
+
+    return 'float', shuffle_bytes(np.asarray(values, dtype = np.float64))
+
+def decode_column(encoding: str, data: bytes) -> NDArray:
+    '''Decodes one column of a chunk (see encode_column)
+
+    Args:
+        encoding (str): 'delta', 'decimal' or 'float'
+        data (bytes): uncompressed bytes
+
+    Returns:
+        NDArray: int64 ns for timeStamp, float64 otherwise
+    '''
+    if encoding == 'delta':
+        return np.cumsum(unshuffle_bytes(data, np.int64))
+
+    if encoding == 'decimal':
+        return unshuffle_bytes(data, np.int32) / 10.0 ** DECIMALS
+
+    if encoding == 'float':
+        return unshuffle_bytes(data, np.float64)
+
+    raise ValueError(f'Unknown column encoding "{encoding}"')
+
+def to_ns(value) -> int | None:
+    '''Converts a time range bound to int64 ns
+
+    Args:
+        value: None, int (ns) or anything pd.Timestamp accepts ('2024-03-25 10:05:00', datetime, np.datetime64)
+
+    Returns:
+        int | None: ns since the epoch
+    '''
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+
+    return pd.Timestamp(value).value
+
+class RecordingArchive:
+    '''Chunked, compressed archive of recordings with random access per case and per time range'''
+
+    def __init__(self, path: str = ARCHIVE_DIR, chunk_size: int = CHUNK_SIZE, level: int = 6) -> None:
+        '''
+        Args:
+            path (str): archive directory (created if needed)
+            chunk_size (int): rows per chunk for a new archive (an existing archive keeps its own)
+            level (int): zlib compression level (1 fastest ... 9 smallest)
+        '''
+        self.path: str = path
+        self.level: int = level
+        self.manifest_path: str = os.path.join(path, MANIFEST_FILE)
+        self.data_path: str = os.path.join(path, DATA_FILE)
+
+        os.makedirs(path, exist_ok = True)
+        self.manifest: dict = self.load_manifest() or {'version': ARCHIVE_VERSION, 'chunk_size': chunk_size, 'decimals': DECIMALS, 'cases': {}}
+
+        if self.manifest.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f'{path} is not a version {ARCHIVE_VERSION} recording archive')
+
+    def load_manifest(self) -> dict | None:
+        '''Reads manifest.json (None for a new archive)'''
+        if not os.path.exists(self.manifest_path):
+            return None
+
+        with open(self.manifest_path) as file:
+            return json.load(file)
+
+    def save_manifest(self) -> None:
+        '''Writes manifest.json through a temporary file, so readers never see a partial manifest'''
+        temporary_path: str = self.manifest_path + '.tmp'
+
+        with open(temporary_path, 'w') as file:
+            json.dump(self.manifest, file)
+
+        os.replace(temporary_path, self.manifest_path)
+
+    def list_cases(self) -> list[str]:
+        '''Case numbers in the archive, sorted'''
+        return sorted(self.manifest['cases'])
+
+    def get_info(self, case_number: str) -> dict:
+        '''Rows, time span and source of an archived case
+
+        Args:
+            case_number (str): case number
+
+        Returns:
+            dict: rows, first and last timestamp (ns), number of chunks, compressed bytes and source fingerprint
+        '''
+        entry: dict = self.get_entry(case_number)
+
+        return {
+            'rows': entry['rows'],
+            'first_ns': entry['first_ns'],
+            'last_ns': entry['last_ns'],
+            'chunks': len(entry['chunks']),
+            'bytes': sum(length for chunk in entry['chunks'] for _, length, _ in chunk['columns'].values()),
+            'source': entry['source'],
+        }
+
+    def get_entry(self, case_number: str) -> dict:
+        entry: dict | None = self.manifest['cases'].get(str(case_number))
+
+        if entry is None:
+            raise KeyError(f'Case {case_number} is not in the archive {self.path}')
+
+        return entry
+
+    def is_current(self, file_path_csv: str) -> bool:
+        '''Checks whether a case is archived from this exact CSV file (size and modification time, or content hash)
+
+        Args:
+            file_path_csv (str): path to the case CSV file
+
+        Returns:
+            bool: True if the archived case matches the file
+        '''
+        entry: dict | None = self.manifest['cases'].get(rename(os.path.basename(file_path_csv)))
+
+        if entry is None:
+            return False
+
+        stat = os.stat(file_path_csv)
+        source: dict = entry['source']
+
+        if source['size'] != stat.st_size:
+            return False
+
+        return source['mtime_ns'] == stat.st_mtime_ns or source['sha256'] == get_content_hash(file_path_csv)
+
+    def add_case(self, file_path_csv: str) -> dict:
+        '''Archives a case CSV file. Its columns are taken from the binary cache when it is valid,
+            otherwise the CSV is parsed with read_csv_file (without creating a cache)
+
+        Args:
+            file_path_csv (str): path to the case CSV file
+
+        Returns:
+            dict: manifest entry of the case
+        '''
+        columns: dict | None = load_cached_columns(file_path_csv)
+
+        if columns is None:
+            df: pd.DataFrame = read_csv_file(rename(file_path_csv), use_cache = False, timestamp_format = config.timestamp_format, timestamp_mode = config.timestamp_mode, sample_period_ms = config.sample_period_ms)
+
+            if df.empty:
+                raise ValueError(f'Failed to load DataFrame from {file_path_csv}')
+
+            columns = {
+                'timeStamp': df['timeStamp'].to_numpy(dtype = 'datetime64[ns]').view(np.int64),
+                'Acc_X': df['Acc_X'].to_numpy(dtype = np.float64),
+                'Acc_Y': df['Acc_Y'].to_numpy(dtype = np.float64),
+                'Acc_Z': df['Acc_Z'].to_numpy(dtype = np.float64),
+            }
+
+        time_stamp: NDArray[np.int64] = columns['timeStamp']
+        n: int = len(time_stamp)
+        chunk_size: int = self.manifest['chunk_size']
+        chunks: list[dict] = []
+
+        # Chunks are appended to data.bin under a lock; the manifest only references them once they are written
+        with open(self.data_path, 'ab') as file, lock_file(file):
+            file.seek(0, os.SEEK_END)
+            offset: int = file.tell()
+
+            for start in range(0, n, chunk_size):
+                stop: int = min(start + chunk_size, n)
+                chunk: dict = {'rows': stop - start, 'first_ns': int(time_stamp[start]), 'last_ns': int(time_stamp[stop - 1]), 'columns': {}}
+
+                for column in COLUMNS:
+                    encoding, data = encode_column(column, np.asarray(columns[column][start:stop]))
+                    compressed: bytes = zlib.compress(data, self.level)
+                    file.write(compressed)
+                    chunk['columns'][column] = [offset, len(compressed), encoding]
+                    offset += len(compressed)
+
+                chunks.append(chunk)
+
+            file.flush()
+            os.fsync(file.fileno())
+
+        entry: dict = {
+            'rows': n,
+            'first_ns': int(time_stamp[0]) if n else None,
+            'last_ns': int(time_stamp[-1]) if n else None,
+            'source': {'name': os.path.basename(file_path_csv), **get_file_fingerprint(file_path_csv, get_content_hash(file_path_csv))},
+            'chunks': chunks,
+        }
+
+        self.manifest['cases'][rename(os.path.basename(file_path_csv))] = entry
+        self.save_manifest()
+
+        return entry
+
+    def read_columns(self, case_number: str, start = None, end = None, columns: list[str] = COLUMNS) -> dict:
+        '''Reads the columns of a case, or of the rows with start <= timeStamp < end.
+            Only the chunks overlapping the time range are read and decompressed
+
+        Args:
+            case_number (str): case number
+            start: first timestamp (None: beginning of the recording), see to_ns
+            end: timestamp after the last one (None: end of the recording), see to_ns
+            columns (list[str]): columns to read
+
+        Returns:
+            dict: arrays keyed by column name (timeStamp as int64 ns, like load_cached_columns)
+        '''
+        entry: dict = self.get_entry(case_number)
+        start_ns, end_ns = to_ns(start), to_ns(end)
+
+        chunks: list[dict] = [chunk for chunk in entry['chunks'] if (start_ns is None or chunk['last_ns'] >= start_ns) and (end_ns is None or chunk['first_ns'] < end_ns)]
+
+        # The time column is needed to cut the first and last chunks of a time range
+        names: list[str] = list(dict.fromkeys((['timeStamp'] if start_ns is not None or end_ns is not None else []) + list(columns)))
+        parts: dict = {column: [] for column in names}
+
+        with open(self.data_path, 'rb') as file:
+            for chunk in chunks:
+                for column in names:
+                    offset, length, encoding = chunk['columns'][column]
+                    file.seek(offset)
+                    parts[column].append(decode_column(encoding, zlib.decompress(file.read(length))))
+
+        values: dict = {column: np.concatenate(arrays) if arrays else np.array([], dtype = np.int64 if column == 'timeStamp' else np.float64) for column, arrays in parts.items()}
+
+        if start_ns is not None or end_ns is not None:
+            keep: NDArray[np.bool_] = np.ones(len(values['timeStamp']), dtype = np.bool_)
+            if start_ns is not None:
+                keep &= values['timeStamp'] >= start_ns
+            if end_ns is not None:
+                keep &= values['timeStamp'] < end_ns
+            values = {column: array[keep] for column, array in values.items()}
+
+        return {column: values[column] for column in columns}
+
+    def read_case(self, case_number: str, start = None, end = None) -> pd.DataFrame:
+        '''Reads a case (or a time range of it, see read_columns) as the DataFrame returned by read_csv_file
+
+        Args:
+            case_number (str): case number
+            start: first timestamp (None: beginning of the recording)
+            end: timestamp after the last one (None: end of the recording)
+
+        Returns:
+            pd.DataFrame: timeStamp, Acc_X, Acc_Y and Acc_Z
+        '''
+        columns: dict = self.read_columns(case_number, start, end)
+        columns['timeStamp'] = columns['timeStamp'].view('datetime64[ns]')
+
+        return pd.DataFrame(columns)
+
+def read_archived_file(file_path, archive_path: str = ARCHIVE_DIR, start = None, end = None, signal_dtype: str = 'float64') -> pd.DataFrame:
+    '''Drop-in replacement for read_csv_file that reads the case from an archive instead of its CSV file
+
+    Args:
+        file_path: case number or path to the case CSV file (only the case number is used)
+        archive_path (str): archive directory
+        start: first timestamp (None: beginning of the recording), see to_ns
+        end: timestamp after the last one (None: end of the recording), see to_ns
+        signal_dtype (str): 'float64' (default), 'float32' or 'int16' (see compact_helper)
+
+    Returns:
+        Pandas DataFrame (empty if the case could not be read, like read_csv_file)
+    '''
+    try:
+        print('reading archive...')
+        df: pd.DataFrame = RecordingArchive(archive_path).read_case(rename(os.path.basename(str(file_path))), start, end)
+
+        return compact_frame(df, signal_dtype)
+
+    except Exception as e:
+
+        print('An error occurred:', str(e))
+
+        return pd.DataFrame()
+
+def pack(source: str, archive_path: str = ARCHIVE_DIR, level: int = 6) -> list[str]:
+    '''Archives every case CSV file of a directory or glob pattern, skipping the cases already archived
+        from the same file
+
+    Args:
+        source (str): directory containing the case CSV files, or a glob pattern
+        archive_path (str): archive directory
+        level (int): zlib compression level
+
+    Returns:
+        list[str]: case numbers added or updated
+    '''
+    archive = RecordingArchive(archive_path, level = level)
+    added: list[str] = []
+
+    for file_path in find_case_files(source):
+        if archive.is_current(file_path):
+            continue
+
+        try:
+            entry: dict = archive.add_case(file_path)
+            added.append(rename(os.path.basename(file_path)))
+            print(f'{file_path} archived ({entry["rows"]} rows, {len(entry["chunks"])} chunks)')
+
+        except Exception as e:
+            print(f'An error occurred while archiving {file_path}:', str(e))
+
+    return added
+
+def verify(source: str, archive_path: str = ARCHIVE_DIR) -> bool:
+    '''Checks that the archived cases give back exactly the columns of read_csv_file
+
+    Args:
+        source (str): directory containing the case CSV files, or a glob pattern
+        archive_path (str): archive directory
+
+    Returns:
+        bool: True if every archived case matches its CSV file
+    '''
+    archive = RecordingArchive(archive_path)
+    matched: bool = True
+
+    for file_path in find_case_files(source):
+        case_number: str = rename(os.path.basename(file_path))
+        if case_number not in archive.manifest['cases']:
+            continue
+
+        archived: pd.DataFrame = archive.read_case(case_number)
+        parsed: pd.DataFrame = read_csv_file(rename(file_path), use_cache = False, timestamp_format = config.timestamp_format, timestamp_mode = config.timestamp_mode, sample_period_ms = config.sample_period_ms)
+        same: bool = archived.equals(parsed[COLUMNS])
+        matched = matched and same
+        print(f'{case_number}: {"matches" if same else "DIFFERS"}')
+
+    return matched
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = 'Packs case CSV files in a compressed archive, lists and verifies it')
+    parser.add_argument('command', choices = ['pack', 'list', 'verify'], help = 'pack the CSV files, list the archived cases or check them against the CSV files')
+    parser.add_argument('source', nargs = '?', default = '.', help = 'directory containing the case CSV files, or a glob pattern (pack, verify)')
+    parser.add_argument('--archive', default = ARCHIVE_DIR, help = 'archive directory')
+    parser.add_argument('--level', type = int, default = 6, help = 'zlib compression level (1 fastest ... 9 smallest)')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        print(f'{len(pack(args.source, args.archive, args.level))} cases archived in {args.archive}')
+
+    elif args.command == 'list':
+        archive = RecordingArchive(args.archive)
+        for case_number in archive.list_cases():
+            info: dict = archive.get_info(case_number)
+            print(f'{case_number}: {info["rows"]} rows, {pd.Timestamp(info["first_ns"])} to {pd.Timestamp(info["last_ns"])}, {info["bytes"] / 1e6:.1f} MB (csv {info["source"]["size"] / 1e6:.1f} MB)')
+
+    else:
+        print('All archived cases match their CSV files' if verify(args.source, args.archive) else 'Some archived cases differ from their CSV files')
+
+if __name__ == "__main__":
+
+    main()
@@ -1,190 +1,432 @@
-# Recovery Score Calculations: Identification of Regions of Interest helper
-# Script created  3/25/2024
-# Last revision 12/13/2024
-
-import numpy as np
-import pandas as pd
-from numpy.typing import NDArray
-
-def set_jerk_threshold(jerk: NDArray[np.float64], factor: float, percentile: float) -> tuple:
-    '''Sets the jerk threshold based on the mean and standard deviation of the jerk values
-
-    Args:
-    jerk (NDArray[np.float64]): Array of jerk values
-    factor (float): Multiplication factor for the standard deviation
-    percentile (int): Percentile value to use for setting the threshold
-
-    Returns:
-        tuple: The calculated jerk threshold
-    '''
-    mean_jerk = np.mean(jerk)
-    std_jerk = np.std(jerk)
-    percentile_jerk = np.percentile(jerk, percentile)
-    jerk_threshold_cal = max(mean_jerk + factor * std_jerk, percentile_jerk)
-   
-    return mean_jerk, std_jerk, jerk_threshold_cal
-
-def calculate_window_sd(df, window_size, step_size)-> list:
-    ''' Creates a window to scan the data. The window size is 'window_size' data points and the window is advancing every 'step_size' datapoints.
-        Function calculates the standard deviation (SD) over a specified window size with a specified step size
-
-    Args:
-        df: jerk data. First derivative of acceleration data on Z axis (Acc_Z)
-        window_size: window size
-        step_size: number of data points by which the window advances
-
-    Returns:
-        list of float values
-    '''
-    
-    print('calculating window_sd...')
-
-    n: int = len(df)
-    sd_list: list = []
-    for i in range(0, n - window_size + 1, step_size):
-        window = df[i : i + window_size]
-        sd = np.std(window)
-        sd_list.append(sd)
-    
-    return sd_list
-
-def detect_roi_sd(AccZ_sd: list, threshold: float) -> list:
-    '''Identifies Regions of Interest in the data based on a threshold criterion 
-        applied to the standard deviation values (AccZ_sd)
-        It filters out regions where the standard deviation is greater than or equal to twice 
-        the threshold value (threshold). These regions are stored in the filtered list along with their indexes.
-
-    Args:
-        AccZ_sd: list with the all the regions that have a standad deviation greater or equal to twice the threshold
-        threshold: threshold value for standard deviation
-        
-    Returns:
-        list with the regions of interest
-    '''
-
-    filtered = list()
-    
-    for i in range(len(AccZ_sd)):
-        if AccZ_sd[i] > threshold*2:
-            filtered.append((i, AccZ_sd[i]))
-
-    regions_of_interest = list()
-    big = 0
-    index = 0
-    for j in range(len(filtered) - 1):
-        if filtered[j][0] + 1 == filtered[j + 1][0]:
-            if filtered[j][1] > big:
-                big = filtered[j][1]
-                index = filtered[j][0]
-            elif filtered[j + 1][1] > big:
-                big = filtered[j + 1][1]
-                index = filtered[j + 1][0]
-        elif big > 0:
-            regions_of_interest.append((index, big))
-            big = 0
-            index = 0
-        
-    regions_of_interest.append((index, big))
-    
-    return regions_of_interest
-
-def get_attempts_sd(regions_of_interest: list) ->int:
-    ''' Counts the number of identified regions of interest. Since the last region will always be
-        the successful attempt, it substracts 1 to the final count
-
-    Args:
-        regions_of_interest: list with the all the regions that have a standad deviation > set threshold
-
-    Returns:
-        int with Number of failed Attempts
-    '''
-
-    attempts: int = len(regions_of_interest) - 1
-
-    return attempts
-
-def get_roi_indices(jerk: NDArray[np.float64], snap: NDArray[np.float64], jerk_threshold_cal: float, snap_threshold: float) -> pd.DataFrame:
-    '''Identifies indices of regions of interest (ROIs) where jerk, snap or jerk or snap exceed specified thresholds.
-
-    Args:
-        jerk (NDArray[np.float64]): Array of jerk values
-        snap (NDArray[np.float64]): Array of snap values
-        jerk_threshold_cal (float): Threshold for jerk values
-        snap_threshold (float): Threshold for snap values
-
-    Returns:
-       Pandas DataFrame: Indices of regions of interest
-    '''
-    # Ensure both arrays have the same length
-    min_length = min(len(jerk), len(snap))
-    jerk = jerk[:min_length]
-    snap = snap[:min_length]
-       
-    # Detect ROIs where either jerk or snap exceed thresholds
-    roi_mask = (np.abs(jerk) > jerk_threshold_cal) | (np.abs(snap) > snap_threshold)
-    roi_indices = np.where(roi_mask)[0]  # Get indices of true values in the mask
-
-    # Convert to pandas DataFrame
-    roi_indices_df = pd.DataFrame(roi_indices, columns=['ROI_Indices'])
-
-    return roi_indices_df
- 
-def get_attempts(roi_indices_df) -> int:
-    ''' Counts the number of identified regions of interest. Since the last region will always be
-        the successful attempt, it substracts 1 to the final count
-
-    Args:
-        roi_indices: list with the all the regions that have a jerk > set threshold
-
-    Returns:
-        int with Number of failed Attempts
-    '''
-
-    number_failed_attempts: int = len(roi_indices_df) - 1
-
-    return number_failed_attempts
-
-
-def get_roi_derivative(jerk, snap, jerk_threshold_cal, snap_threshold) -> list:
-    ''' Identifies Regions of Interest in the data based on a threshold criterion 
-        applied to the Jerk and Snap values
-        It filters out regions where the Jerk and Snap are greater than or equal to the threshold value.
-        These regions are stored in the filtered list along with their indexes.
-
-    Args:
-        jerk: list with the all the regions that have a jerk greater or equal to the threshold
-        snap: list with the all the regions that have a snap greater or equal to the threshold
-        jerk_threshold_cal: threshold value for Jerk after re calibration
-        snap_threshold: threshold value for Snap
-        
-    Returns:
-        list with the regions of interest for Jerk and Snap
-    '''
-    filtered = list()
-    for i in range(len(jerk)):
-        if jerk[i] > jerk_threshold_cal:
-            filtered.append((i, jerk[i]))
-    
-    for i in range(len(snap)):
-        if snap[i] > snap_threshold:
-            filtered.append((i, snap[i]))
-
-    roi_derivative = list() #
-    big = 0
-    index = 0
-    for j in range(len(filtered) - 1):
-        if filtered[j][0] + 1 == filtered[j + 1][0]:
-            if filtered[j][1] > big:
-                big = filtered[j][1]
-                index = filtered[j][0]
-            elif filtered[j + 1][1] > big:
-                big = filtered[j + 1][1]
-                index = filtered[j + 1][0]
-        elif big > 0:
-            roi_derivative.append((index, big))
-            big = 0
-            index = 0
-        
-    roi_derivative.append((index, big))
-    
-    return roi_derivative
+# Recovery Score Calculations: Identification of Regions of Interest helper
+# Script created  3/25/2024
+# Last revision 10/17/2026
+
+# pandas is only imported by get_roi_indices (the fused pipeline runs without it)
+
+from __future__ import annotations
+
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from numpy.typing import NDArray
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from instrumentation_helper import instrument
+
+# number of values processed at a time by the vectorized window functions
+CHUNK_SIZE: int = 2 ** 18
+
+# smallest block for which get_window_sd_bounds sums the squares of blocks instead of window segments
+MIN_BLOCK_SIZE: int = 64
+
+# regions of interest found by detect_roi_sd (window indices, end_window inclusive)
+ROI_SD_DTYPE: np.dtype = np.dtype([('start_window', np.intp), ('end_window', np.intp), ('peak_window', np.intp), ('peak_sd', np.float64)])
+
+# regions of interest found by detect_roi_derivative (sample indices of the jerk, end_index inclusive)
+ROI_DERIVATIVE_DTYPE: np.dtype = np.dtype([('start_index', np.intp), ('end_index', np.intp), ('peak_index', np.intp), ('peak_jerk', np.float64)])
+
+@instrument('set_jerk_threshold')
+def set_jerk_threshold(jerk: NDArray[np.float64], factor: float, percentile: float) -> tuple:
+    '''Sets the jerk threshold based on the mean and standard deviation of the jerk values
+
+    Args:
+    jerk (NDArray[np.float64]): Array of jerk values
+    factor (float): Multiplication factor for the standard deviation
+    percentile (int): Percentile value to use for setting the threshold
+
+    Returns:
+        tuple: The calculated jerk threshold
+    '''
+    mean_jerk = np.mean(jerk)
+    std_jerk = np.std(jerk)
+    percentile_jerk = np.percentile(jerk, percentile)
+    jerk_threshold_cal = max(mean_jerk + factor * std_jerk, percentile_jerk)
+   
+    return mean_jerk, std_jerk, jerk_threshold_cal
+
+@instrument('calculate_window_sd')
+def calculate_window_sd(df, window_size, step_size, verbose: bool = True, threshold: float | None = None)-> NDArray[np.float64]:
+    ''' Creates a window to scan the data. The window size is 'window_size' data points and the window is advancing every 'step_size' datapoints.
+        Function calculates the standard deviation (SD) over a specified window size with a specified step size
+
+        All the windows are computed at once: the data is cut into segments at every window start and end,
+        the mean and sum of squared deviations (M2) of each segment are computed with a two-pass method, and
+        the segments of each window are then combined with the pairwise (Chan/Welford) update. This avoids the
+        cancellation of the sum(x^2) - sum(x)^2 formula for jerk values around 1e-8 and matches np.std (ddof = 0)
+        on every window, while reading each data point only twice.
+
+        With a threshold, only the windows that detect_roi_sd could select are calculated (coarse to fine, see
+        get_window_sd_bounds): the other windows are set to NaN, so detect_roi_sd returns the same regions of interest
+
+    Args:
+        df: jerk data. First derivative of acceleration data on Z axis (Acc_Z)
+        window_size: window size
+        step_size: number of data points by which the window advances
+        verbose: print a progress message (turned off when called for every chunk of a stream)
+        threshold: threshold of detect_roi_sd. If set, windows whose SD cannot be greater than threshold * 2 are NaN
+
+    Returns:
+        NDArray[np.float64]: SD of each window (window i starts at i * step_size)
+    '''
+    
+    if verbose:
+        print('calculating window_sd...')
+
+    data: NDArray[np.float64] = np.asarray(df, dtype = np.float64)
+
+    if threshold is None:
+        return get_window_sd(data, window_size, step_size)
+
+    # Coarse pass: upper bound of the SD of every window
+    bounds: NDArray[np.float64] = get_window_sd_bounds(data, window_size, step_size)
+    sd: NDArray[np.float64] = np.full(len(bounds), np.nan)
+
+    # The bound and the SD are rounded differently; the margin keeps windows at the threshold as candidates
+    candidates: NDArray[np.bool_] = bounds > threshold * 2 * (1 - 1e-9)
+
+    # Fine pass: exact SD of the runs of candidate windows. Runs closer than a window share data and are merged
+    edges: NDArray[np.int8] = np.diff(candidates.astype(np.int8), prepend = 0, append = 0)
+    starts: NDArray[np.intp] = np.flatnonzero(edges == 1)
+    ends: NDArray[np.intp] = np.flatnonzero(edges == -1)
+
+    if len(starts):
+        separate: NDArray[np.bool_] = starts[1:] - ends[:-1] > window_size // step_size
+        starts = starts[np.concatenate(([True], separate))]
+        ends = ends[np.concatenate((separate, [True]))]
+
+    for start, end in zip(starts, ends):
+        # Windows start at multiples of step_size, so the windows of the span are windows start..end - 1 of the recording
+        sd[start:end] = get_window_sd(data[start * step_size : (end - 1) * step_size + window_size], window_size, step_size)
+
+    return sd
+
+def get_window_segments(n: int, window_size: int, step_size: int) -> tuple:
+    '''Cuts n data points at every window start and end (see calculate_window_sd)
+
+    Args:
+        n (int): number of data points
+        window_size (int): window size
+        step_size (int): number of data points by which the window advances
+
+    Returns:
+        tuple: number of windows, segment boundaries (segment k is data[boundaries[k] : boundaries[k + 1]]),
+            number of segments per window and number of segments between the starts of two windows
+    '''
+    n_windows: int = (n - window_size) // step_size + 1
+    full_steps, remainder = divmod(window_size, step_size)
+
+    # Windows start at multiples of step_size and end 'remainder' points after a multiple of step_size
+    # so each window is made of full_steps (remainder == 0) or 2 * full_steps + 1 consecutive segments
+    starts: NDArray = np.arange(n_windows + full_steps + 1) * step_size
+    if remainder == 0:
+        boundaries: NDArray = starts
+        segments_per_window: int = full_steps
+        segments_per_step: int = 1
+    else:
+        boundaries = np.sort(np.concatenate((starts, starts + remainder)))
+        segments_per_window = 2 * full_steps + 1
+        segments_per_step = 2
+    n_segments: int = (n_windows - 1) * segments_per_step + segments_per_window
+
+    return n_windows, boundaries[:n_segments + 1], segments_per_window, segments_per_step
+
+def get_window_sd(data: NDArray[np.float64], window_size: int, step_size: int) -> NDArray[np.float64]:
+    '''SD of every window of data (see calculate_window_sd)
+
+    Args:
+        data (NDArray[np.float64]): jerk values
+        window_size (int): window size
+        step_size (int): number of data points by which the window advances
+
+    Returns:
+        NDArray[np.float64]: SD of each window (window i starts at i * step_size)
+    '''
+    if len(data) < window_size:
+        return np.array([], dtype = np.float64)
+
+    n_windows, boundaries, segments_per_window, segments_per_step = get_window_segments(len(data), window_size, step_size)
+
+    segment_length, segment_mean, segment_m2 = calculate_segment_moments(data, boundaries)
+
+    # Views with one row per window and one column per segment in that window (no copy)
+    window_length: NDArray = sliding_window_view(segment_length, segments_per_window)[::segments_per_step]
+    window_mean: NDArray = sliding_window_view(segment_mean, segments_per_window)[::segments_per_step]
+    window_m2: NDArray = sliding_window_view(segment_m2, segments_per_window)[::segments_per_step]
+
+    sd: NDArray[np.float64] = np.empty(n_windows, dtype = np.float64)
+
+    # Combine the segments of each window, a few windows at a time to bound the temporary arrays
+    rows: int = max(1, CHUNK_SIZE // segments_per_window)
+    for start in range(0, n_windows, rows):
+        rows_slice = slice(start, start + rows)
+        lengths: NDArray = window_length[rows_slice]
+        means: NDArray = window_mean[rows_slice]
+        mean: NDArray = np.einsum('ij,ij->i', lengths, means) / window_size
+        spread: NDArray = means - mean[:, np.newaxis]
+        m2: NDArray = window_m2[rows_slice].sum(axis = 1) + np.einsum('ij,ij,ij->i', lengths, spread, spread)
+        sd[rows_slice] = np.sqrt(m2 / window_size)
+
+    return sd
+
+def get_window_sd_bounds(data: NDArray[np.float64], window_size: int, step_size: int) -> NDArray[np.float64]:
+    '''Upper bound of the SD of every window from the sum of squares of its data: the variance is the mean
+        of the squares minus the squared mean, so SD <= sqrt(mean(x^2)). Tight on zero-mean signals such as jerk.
+        The sums of squares are computed once per block of gcd(window_size, step_size) points (or per segment of
+        calculate_window_sd when the blocks would be too small), which reads each data point once.
+        A window containing NaN has a NaN bound, like its SD
+
+    Args:
+        data (NDArray[np.float64]): jerk values
+        window_size (int): window size
+        step_size (int): number of data points by which the window advances
+
+    Returns:
+        NDArray[np.float64]: bound of each window (window i starts at i * step_size)
+    '''
+    if len(data) < window_size:
+        return np.array([], dtype = np.float64)
+
+    n_windows, boundaries, segments_per_window, segments_per_step = get_window_segments(len(data), window_size, step_size)
+    block_size: int = math.gcd(window_size, step_size)
+
+    if block_size >= MIN_BLOCK_SIZE:
+        # Every window is made of whole blocks
+        blocks: NDArray = data[:boundaries[-1]].reshape(-1, block_size)
+        squares: NDArray[np.float64] = np.einsum('ij,ij->i', blocks, blocks)
+        segments_per_window, segments_per_step = window_size // block_size, step_size // block_size
+
+    else:
+        squares = np.empty(len(boundaries) - 1, dtype = np.float64)
+        rows: int = max(1, CHUNK_SIZE // int(np.diff(boundaries).max()))
+        for start in range(0, len(squares), rows):
+            stop: int = min(start + rows, len(squares))
+            chunk: NDArray = data[boundaries[start] : boundaries[stop]]
+            squares[start:stop] = np.add.reduceat(chunk * chunk, boundaries[start:stop] - boundaries[start])
+
+    window_squares: NDArray = sliding_window_view(squares, segments_per_window)[::segments_per_step].sum(axis = 1)
+
+    return np.sqrt(window_squares[:n_windows] / window_size)
+
+def calculate_segment_moments(data: NDArray[np.float64], boundaries: NDArray) -> tuple:
+    '''Calculates the length, mean and sum of squared deviations from the mean (M2) of consecutive segments of data.
+        Segments are processed in chunks so the temporary arrays stay small on long recordings
+
+    Args:
+        data (NDArray[np.float64]): data to split in segments
+        boundaries (NDArray): increasing indices, segment k is data[boundaries[k] : boundaries[k + 1]]
+
+    Returns:
+        tuple[NDArray[np.float64], NDArray[np.float64], NDArray[np.float64]]: length, mean and M2 of each segment
+    '''
+    segment_length: NDArray[np.float64] = np.diff(boundaries).astype(np.float64)
+    n_segments: int = len(segment_length)
+    segment_mean: NDArray[np.float64] = np.empty(n_segments, dtype = np.float64)
+    segment_m2: NDArray[np.float64] = np.empty(n_segments, dtype = np.float64)
+
+    rows: int = max(1, CHUNK_SIZE // int(segment_length.max()))
+    for start in range(0, n_segments, rows):
+        stop: int = min(start + rows, n_segments)
+        chunk: NDArray = data[boundaries[start] : boundaries[stop]]
+        indices: NDArray = boundaries[start:stop] - boundaries[start]
+        lengths: NDArray = segment_length[start:stop]
+
+        mean: NDArray = np.add.reduceat(chunk, indices) / lengths
+        deviation: NDArray = chunk - np.repeat(mean, lengths.astype(np.intp))
+        segment_mean[start:stop] = mean
+        segment_m2[start:stop] = np.add.reduceat(deviation * deviation, indices)
+
+    return segment_length, segment_mean, segment_m2
+
+@instrument('detect_roi_sd')
+def detect_roi_sd(AccZ_sd, threshold: float) -> NDArray:
+    '''Identifies Regions of Interest in the data based on a threshold criterion 
+        applied to the standard deviation values (AccZ_sd)
+        Windows whose standard deviation is greater than twice the threshold value (threshold) are selected,
+        and each run of consecutive selected windows (a single window included) is one region of interest.
+        The peak of a region is its window with the highest standard deviation (the first one on ties)
+
+    Args:
+        AccZ_sd: SD of each window (output of calculate_window_sd)
+        threshold: threshold value for standard deviation
+        
+    Returns:
+        NDArray: structured array (ROI_SD_DTYPE) with the start, end (inclusive) and peak window of each
+            region and the SD at the peak. If no window is above the threshold, a single (0, 0, 0, 0.0)
+            region is returned, so that get_attempts gives 0 failed attempts
+    '''
+    sd: NDArray[np.float64] = np.asarray(AccZ_sd, dtype = np.float64)
+    selected: NDArray[np.bool_] = sd > threshold * 2
+
+    # Run-length encoding of the selected windows: +1 where a run starts, -1 after it ends
+    edges: NDArray[np.int8] = np.diff(selected.astype(np.int8), prepend = 0, append = 0)
+    starts: NDArray[np.intp] = np.flatnonzero(edges == 1)
+    ends: NDArray[np.intp] = np.flatnonzero(edges == -1) - 1
+
+    if len(starts) == 0:
+        return np.array([(0, 0, 0, 0.0)], dtype = ROI_SD_DTYPE)
+
+    # Max of each run. Windows that are not selected are masked with -inf, so each reduceat segment
+    # (from the start of a run to the start of the next one) only sees the windows of its run
+    peak_sd: NDArray[np.float64] = np.maximum.reduceat(np.where(selected, sd, -np.inf), starts)
+
+    # Peak window: first window of each run reaching the max of its run
+    run: NDArray[np.intp] = np.cumsum(edges[:-1] == 1) - 1
+    peaks: NDArray[np.intp] = np.flatnonzero(selected & (sd == peak_sd[np.maximum(run, 0)]))
+    peak_window: NDArray[np.intp] = peaks[np.searchsorted(peaks, starts)]
+
+    regions_of_interest: NDArray = np.empty(len(starts), dtype = ROI_SD_DTYPE)
+    regions_of_interest['start_window'] = starts
+    regions_of_interest['end_window'] = ends
+    regions_of_interest['peak_window'] = peak_window
+    regions_of_interest['peak_sd'] = peak_sd
+
+    return regions_of_interest
+
+def get_attempts_sd(regions_of_interest: list) ->int:
+    ''' Counts the number of identified regions of interest. Since the last region will always be
+        the successful attempt, it substracts 1 to the final count
+
+    Args:
+        regions_of_interest: list with the all the regions that have a standad deviation > set threshold
+
+    Returns:
+        int with Number of failed Attempts
+    '''
+
+    attempts: int = len(regions_of_interest) - 1
+
+    return attempts
+
+def get_roi_indices(jerk: NDArray[np.float64], snap: NDArray[np.float64], jerk_threshold_cal: float, snap_threshold: float) -> pd.DataFrame:
+    '''Identifies indices of regions of interest (ROIs) where jerk, snap or jerk or snap exceed specified thresholds.
+
+    Args:
+        jerk (NDArray[np.float64]): Array of jerk values
+        snap (NDArray[np.float64]): Array of snap values
+        jerk_threshold_cal (float): Threshold for jerk values
+        snap_threshold (float): Threshold for snap values
+
+    Returns:
+       Pandas DataFrame: Indices of regions of interest
+    '''
+    # Ensure both arrays have the same length
+    min_length = min(len(jerk), len(snap))
+    jerk = jerk[:min_length]
+    snap = snap[:min_length]
+       
+    # Detect ROIs where either jerk or snap exceed thresholds
+    roi_mask = (np.abs(jerk) > jerk_threshold_cal) | (np.abs(snap) > snap_threshold)
+    roi_indices = np.where(roi_mask)[0]  # Get indices of true values in the mask
+
+    # Convert to pandas DataFrame
+    import pandas as pd
+
+    roi_indices_df = pd.DataFrame(roi_indices, columns=['ROI_Indices'])
+
+    return roi_indices_df
+ 
+def get_attempts(roi_indices_df) -> int:
+    ''' Counts the number of identified regions of interest. Since the last region will always be
+        the successful attempt, it substracts 1 to the final count
+
+    Args:
+        roi_indices: list with the all the regions that have a jerk > set threshold
+
+    Returns:
+        int with Number of failed Attempts
+    '''
+
+    number_failed_attempts: int = len(roi_indices_df) - 1
+
+    return number_failed_attempts
+
+
+def get_roi_derivative(jerk, snap, jerk_threshold_cal, snap_threshold, gap_tolerance: int = 0) -> list:
+    ''' Identifies Regions of Interest in the data based on a threshold criterion 
+        applied to the Jerk and Snap values
+        It filters out regions where the Jerk or Snap are greater than the threshold value
+        (see detect_roi_derivative).
+
+    Args:
+        jerk: jerk values
+        snap: snap values
+        jerk_threshold_cal: threshold value for Jerk after re calibration
+        snap_threshold: threshold value for Snap
+        gap_tolerance: regions separated by this number of samples or less are merged
+        
+    Returns:
+        list with the (peak index, peak jerk) of each region of interest, [(0, 0)] if there are none
+    '''
+    roi_derivative: NDArray = detect_roi_derivative(jerk, snap, jerk_threshold_cal, snap_threshold, gap_tolerance)
+
+    if len(roi_derivative) == 0:
+        return [(0, 0)]
+
+    return list(zip(roi_derivative['peak_index'].tolist(), roi_derivative['peak_jerk'].tolist()))
+
+@instrument('detect_roi_derivative')
+def detect_roi_derivative(jerk, snap, jerk_threshold_cal: float, snap_threshold: float, gap_tolerance: int = 0) -> NDArray:
+    '''Identifies Regions of Interest where the jerk is greater than jerk_threshold_cal or the snap is
+        greater than snap_threshold. Runs of consecutive samples above the thresholds are one region;
+        runs separated by gap_tolerance samples or less are merged into a single region.
+        The peak of a region is its sample with the highest jerk (the first one on ties)
+
+    Args:
+        jerk: jerk values (sample i of the jerk is sample i of the snap)
+        snap: snap values (one sample shorter than the jerk)
+        jerk_threshold_cal (float): threshold value for Jerk after re calibration
+        snap_threshold (float): threshold value for Snap
+        gap_tolerance (int): maximum number of samples below the thresholds inside a region
+
+    Returns:
+        NDArray: structured array (ROI_DERIVATIVE_DTYPE) with the start, end (inclusive) and peak index
+            of each region (jerk indices) and the jerk at the peak. Empty if there are no regions
+    '''
+    jerk = np.asarray(jerk, dtype = np.float64)
+    snap = np.asarray(snap, dtype = np.float64)
+    n: int = len(jerk)
+
+    selected: NDArray[np.bool_] = jerk > jerk_threshold_cal
+    selected[:len(snap)] |= snap[:n] > snap_threshold
+
+    # Run-length encoding of the selected samples
+    edges: NDArray[np.int8] = np.diff(selected.astype(np.int8), prepend = 0, append = 0)
+    starts: NDArray[np.intp] = np.flatnonzero(edges == 1)
+    ends: NDArray[np.intp] = np.flatnonzero(edges == -1) - 1
+
+    if len(starts) == 0:
+        return np.empty(0, dtype = ROI_DERIVATIVE_DTYPE)
+
+    # Merge runs separated by short gaps
+    separate: NDArray[np.bool_] = starts[1:] - ends[:-1] - 1 > gap_tolerance
+    starts = starts[np.concatenate(([True], separate))]
+    ends = ends[np.concatenate((separate, [True]))]
+
+    # Samples inside the regions (merged gaps included)
+    boundaries: NDArray[np.int64] = np.zeros(n + 1, dtype = np.int64)
+    boundaries[starts] += 1
+    boundaries[ends + 1] -= 1
+    in_region: NDArray[np.bool_] = np.cumsum(boundaries[:-1]) > 0
+
+    # Max jerk of each region, samples outside the regions (or NaN) are masked with -inf
+    values: NDArray[np.float64] = np.where(in_region & ~np.isnan(jerk), jerk, -np.inf)
+    peak_jerk: NDArray[np.float64] = np.maximum.reduceat(values, starts)
+
+    # Peak index: first sample of each region reaching the max of its region
+    first: NDArray[np.bool_] = np.zeros(n, dtype = np.bool_)
+    first[starts] = True
+    region: NDArray[np.intp] = np.cumsum(first) - 1
+    peaks: NDArray[np.intp] = np.flatnonzero(in_region & (values == peak_jerk[np.maximum(region, 0)]))
+    peak_index: NDArray[np.intp] = peaks[np.searchsorted(peaks, starts)]
+
+    regions_of_interest: NDArray = np.empty(len(starts), dtype = ROI_DERIVATIVE_DTYPE)
+    regions_of_interest['start_index'] = starts
+    regions_of_interest['end_index'] = ends
+    regions_of_interest['peak_index'] = peak_index
+    regions_of_interest['peak_jerk'] = peak_jerk
+
+    return regions_of_interest
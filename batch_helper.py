@@ -0,0 +1,285 @@
+# Recovery Score Calculations: batch_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: non-interactive entry point. Scores every case CSV in a directory (or matching a glob pattern)
+# across a pool of worker processes. Results are collected in the parent process and written to the results store
+# (RS_output.csv, or an SQLite database with --store results.db) once. Cases already scored from the same file
+# with the same config.py parameters are skipped (see results_index_helper) unless --force is given.
+# Usage: python batch_helper.py <directory or glob> [--workers N] [--streaming [--chunksize ROWS]] [--plots save --plot-dir DIR] [--store results.db] [--force] [--fused]
+#        [--instrument [LOG] [--trace-memory] [--profile-dir DIR]] (per-stage records, p50/p95 printed at the end)
+
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from numpy.typing import NDArray
+
+import config
+from acceleration_helper import get_max_accelerations, get_sa_2axes_array, get_sumua_array
+from attempt_detection_helper import calculate_window_sd, detect_roi_sd, get_attempts, set_jerk_threshold
+from CSV_helper import CSV, get_date, rename
+from derivative_helper import calculate_derivatives
+from file_helper import read_csv_from_recumbency, build_cache, apply_moving_average, apply_kalman_filter
+from graph_helper import plot_acceleration_data, get_plot_jerk_snap, get_plot_sd_with_roi
+from instrumentation_helper import configure, instrument_case, print_summary
+from output_results_helper import get_recovery_score
+from region_helper import get_roi_bounds_sd
+from render_helper import PlotRenderer, use_headless_backend
+from results_index_helper import ResultsIndex, get_parameters_hash, get_run_parameters
+from results_store_helper import get_store
+from fused_pipeline_helper import score_case_fused
+from streaming_helper import score_case_streaming
+
+# Imported once by the forkserver process (see get_pool_context): the running script and this module with
+# numpy, pandas and the stage modules
+PRELOAD_MODULES: list[str] = ['__main__', 'batch_helper']
+
+def find_case_files(source: str) -> list[str]:
+    '''Lists the case files to be scored
+
+    Args:
+        source (str): directory containing the case CSV files, or a glob pattern (e.g. 'data/36*.csv')
+
+    Returns:
+        list[str]: sorted list of paths to the case CSV files
+    '''
+    pattern: str = os.path.join(source, '*.csv') if os.path.isdir(source) else source
+
+    return sorted(glob.glob(pattern))
+
+def process_case(file_path: str, plot_mode: str = 'off', plot_dir: str = 'plots', plot_format: str = 'png', signal_dtype: str | None = None, use_cache: bool = True) -> dict:
+    '''Runs the full SD pipeline for one case without writing to RS_output.csv.
+        read_csv_from_recumbency (read_csv_file + initial_filter) -> apply_moving_average -> calculate_derivatives
+        -> calculate_window_sd -> detect_roi_sd -> recovery score
+        Parameters are read from config.py. Plots are skipped by default; in 'save' mode they are
+        written to plot_dir/<case> from a background thread while the score is computed
+
+    Args:
+        file_path (str): path to the case CSV file
+        plot_mode (str): 'off' or 'save' ('show' would block the worker)
+        plot_dir (str): directory for the plot files
+        plot_format (str): file format of the plot files (png, svg, ...)
+        signal_dtype (str | None): 'float64', 'float32' or 'int16' (see compact_helper). Defaults to config.signal_dtype
+        use_cache (bool): write the binary cache of the recording if it has none (parses the whole file once) and
+            read from it (default True). If False the csv file is read from recumbency on, without writing the cache
+
+    Returns:
+        dict: entry for RS_output.csv (see CSV.make_entry)
+    '''
+    if use_cache:
+        build_cache(rename(file_path), config.timestamp_format, config.timestamp_mode, config.sample_period_ms)
+
+    # read_csv_from_recumbency adds the .csv extension itself
+    df_filtered, start_offset = read_csv_from_recumbency(rename(file_path), config.target_value, use_cache, timestamp_format = config.timestamp_format, timestamp_mode = config.timestamp_mode, sample_period_ms = config.sample_period_ms, signal_dtype = signal_dtype or config.signal_dtype)
+
+    if df_filtered.empty:
+        raise ValueError(f'Failed to load DataFrame from {file_path}')
+
+    case_number: str = rename(os.path.basename(file_path))
+    print(f'{case_number}: recording used from row {start_offset}')
+
+    with PlotRenderer(plot_mode, os.path.join(plot_dir, case_number), plot_format) as renderer:
+        return score_case(df_filtered, case_number, renderer)
+
+def score_case(df_filtered: pd.DataFrame, case_number: str, renderer: PlotRenderer) -> dict:
+    '''Scores a recording loaded with read_csv_from_recumbency (see process_case)
+
+    Args:
+        df_filtered (pd.DataFrame): recording from sternal recumbency on
+        case_number (str): case number written to RS_output.csv
+        renderer (PlotRenderer): plots are submitted to it
+
+    Returns:
+        dict: entry for RS_output.csv (see CSV.make_entry)
+    '''
+    df_moving_avg: pd.DataFrame = apply_moving_average(df_filtered, config.target_moving_avg)
+    df_avg = pd.DataFrame({'timeStamp': df_moving_avg['timeStamp'], 'Acc_Z': df_moving_avg['Acc_Z']})
+
+    if renderer.enabled:
+        df_kalman: pd.DataFrame = apply_kalman_filter(df_filtered, config.process_variance, config.measurement_variance, config.estimated_measurement_variance)
+        renderer.submit(plot_acceleration_data, df_filtered, df_moving_avg, df_kalman)
+
+    jerk, snap = calculate_derivatives(df_avg)
+    renderer.submit(get_plot_jerk_snap, jerk, snap, df_avg)
+    mean_jerk, std_jerk, jerk_threshold_cal = set_jerk_threshold(jerk, config.factor, config.percentile)
+
+    AccZ_sd: NDArray[np.float64] = calculate_window_sd(jerk, config.window_size, config.step_size, threshold = config.threshold)
+    roi_sd: NDArray = detect_roi_sd(AccZ_sd, config.threshold)
+    number_failed_attempts: int = get_attempts(roi_sd)
+    renderer.submit(get_plot_sd_with_roi, jerk, df_avg, roi_sd, config.window_size, config.step_size, case_number)
+
+    roi_starts, roi_ends = get_roi_bounds_sd(roi_sd, config.window_size, config.step_size, len(df_filtered))
+    amax: NDArray[np.float64] = get_max_accelerations(df_filtered[['Acc_X', 'Acc_Y', 'Acc_Z']].to_numpy(), roi_starts, roi_ends)
+
+    sa_2axes: float = get_sa_2axes_array(amax)
+    sumua: float = get_sumua_array(amax)
+    rs_2axes_py: float = get_recovery_score(number_failed_attempts, sa_2axes, sumua)
+
+    # Single and successful attempt: there is no value for sumua (same as add_sa)
+    if number_failed_attempts < 1:
+        sumua = None
+
+    return CSV.make_entry(get_date(), case_number, config.jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, config.threshold, number_failed_attempts, sa_2axes, sumua, rs_2axes_py)
+
+def score_file(score_function, file_path: str) -> dict:
+    '''Runs a scoring function on one case, measured as one case when instrumentation is on
+
+    Args:
+        score_function: process_case, score_case_streaming or score_case_fused
+        file_path (str): path to the case CSV file
+
+    Returns:
+        dict: entry for RS_output.csv (see CSV.make_entry)
+    '''
+    with instrument_case(rename(os.path.basename(file_path))):
+        return score_function(file_path)
+
+def get_pool_context():
+    '''Start method of the worker processes. Where it is available, 'forkserver': PRELOAD_MODULES are imported
+        once by the server process and every worker is forked from it with them loaded, instead of importing them
+        again (spawn), and without forking a parent that may run threads (fork). Elsewhere (Windows), the default
+        context
+
+    Returns:
+        multiprocessing context for ProcessPoolExecutor(mp_context = ...)
+    '''
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(PRELOAD_MODULES)
+
+    return context
+
+def initialize_worker(plot_mode: str = 'off') -> None:
+    '''Pool initializer: when plots are saved, loads matplotlib once per worker process when it starts,
+        instead of during its first case
+
+    Args:
+        plot_mode (str): 'off' or 'save'
+    '''
+    if plot_mode == 'save':
+        use_headless_backend()
+
+def run_batch(source: str, max_workers: int | None = None, streaming: bool = False, chunksize: int = 1_000_000, plot_mode: str = 'off', plot_dir: str = 'plots', plot_format: str = 'png', store_path: str = CSV.CSV_FILE, force: bool = False, index_path: str = 'results_index.db', fused: bool = False, use_cache: bool = True) -> list[dict]:
+    '''Scores every case found in 'source' using a process pool and writes all the results
+        to the results store at once from the parent process. Cases that fail are reported and skipped.
+        Cases already scored from the same file content with the same parameters, into the same store and with the
+        same pipeline are skipped unless 'force' is True
+
+    Args:
+        source (str): directory or glob pattern with the case CSV files
+        max_workers (int | None): number of worker processes. Defaults to the number of CPUs
+        streaming (bool): use the bounded-memory pipeline (streaming_helper) for very long recordings
+        chunksize (int): number of csv rows per chunk when streaming
+        plot_mode (str): 'off' (default) or 'save' (not available when streaming)
+        plot_dir (str): directory for the plot files, one subdirectory per case
+        plot_format (str): file format of the plot files (png, svg, ...)
+        store_path (str): results store, RS_output.csv by default (.db: SQLite, see results_store_helper)
+        force (bool): score every case, even those that have not changed
+        index_path (str): index of the cases already scored (see results_index_helper)
+        fused (bool): use the array pipeline without DataFrame copies (fused_pipeline_helper, no plots)
+        use_cache (bool): write the binary cache of the recordings that have none and read from it (see process_case)
+
+    Returns:
+        list[dict]: entries written to the results store, in case file order
+    '''
+    file_paths: list[str] = find_case_files(source)
+
+    if not file_paths:
+        print(f'No case files found in {source}')
+        return []
+
+    index = ResultsIndex(index_path)
+    pipeline: str = 'streaming' if streaming else 'fused' if fused else 'dataframe'
+    parameters_hash: str = get_parameters_hash(get_run_parameters(store_path, pipeline))
+    keys: dict = {file_path: index.get_key(rename(os.path.basename(file_path)), file_path, parameters_hash) for file_path in file_paths}
+
+    if not force:
+        unchanged: set[str] = {file_path for file_path in file_paths if index.get_scored_date(keys[file_path]) is not None}
+        file_paths = [file_path for file_path in file_paths if file_path not in unchanged]
+
+        if unchanged:
+            print(f'{len(unchanged)} cases already scored with the same file, parameters, store and pipeline, skipped (use --force to score them again)')
+
+        if not file_paths:
+            index.close()
+            return []
+
+    print(f'Scoring {len(file_paths)} cases...')
+
+    if streaming:
+        score_function = partial(score_case_streaming, chunksize = chunksize)
+    elif fused:
+        score_function = score_case_fused
+    else:
+        score_function = partial(process_case, plot_mode = plot_mode, plot_dir = plot_dir, plot_format = plot_format, use_cache = use_cache)
+
+    results: dict = {}
+
+    with ProcessPoolExecutor(max_workers = max_workers, mp_context = get_pool_context(), initializer = initialize_worker, initargs = (plot_mode,)) as executor:
+        futures: dict = {executor.submit(score_file, score_function, file_path): file_path for file_path in file_paths}
+
+        for future in as_completed(futures):
+            file_path: str = futures[future]
+
+            try:
+                results[file_path] = future.result()
+                print(f'{file_path} scored successfully')
+
+            except Exception as e:
+                print(f'An error occurred while scoring {file_path}:', str(e))
+
+    entries: list[dict] = [results[file_path] for file_path in file_paths if file_path in results]
+
+    if entries:
+        with get_store(store_path, batch_size = len(entries)) as store:
+            store.add_entries(entries)
+        print(f'Results saved in {store_path}')
+
+        # Only recorded once the results are saved
+        index.mark_scored([keys[file_path] for file_path in file_paths if file_path in results], [entry['Date'] for entry in entries])
+
+    index.close()
+
+    print(f'{len(entries)} of {len(file_paths)} cases scored')
+
+    return entries
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = 'Scores a batch of recovery recordings')
+    parser.add_argument('source', help = 'directory with the case CSV files, or a glob pattern')
+    parser.add_argument('--workers', type = int, default = None, help = 'number of worker processes (default: number of CPUs)')
+    parser.add_argument('--streaming', action = 'store_true', help = 'read the recordings in chunks to bound memory use')
+    parser.add_argument('--chunksize', type = int, default = 1_000_000, help = 'number of csv rows per chunk when streaming')
+    parser.add_argument('--plots', choices = ['off', 'save'], default = 'off', help = 'skip plots (default) or save them to files')
+    parser.add_argument('--plot-dir', default = 'plots', help = 'directory for the plot files (one subdirectory per case)')
+    parser.add_argument('--plot-format', default = 'png', help = 'file format of the plot files (png, svg, ...)')
+    parser.add_argument('--store', default = CSV.CSV_FILE, help = 'results store: csv file or SQLite database (.db)')
+    parser.add_argument('--force', action = 'store_true', help = 'score every case, even those already scored with the same file and parameters')
+    parser.add_argument('--fused', action = 'store_true', help = 'use the array pipeline without DataFrame copies (less memory, no plots)')
+    parser.add_argument('--no-cache', action = 'store_true', help = 'do not write or read the binary cache (reads the csv files from recumbency on)')
+    parser.add_argument('--instrument', nargs = '?', const = 'instrumentation.jsonl', default = None, help = 'append per-stage timings to a JSON lines file (default: instrumentation.jsonl)')
+    parser.add_argument('--trace-memory', action = 'store_true', help = 'with --instrument, also measure the memory allocated by each stage (slower)')
+    parser.add_argument('--profile-dir', default = None, help = 'with --instrument, save a cProfile dump per case in this directory')
+    args = parser.parse_args()
+
+    if args.instrument:
+        configure(args.instrument, args.trace_memory, args.profile_dir)
+    start: float = time.time()
+
+    run_batch(args.source, args.workers, args.streaming, args.chunksize, args.plots, args.plot_dir, args.plot_format, args.store, args.force, fused = args.fused, use_cache = not args.no_cache)
+
+    if args.instrument:
+        print_summary(args.instrument, since = start)
+
+if __name__ == "__main__":
+
+    main()
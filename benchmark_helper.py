@@ -0,0 +1,1078 @@
+# Recovery Score Calculations: benchmark_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: benchmarks for the processing stages. Each benchmark compares the current implementation
+# with the original (reference) one and checks that both give the same numbers.
+# The stage suite (--stages) writes a synthetic recording with known attempts, times every pipeline stage
+# (time, throughput in recording samples per second, peak memory), checks the detected attempts and recovery
+# score against the ground truth and saves everything to benchmarks/<date>.json to compare runs over time.
+# The compact mode validation (--validate-compact) scores a corpus with every signal_dtype (see compact_helper) and
+# reports the ROI counts, rs_2axes_py and peak memory of each mode against float64 (exits with an error if a mode
+# changes a ROI count or moves rs_2axes_py by more than its tolerance, COMPACT_RTOL).
+# Usage: python benchmark_helper.py [--stages [--samples 2000000] [--attempts 3] [--noise 0.02] [--output-dir benchmarks]]
+#        python benchmark_helper.py --validate-compact <directory or glob> [--output-dir benchmarks]
+#        python benchmark_helper.py --startup [--baseline <git revision>] (import times and worker pool start up)
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from numpy.typing import NDArray
+
+import config
+from archive_helper import RecordingArchive
+from acceleration_helper import get_max_accelerations, get_max_accelerations_x, get_max_accelerations_y, get_max_accelerations_z, get_sa_2axes_array, get_sumua_array
+from attempt_detection_helper import ROI_SD_DTYPE, calculate_window_sd, detect_roi_derivative, detect_roi_sd, get_attempts, set_jerk_threshold
+from batch_helper import find_case_files, get_pool_context, process_case
+from CSV_helper import get_date, rename
+from decimation_helper import get_min_max_indices
+from derivative_helper import calculate_derivatives
+from file_helper import READ_CSV_OPTIONS, build_cache, read_csv_file, read_csv_from_recumbency, initial_filter, apply_moving_average, apply_kalman_filter
+from fused_pipeline_helper import score_case_fused
+from output_results_helper import get_recovery_score
+from region_helper import get_number_roi_sd, get_roi_bounds_sd
+from render_helper import use_headless_backend
+
+def calculate_window_sd_loop(jerk, window_size: int, step_size: int) -> list:
+    '''Reference implementation of calculate_window_sd (one np.std call per window)
+
+    Args:
+        jerk: jerk data
+        window_size (int): window size
+        step_size (int): number of data points by which the window advances
+
+    Returns:
+        list of float values
+    '''
+    n: int = len(jerk)
+    sd_list: list = []
+    for i in range(0, n - window_size + 1, step_size):
+        window = jerk[i : i + window_size]
+        sd = np.std(window)
+        sd_list.append(sd)
+
+    return sd_list
+
+def detect_roi_sd_loop(AccZ_sd, threshold: float) -> list:
+    '''Reference implementation of detect_roi_sd (Python loops, drops single-window regions)
+
+    Args:
+        AccZ_sd: SD of each window
+        threshold: threshold value for standard deviation
+
+    Returns:
+        list with the regions of interest (peak window, peak SD)
+    '''
+    filtered = list()
+
+    for i in range(len(AccZ_sd)):
+        if AccZ_sd[i] > threshold*2:
+            filtered.append((i, AccZ_sd[i]))
+
+    regions_of_interest = list()
+    big = 0
+    index = 0
+    for j in range(len(filtered) - 1):
+        if filtered[j][0] + 1 == filtered[j + 1][0]:
+            if filtered[j][1] > big:
+                big = filtered[j][1]
+                index = filtered[j][0]
+            elif filtered[j + 1][1] > big:
+                big = filtered[j + 1][1]
+                index = filtered[j + 1][0]
+        elif big > 0:
+            regions_of_interest.append((index, big))
+            big = 0
+            index = 0
+
+    regions_of_interest.append((index, big))
+
+    return regions_of_interest
+
+def get_roi_derivative_loop(jerk, snap, jerk_threshold_cal, snap_threshold) -> list:
+    '''Reference implementation of get_roi_derivative (Python loops, no gap tolerance)
+
+    Args:
+        jerk: jerk values
+        snap: snap values
+        jerk_threshold_cal: threshold value for Jerk
+        snap_threshold: threshold value for Snap
+
+    Returns:
+        list with the regions of interest (peak index, peak value)
+    '''
+    filtered = list()
+    for i in range(len(jerk)):
+        if jerk[i] > jerk_threshold_cal:
+            filtered.append((i, jerk[i]))
+
+    for i in range(len(snap)):
+        if snap[i] > snap_threshold:
+            filtered.append((i, snap[i]))
+
+    roi_derivative = list()
+    big = 0
+    index = 0
+    for j in range(len(filtered) - 1):
+        if filtered[j][0] + 1 == filtered[j + 1][0]:
+            if filtered[j][1] > big:
+                big = filtered[j][1]
+                index = filtered[j][0]
+            elif filtered[j + 1][1] > big:
+                big = filtered[j + 1][1]
+                index = filtered[j + 1][0]
+        elif big > 0:
+            roi_derivative.append((index, big))
+            big = 0
+            index = 0
+
+    roi_derivative.append((index, big))
+
+    return roi_derivative
+
+def generate_jerk(n_samples: int, seed: int = 0) -> NDArray[np.float64]:
+    '''Generates a synthetic jerk signal with the magnitude of real recordings (~1e-9 noise, ~1e-7 bursts)
+
+    Args:
+        n_samples (int): length of the signal
+        seed (int): seed for the random number generator
+
+    Returns:
+        NDArray[np.float64]: synthetic jerk signal
+    '''
+    rng = np.random.default_rng(seed)
+    jerk: NDArray[np.float64] = rng.normal(0.0, 2e-9, n_samples)
+
+    # One burst (attempt) every ~10 minutes of 200 Hz data
+    for start in range(60_000, n_samples - 3_000, 120_000):
+        jerk[start : start + 3_000] += rng.normal(0.0, 1e-7, 3_000)
+
+    return jerk
+
+def time_function(function, *args, repeat: int = 3) -> tuple:
+    '''Runs a function several times and keeps the best time
+
+    Args:
+        function: function to time
+        *args: arguments for the function
+        repeat (int): number of runs
+
+    Returns:
+        tuple: best time in seconds and the result of the last run
+    '''
+    best: float = float('inf')
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+def measure_peak_memory(function, *args) -> tuple:
+    '''Runs a function once and measures the peak of the memory it allocates (numpy arrays included)
+
+    Args:
+        function: function to measure
+        *args: arguments for the function
+
+    Returns:
+        tuple: peak memory in bytes and the result of the function
+    '''
+    tracemalloc.start()
+
+    try:
+        result = function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+
+    finally:
+        tracemalloc.stop()
+
+    return peak, result
+
+def generate_recording(n_samples: int, n_attempts: int = 3, noise: float = 0.02, burst_amplitude: float = 3.0, burst_length: int = 1000, seed: int = 0, lead_in: float = 0.05) -> tuple:
+    '''Generates a synthetic recording (200 Hz, 5 ms between samples) with known attempts: the horse is lying
+        (Acc_Z ~ 0.5) for the first 'lead_in' fraction of the samples (5% by default), then in sternal recumbency (Acc_Z ~ 9.5), with 'n_attempts'
+        bursts of strong accelerations evenly spaced. Accelerations are rounded to 6 decimals, as written in the csv file
+
+    Args:
+        n_samples (int): number of samples
+        n_attempts (int): number of attempts (the last one is the successful attempt)
+        noise (float): SD of the sensor noise (m/s^2)
+        burst_amplitude (float): SD of the accelerations added during an attempt (m/s^2)
+        burst_length (int): number of samples of each attempt (at most window_size - step_size, so one window contains it)
+        seed (int): seed for the random number generator
+        lead_in (float): fraction of the samples before sternal recumbency
+
+    Returns:
+        tuple: recording (timeStamp, Acc_X, Acc_Y, Acc_Z) and ground truth (attempt rows, max absolute
+            accelerations of each attempt and the expected scores)
+    '''
+    recumbency: int = round(n_samples * lead_in)
+    spacing: int = (n_samples - recumbency) // max(n_attempts, 1)
+
+    if burst_length > config.window_size - config.step_size or spacing < 3 * config.window_size:
+        raise ValueError(f'{n_samples} samples are not enough for {n_attempts} attempts of {burst_length} samples')
+
+    rng = np.random.default_rng(seed)
+    acc: NDArray[np.float64] = rng.normal(0.0, noise, (n_samples, 3))
+    acc[:recumbency, 2] += 0.5
+    acc[recumbency:, 2] += 9.5
+
+    starts: list[int] = [recumbency + spacing * k + spacing // 2 for k in range(n_attempts)]
+    for start in starts:
+        acc[start : start + burst_length] += rng.normal(0.0, burst_amplitude, (burst_length, 3))
+
+    acc = np.round(acc, 6)
+    amax: NDArray[np.float64] = np.array([np.abs(acc[start : start + burst_length]).max(axis = 0) for start in starts]).reshape(-1, 3)
+
+    number_failed_attempts: int = n_attempts - 1
+    sa_2axes: float = get_sa_2axes_array(amax)
+    sumua: float = get_sumua_array(amax)
+
+    ground_truth: dict = {
+        'n_samples': n_samples,
+        'n_attempts': n_attempts,
+        'recumbency': recumbency,
+        'attempt_starts': starts,
+        'burst_length': burst_length,
+        'amax': amax.tolist(),
+        'number_failed_attempts': number_failed_attempts,
+        'sa_2axes_py': sa_2axes,
+        'sumua_py': sumua if number_failed_attempts >= 1 else None,
+        'rs_2axes_py': get_recovery_score(number_failed_attempts, sa_2axes, sumua),
+    }
+
+    df = pd.DataFrame({
+        'timeStamp': pd.date_range('2024-03-25 10:00:00', periods = n_samples, freq = '5ms'),
+        'Acc_X': acc[:, 0],
+        'Acc_Y': acc[:, 1],
+        'Acc_Z': acc[:, 2],
+    })
+
+    return df, ground_truth
+
+def write_recording(file_path: str, n_samples: int, n_attempts: int = 3, noise: float = 0.02, seed: int = 0, lead_in: float = 0.05) -> dict:
+    '''Writes a synthetic recording (see generate_recording) in the sensor csv layout read by read_csv_file:
+        separator row, header row and units row, then one row per sample
+
+    Args:
+        file_path (str): csv file
+        n_samples (int): number of samples
+        n_attempts (int): number of attempts
+        noise (float): SD of the sensor noise (m/s^2)
+        seed (int): seed for the random number generator
+        lead_in (float): fraction of the samples before sternal recumbency
+
+    Returns:
+        dict: ground truth of the recording
+    '''
+    df, ground_truth = generate_recording(n_samples, n_attempts, noise, seed = seed, lead_in = lead_in)
+    df['timeStamp'] = df['timeStamp'].dt.strftime('%Y-%m-%d %H:%M:%S.%f').str[:-3]
+
+    with open(file_path, 'w', newline = '') as file:
+        file.write('sep=,\ntimeStamp,Acc_X,Acc_Y,Acc_Z\nns,m/s^2,m/s^2,m/s^2\n')
+        df.to_csv(file, header = False, index = False, float_format = '%.6f')
+
+    return ground_truth
+
+def benchmark_window_sd(n_samples: int = 5_000_000, window_size: int = 5000, step_size: int = 1000, repeat: int = 3) -> dict:
+    '''Compares calculate_window_sd with the reference loop and checks numerical agreement
+
+    Args:
+        n_samples (int): length of the synthetic jerk signal (5,000,000 samples is ~7 hours at 200 Hz)
+        window_size (int): window size
+        step_size (int): step size
+        repeat (int): number of runs for each implementation
+
+    Returns:
+        dict: timings, speedup and maximum relative difference between both implementations
+    '''
+    jerk: NDArray[np.float64] = generate_jerk(n_samples)
+
+    loop_time, sd_loop = time_function(calculate_window_sd_loop, jerk, window_size, step_size, repeat = repeat)
+    vectorized_time, sd_vectorized = time_function(calculate_window_sd, jerk, window_size, step_size, repeat = repeat)
+
+    sd_loop = np.asarray(sd_loop)
+    max_rel_diff: float = float(np.max(np.abs(sd_vectorized - sd_loop) / sd_loop))
+
+    results: dict = {
+        'n_samples': n_samples,
+        'window_size': window_size,
+        'step_size': step_size,
+        'loop_s': loop_time,
+        'vectorized_s': vectorized_time,
+        'speedup': loop_time / vectorized_time,
+        'max_rel_diff': max_rel_diff,
+    }
+
+    print(f'calculate_window_sd ({n_samples} samples, window {window_size}, step {step_size}):')
+    print(f'    loop: {loop_time:.3f} s, vectorized: {vectorized_time:.3f} s, speedup: {loop_time / vectorized_time:.1f}x')
+    print(f'    max relative difference: {max_rel_diff:.2e}')
+
+    return results
+
+def benchmark_kalman_filter(n_samples: int = 1_000_000, repeat: int = 1) -> dict:
+    '''Compares the fast Kalman filter (three axes at once) with the original loop (one axis at a time)
+
+    Args:
+        n_samples (int): number of synthetic acceleration samples
+        repeat (int): number of runs for each implementation
+
+    Returns:
+        dict: timings, speedup and maximum absolute difference between both implementations
+    '''
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Acc_X': rng.normal(0.0, 0.5, n_samples),
+        'Acc_Y': rng.normal(0.0, 0.5, n_samples),
+        'Acc_Z': rng.normal(9.5, 0.5, n_samples),
+    })
+
+    loop_time, df_loop = time_function(apply_kalman_filter, df, 1e-5, 1e-1, 1.0, False, repeat = repeat)
+    fast_time, df_fast = time_function(apply_kalman_filter, df, 1e-5, 1e-1, 1.0, True, repeat = repeat)
+    max_abs_diff: float = float(np.max(np.abs(df_fast.to_numpy() - df_loop.to_numpy())))
+
+    results: dict = {
+        'n_samples': n_samples,
+        'loop_s': loop_time,
+        'fast_s': fast_time,
+        'speedup': loop_time / fast_time,
+        'max_abs_diff': max_abs_diff,
+    }
+
+    print(f'apply_kalman_filter ({n_samples} samples, 3 axes):')
+    print(f'    loop: {loop_time:.3f} s, fast: {fast_time:.3f} s, speedup: {loop_time / fast_time:.1f}x')
+    print(f'    max absolute difference: {max_abs_diff:.2e}')
+
+    return results
+
+def benchmark_detect_roi_sd(n_samples: int = 5_000_000, window_size: int = 5000, step_size: int = 10, threshold: float = 1e-08, repeat: int = 3) -> dict:
+    '''Compares detect_roi_sd with the reference loop on the window SDs of a synthetic signal.
+        A small step size gives hundreds of thousands of windows (finer temporal resolution)
+
+    Args:
+        n_samples (int): length of the synthetic jerk signal
+        window_size (int): window size
+        step_size (int): step size
+        threshold (float): SD threshold
+        repeat (int): number of runs for each implementation
+
+    Returns:
+        dict: timings, speedup and number of regions found by each implementation
+    '''
+    AccZ_sd: NDArray[np.float64] = calculate_window_sd(generate_jerk(n_samples), window_size, step_size)
+
+    loop_time, roi_loop = time_function(detect_roi_sd_loop, AccZ_sd, threshold, repeat = repeat)
+    vectorized_time, roi_vectorized = time_function(detect_roi_sd, AccZ_sd, threshold, repeat = repeat)
+
+    results: dict = {
+        'n_windows': len(AccZ_sd),
+        'loop_s': loop_time,
+        'vectorized_s': vectorized_time,
+        'speedup': loop_time / vectorized_time,
+        'regions_loop': len(roi_loop),
+        'regions_vectorized': len(roi_vectorized),
+    }
+
+    print(f'detect_roi_sd ({len(AccZ_sd)} windows, step {step_size}):')
+    print(f'    loop: {loop_time:.3f} s, vectorized: {vectorized_time:.4f} s, speedup: {loop_time / vectorized_time:.1f}x')
+    print(f'    regions: loop {len(roi_loop)}, vectorized {len(roi_vectorized)}')
+
+    return results
+
+def benchmark_detect_roi_derivative(n_samples: int = 5_000_000, factor: float = 8.0, percentile: float = 95.0, snap_threshold: float = 1.0, gap_tolerance: int = 1000) -> dict:
+    '''Compares detect_roi_derivative with the reference loop on a synthetic jerk signal
+
+    Args:
+        n_samples (int): length of the synthetic jerk signal
+        factor (float): factor for the jerk threshold (see set_jerk_threshold)
+        percentile (float): percentile for the jerk threshold
+        snap_threshold (float): snap threshold
+        gap_tolerance (int): gap tolerance of the vectorized detector
+
+    Returns:
+        dict: timings, speedup and number of regions found by each implementation
+    '''
+    jerk: NDArray[np.float64] = generate_jerk(n_samples)
+    snap: NDArray[np.float64] = np.diff(jerk)
+    jerk_threshold_cal: float = max(np.mean(jerk) + factor * np.std(jerk), np.percentile(jerk, percentile))
+
+    loop_time, roi_loop = time_function(get_roi_derivative_loop, jerk, snap, jerk_threshold_cal, snap_threshold, repeat = 1)
+    vectorized_time, roi_vectorized = time_function(detect_roi_derivative, jerk, snap, jerk_threshold_cal, snap_threshold, gap_tolerance, repeat = 3)
+
+    results: dict = {
+        'n_samples': n_samples,
+        'loop_s': loop_time,
+        'vectorized_s': vectorized_time,
+        'speedup': loop_time / vectorized_time,
+        'regions_loop': len(roi_loop),
+        'regions_vectorized': len(roi_vectorized),
+    }
+
+    print(f'detect_roi_derivative ({n_samples} samples, gap tolerance {gap_tolerance}):')
+    print(f'    loop: {loop_time:.3f} s, vectorized: {vectorized_time:.3f} s, speedup: {loop_time / vectorized_time:.1f}x')
+    print(f'    regions: loop {len(roi_loop)}, vectorized {len(roi_vectorized)}')
+
+    return results
+
+def get_max_accelerations_slices(df: pd.DataFrame, roi_sd: NDArray, window_size: int, step_size: int) -> NDArray[np.float64]:
+    '''Reference per-region max absolute accelerations (DataFrame slice per region, one scan per axis)
+
+    Args:
+        df (pd.DataFrame): DataFrame with Acc_X, Acc_Y and Acc_Z
+        roi_sd (NDArray): regions of interest (detect_roi_sd)
+        window_size (int): window size
+        step_size (int): step size
+
+    Returns:
+        NDArray[np.float64]: (number of regions, 3) array
+    '''
+    roi_values: list = get_number_roi_sd(df, roi_sd, window_size, step_size)
+
+    return np.column_stack((get_max_accelerations_x(roi_values), get_max_accelerations_y(roi_values), get_max_accelerations_z(roi_values)))
+
+def benchmark_max_accelerations(n_samples: int = 5_000_000, n_regions: int = 200, window_size: int = 5000, step_size: int = 1000, repeat: int = 3) -> dict:
+    '''Compares get_max_accelerations with the DataFrame slices + get_max_accelerations_x/_y/_z
+
+    Args:
+        n_samples (int): number of synthetic acceleration samples
+        n_regions (int): number of regions of interest
+        window_size (int): window size
+        step_size (int): step size
+        repeat (int): number of runs for each implementation
+
+    Returns:
+        dict: timings, speedup and maximum absolute difference between both implementations
+    '''
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Acc_X': rng.normal(0.0, 0.5, n_samples),
+        'Acc_Y': rng.normal(0.0, 0.5, n_samples),
+        'Acc_Z': rng.normal(9.5, 0.5, n_samples),
+    })
+    n_windows: int = (n_samples - window_size) // step_size + 1
+    roi_sd: NDArray = np.zeros(n_regions, dtype = ROI_SD_DTYPE)
+    roi_sd['peak_window'] = np.sort(rng.choice(n_windows, n_regions, replace = False))
+
+    def max_accelerations_array() -> NDArray[np.float64]:
+        roi_starts, roi_ends = get_roi_bounds_sd(roi_sd, window_size, step_size, len(df))
+        return get_max_accelerations(df[['Acc_X', 'Acc_Y', 'Acc_Z']].to_numpy(dtype = np.float64), roi_starts, roi_ends)
+
+    slices_time, amax_slices = time_function(get_max_accelerations_slices, df, roi_sd, window_size, step_size, repeat = repeat)
+    array_time, amax_array = time_function(max_accelerations_array, repeat = repeat)
+    max_abs_diff: float = float(np.max(np.abs(amax_array - amax_slices)))
+
+    results: dict = {
+        'n_samples': n_samples,
+        'n_regions': n_regions,
+        'slices_s': slices_time,
+        'array_s': array_time,
+        'speedup': slices_time / array_time,
+        'max_abs_diff': max_abs_diff,
+    }
+
+    print(f'get_max_accelerations ({n_samples} samples, {n_regions} regions):')
+    print(f'    slices: {slices_time:.3f} s, array: {array_time:.3f} s, speedup: {slices_time / array_time:.1f}x')
+    print(f'    max absolute difference: {max_abs_diff:.2e}')
+
+    return results
+
+def plot_series(time_stamp: NDArray, values: NDArray) -> None:
+    '''Draws a signal into an off-screen figure (Agg backend), as graph_helper does when saving plots
+
+    Args:
+        time_stamp (NDArray): X axis values
+        values (NDArray): Y axis values
+    '''
+    import matplotlib.pyplot as plt
+
+    figure = plt.figure(figsize = (10, 6))
+    plt.plot(time_stamp, values, color = 'blue')
+    figure.canvas.draw()
+    plt.close(figure)
+
+def benchmark_plot_decimation(n_samples: int = 5_000_000) -> dict:
+    '''Compares drawing a full jerk signal with drawing its min/max decimation, and checks that
+        the decimated signal keeps the extremes (the spikes of the attempts)
+
+    Args:
+        n_samples (int): length of the synthetic jerk signal
+
+    Returns:
+        dict: timings, speedup and number of points drawn
+    '''
+    use_headless_backend()
+
+    jerk: NDArray[np.float64] = generate_jerk(n_samples)
+    time_stamp: NDArray[np.float64] = np.arange(n_samples, dtype = np.float64) * 5e6
+
+    full_time, _ = time_function(plot_series, time_stamp, jerk, repeat = 1)
+    decimation_time, indices = time_function(get_min_max_indices, jerk, repeat = 1)
+    decimated_time, _ = time_function(plot_series, time_stamp[indices], jerk[indices], repeat = 1)
+    decimated_time += decimation_time
+
+    keeps_extremes: bool = bool(jerk[indices].max() == jerk.max() and jerk[indices].min() == jerk.min())
+
+    results: dict = {
+        'n_samples': n_samples,
+        'n_points': len(indices),
+        'full_s': full_time,
+        'decimated_s': decimated_time,
+        'speedup': full_time / decimated_time,
+        'keeps_extremes': keeps_extremes,
+    }
+
+    print(f'plot ({n_samples} samples, {len(indices)} points after decimation):')
+    print(f'    full: {full_time:.3f} s, decimated: {decimated_time:.3f} s, speedup: {full_time / decimated_time:.1f}x')
+    print(f'    extremes kept: {keeps_extremes}')
+
+    return results
+
+def benchmark_fused_pipeline(n_samples: int = 2_000_000, repeat: int = 3) -> dict:
+    '''Compares the DataFrame pipeline (batch_helper.process_case) with the fused array pipeline
+        (fused_pipeline_helper.score_case_fused) on a synthetic recording: time, peak memory and results.
+        Both read the recording from the binary cache, which is created before timing
+
+    Args:
+        n_samples (int): number of samples of the synthetic recording (2,000,000 is ~2.8 hours at 200 Hz)
+        repeat (int): number of runs for each implementation
+
+    Returns:
+        dict: timings, peak memory (MB) and whether both give the same scores
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        file_path: str = os.path.join(directory, '900001.csv')
+        write_recording(file_path, n_samples)
+        process_case(file_path)
+
+        dataframe_time, dataframe_entry = time_function(process_case, file_path, repeat = repeat)
+        fused_time, fused_entry = time_function(score_case_fused, file_path, repeat = repeat)
+        dataframe_peak, _ = measure_peak_memory(process_case, file_path)
+        fused_peak, _ = measure_peak_memory(score_case_fused, file_path)
+
+    same_scores: bool = all(dataframe_entry[column] == fused_entry[column] for column in ['Number_failed_attempts', 'sa_2axes_py', 'sumua_py', 'rs_2axes_py'])
+    buffer_mb: float = n_samples * 8 / 1e6
+
+    results: dict = {
+        'n_samples': n_samples,
+        'dataframe_s': dataframe_time,
+        'fused_s': fused_time,
+        'speedup': dataframe_time / fused_time,
+        'dataframe_peak_mb': dataframe_peak / 1e6,
+        'fused_peak_mb': fused_peak / 1e6,
+        'same_scores': same_scores,
+    }
+
+    print(f'pipeline ({n_samples} samples, one column = {buffer_mb:.0f} MB):')
+    print(f'    DataFrame: {dataframe_time:.3f} s, fused: {fused_time:.3f} s, speedup: {dataframe_time / fused_time:.1f}x')
+    print(f'    peak memory: DataFrame {dataframe_peak / 1e6:.0f} MB ({dataframe_peak / 1e6 / buffer_mb:.1f} columns), fused {fused_peak / 1e6:.0f} MB ({fused_peak / 1e6 / buffer_mb:.1f} columns)')
+    print(f'    same scores: {same_scores}')
+
+    return results
+
+def benchmark_archive(n_samples: int = 2_000_000, repeat: int = 3) -> dict:
+    '''Compares reading a synthetic recording from its CSV file and from a compressed archive (archive_helper):
+        size on disk, time to read the whole case and a one minute range, and whether the values are the same
+
+    Args:
+        n_samples (int): number of samples of the synthetic recording
+        repeat (int): number of runs for each reader
+
+    Returns:
+        dict: sizes (MB), timings and whether the archived case matches read_csv_file
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        file_path: str = os.path.join(directory, '900001.csv')
+        write_recording(file_path, n_samples)
+
+        with redirect_stdout(io.StringIO()):
+            archive = RecordingArchive(os.path.join(directory, 'archive'))
+            archive.add_case(file_path)
+            csv_time, df_csv = time_function(read_csv_file, rename(file_path), False, repeat = repeat)
+
+        archive_time, df_archive = time_function(archive.read_case, '900001', repeat = repeat)
+        range_start: pd.Timestamp = df_csv['timeStamp'].iloc[len(df_csv) // 2]
+        range_time, df_range = time_function(archive.read_case, '900001', range_start, range_start + pd.Timedelta(minutes = 1), repeat = repeat)
+
+        csv_mb: float = os.path.getsize(file_path) / 1e6
+        archive_mb: float = archive.get_info('900001')['bytes'] / 1e6
+
+    results: dict = {
+        'n_samples': n_samples,
+        'csv_mb': csv_mb,
+        'archive_mb': archive_mb,
+        'csv_s': csv_time,
+        'archive_s': archive_time,
+        'range_s': range_time,
+        'range_rows': len(df_range),
+        'same_values': bool(df_archive.equals(df_csv)),
+    }
+
+    print(f'archive ({n_samples} samples):')
+    print(f'    size: csv {csv_mb:.1f} MB, archive {archive_mb:.1f} MB ({csv_mb / archive_mb:.1f}x smaller)')
+    print(f'    read: csv {csv_time:.3f} s, archive {archive_time:.3f} s ({csv_time / archive_time:.1f}x faster), one minute range {range_time * 1e3:.1f} ms')
+    print(f'    same values: {results["same_values"]}')
+
+    return results
+
+def read_and_filter(file_path: str, target_value: float, use_cache: bool) -> pd.DataFrame:
+    '''Reference for read_csv_from_recumbency: parses the whole recording, then applies initial_filter
+
+    Args:
+        file_path (str): case number / path without the .csv extension
+        target_value (float): Acc_Z value that signals sternal recumbency
+        use_cache (bool): read from / write to the binary cache
+
+    Returns:
+        pd.DataFrame: recording from sternal recumbency on
+    '''
+    return initial_filter(read_csv_file(file_path, use_cache), target_value)
+
+def benchmark_recumbency_seek(n_samples: int = 2_000_000, lead_in: float = 0.5, repeat: int = 3) -> dict:
+    '''Compares read_csv_file + initial_filter with read_csv_from_recumbency on a synthetic recording with a long
+        lead-in before sternal recumbency, parsing the csv file (no cache) and from a valid binary cache, and checks
+        that both give the same DataFrame and that the start offset is the row where recumbency starts.
+        The csv reader is also checked on a copy of the recording with blank and whitespace-only lines (dropped by
+        pd.read_csv) before and after recumbency
+
+    Args:
+        n_samples (int): number of samples of the synthetic recording
+        lead_in (float): fraction of the samples before sternal recumbency
+        repeat (int): number of runs for each reader
+
+    Returns:
+        dict: timings with and without the cache, start offset and whether the DataFrames are the same (also with
+            blank lines)
+    '''
+    results: dict = {'n_samples': n_samples, 'lead_in': lead_in}
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path: str = os.path.join(directory, '900001.csv')
+        ground_truth: dict = write_recording(file_path, n_samples, lead_in = lead_in)
+
+        with redirect_stdout(io.StringIO()):
+            for source, use_cache in (('csv', False), ('cache', True)):
+                if use_cache:
+                    read_csv_file(rename(file_path))
+
+                original_time, df_original = time_function(read_and_filter, rename(file_path), config.target_value, use_cache, repeat = repeat)
+                seek_time, (df_seek, start_offset) = time_function(read_csv_from_recumbency, rename(file_path), config.target_value, use_cache, repeat = repeat)
+
+                results[source] = {
+                    'original_s': original_time,
+                    'seek_s': seek_time,
+                    'start_offset': start_offset,
+                    'same_values': bool(df_seek.equals(df_original)) and start_offset == ground_truth['recumbency'],
+                }
+
+            blank_path: str = os.path.join(directory, '900002.csv')
+            write_blank_lines(file_path, blank_path)
+            df_original = read_and_filter(rename(blank_path), config.target_value, False)
+            df_seek, start_offset = read_csv_from_recumbency(rename(blank_path), config.target_value, False)
+            results['blank_lines'] = bool(df_seek.equals(df_original)) and start_offset == ground_truth['recumbency']
+
+    print(f'recumbency seek ({n_samples} samples, {lead_in:.0%} before recumbency):')
+    for source in ('csv', 'cache'):
+        timings: dict = results[source]
+        print(f'    {source}: read + initial_filter {timings["original_s"]:.3f} s, seek {timings["seek_s"]:.3f} s ({timings["original_s"] / timings["seek_s"]:.1f}x faster), start offset {timings["start_offset"]}, same values: {timings["same_values"]}')
+    print(f'    csv with blank lines, same values: {results["blank_lines"]}')
+
+    return results
+
+def write_blank_lines(source: str, destination: str, every: int = 997) -> None:
+    '''Copies a csv recording and adds a blank line and a whitespace-only line after every 'every' data rows
+
+    Args:
+        source (str): path to the csv file
+        destination (str): path to the copy
+        every (int): number of data rows between two blank lines
+    '''
+    with open(source, newline = '') as file_in, open(destination, 'w', newline = '') as file_out:
+        for row, line in enumerate(file_in):
+            file_out.write(line)
+
+            if row > READ_CSV_OPTIONS['skiprows'] and row % every == 0:
+                file_out.write('\n' if row % (2 * every) else ' \t\r\n')
+
+# Largest relative difference of rs_2axes_py from float64 accepted for each compact mode. Measured on our recordings:
+# about 3e-9 with float32, from 0 to 6.7e-7 with int16 (the quantization step is 1/32767 of the largest value of an axis)
+COMPACT_RTOL: dict = {'float32': 1e-7, 'int16': 1e-5}
+
+def validate_compact_mode(source: str, signal_dtypes: tuple = ('float32', 'int16'), rtol: dict = COMPACT_RTOL) -> dict:
+    '''Scores every case of a corpus in float64 and in each compact signal_dtype, with the DataFrame pipeline
+        (process_case) and the fused pipeline (score_case_fused), and compares the results with float64:
+        number of ROIs (failed attempts + 1) and rs_2axes_py. The peak memory of each run is measured too,
+        reading the binary cache (written before measuring)
+
+    Args:
+        source (str): directory with the case CSV files, or a glob pattern
+        signal_dtypes (tuple): compact modes to validate
+        rtol (dict): largest relative difference of rs_2axes_py accepted as unchanged, per mode
+
+    Returns:
+        dict: one row per case, pipeline and mode (ROI count, rs_2axes_py, relative difference, peak MB), largest
+            relative difference measured in each mode and whether every compact run kept the ROI count and
+            rs_2axes_py within the tolerance
+    '''
+    rows: list[dict] = []
+    pipelines: dict = {'dataframe': process_case, 'fused': score_case_fused}
+
+    for file_path in find_case_files(source):
+        # Every run reads the binary cache, which is created before measuring (the float64 reference would
+        # otherwise include the csv parse)
+        with redirect_stdout(io.StringIO()):
+            build_cache(rename(file_path), config.timestamp_format, config.timestamp_mode, config.sample_period_ms)
+
+        for pipeline, score_function in pipelines.items():
+            reference: dict | None = None
+
+            for signal_dtype in ('float64', *signal_dtypes):
+                # Progress messages of the stages are not shown
+                with redirect_stdout(io.StringIO()):
+                    if pipeline == 'dataframe':
+                        peak, entry = measure_peak_memory(score_function, file_path, 'off', 'plots', 'png', signal_dtype)
+                    else:
+                        peak, entry = measure_peak_memory(score_function, file_path, signal_dtype)
+
+                reference = reference or {**entry, 'peak_mb': peak / 1e6}
+                rs_difference: float = abs(entry['rs_2axes_py'] - reference['rs_2axes_py']) / abs(reference['rs_2axes_py'])
+
+                rows.append({
+                    'case': entry['Case_Number'],
+                    'pipeline': pipeline,
+                    'signal_dtype': signal_dtype,
+                    'roi_count': entry['Number_failed_attempts'] + 1,
+                    'rs_2axes_py': entry['rs_2axes_py'],
+                    'rs_relative_difference': rs_difference,
+                    'unchanged': bool(entry['Number_failed_attempts'] == reference['Number_failed_attempts'] and rs_difference <= rtol.get(signal_dtype, 0.0)),
+                    'peak_mb': peak / 1e6,
+                    'memory_ratio': reference['peak_mb'] / (peak / 1e6),
+                })
+
+    report: pd.DataFrame = pd.DataFrame(rows)
+    unchanged: bool = bool(report['unchanged'].all()) if len(report) else True
+    max_difference: dict = report.groupby('signal_dtype')['rs_relative_difference'].max().to_dict() if len(report) else {}
+
+    print(f'compact mode validation ({report["case"].nunique() if len(report) else 0} cases):')
+    if len(report):
+        with pd.option_context('display.width', 200, 'display.float_format', '{:.6g}'.format):
+            print(report.to_string(index = False))
+    for signal_dtype in signal_dtypes:
+        print(f'    {signal_dtype}: largest relative difference of rs_2axes_py {max_difference.get(signal_dtype, 0.0):.3g} (tolerance {rtol.get(signal_dtype, 0.0):g})')
+    print(f'    ROI counts and rs_2axes_py unchanged: {unchanged}')
+
+    return {'rtol': rtol, 'max_relative_difference': max_difference, 'unchanged': unchanged, 'cases': rows}
+
+# Entry points timed by benchmark_startup
+STARTUP_MODULES: tuple = ('main', 'batch_helper', 'fused_pipeline_helper')
+
+def get_import_time(module: str, directory: str) -> dict:
+    '''Imports a module in a new interpreter with python -X importtime
+
+    Args:
+        module (str): module name
+        directory (str): directory of the module (working directory of the interpreter)
+
+    Returns:
+        dict: cumulative import time of the module (s), wall time of the interpreter (s) and whether pandas and
+            matplotlib were imported
+    '''
+    start: float = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output = True, text = True, check = True, cwd = directory)
+    wall_time: float = time.perf_counter() - start
+
+    # Lines of -X importtime: 'import time: <self us> | <cumulative us> | <module, indented by depth>'
+    cumulative: dict = {}
+    for line in process.stderr.splitlines():
+        fields: list[str] = line.removeprefix('import time:').split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            cumulative[fields[2].strip()] = int(fields[1]) / 1e6
+
+    return {'import_s': cumulative[module], 'wall_s': wall_time, 'pandas': 'pandas' in cumulative, 'matplotlib': 'matplotlib' in cumulative}
+
+def extract_revision(revision: str, directory: str) -> None:
+    '''Writes the files of a git revision of this repository to a directory (git archive)
+
+    Args:
+        revision (str): git revision (commit, branch or tag)
+        directory (str): destination directory
+    '''
+    archive: bytes = subprocess.run(['git', 'archive', '--format=tar', revision], capture_output = True, check = True, cwd = os.path.dirname(os.path.abspath(__file__))).stdout
+
+    with tarfile.open(fileobj = io.BytesIO(archive)) as tar:
+        tar.extractall(directory, filter = 'data')
+
+def get_worker_pid(task: int) -> int:
+    '''Task of the pool start up benchmark
+
+    Args:
+        task (int): task number
+
+    Returns:
+        int: process id of the worker
+    '''
+    return os.getpid()
+
+def time_pool_startup(mp_context, workers: int) -> float:
+    '''Time to start a process pool and run one task on each worker
+
+    Args:
+        mp_context: multiprocessing context of the pool
+        workers (int): number of worker processes
+
+    Returns:
+        float: seconds
+    '''
+    start: float = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers = workers, mp_context = mp_context) as executor:
+        list(executor.map(get_worker_pid, range(workers)))
+
+    return time.perf_counter() - start
+
+def benchmark_startup(modules: tuple = STARTUP_MODULES, baseline: str | None = None, repeat: int = 5, workers: int = 4) -> dict:
+    '''Measures the start up cost of the entry points: import time of each module in a new interpreter
+        (python -X importtime, best of 'repeat') with the modules it loads, for the working tree and optionally a
+        baseline git revision, and the time to start a worker pool with 'spawn' (every worker imports the modules)
+        and with get_pool_context (modules preloaded once by the forkserver)
+
+    Args:
+        modules (tuple): modules to import
+        baseline (str | None): git revision to compare with (e.g. HEAD~1)
+        repeat (int): number of imports of each module (the first one also compiles the .pyc files)
+        workers (int): number of worker processes of the pool
+
+    Returns:
+        dict: import time, interpreter wall time and loaded modules per version and module, pool start up times
+    '''
+    versions: dict = {'current': os.path.dirname(os.path.abspath(__file__))}
+    rows: list[dict] = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        if baseline is not None:
+            extract_revision(baseline, directory)
+            versions = {baseline: directory, **versions}
+
+        for version, version_dir in versions.items():
+            for module in modules:
+                try:
+                    runs: list[dict] = [get_import_time(module, version_dir) for _ in range(repeat)]
+
+                except subprocess.CalledProcessError:
+                    print(f'    {module} cannot be imported in {version}')
+                    continue
+
+                rows.append({
+                    'version': version,
+                    'module': module,
+                    'import_s': min(run['import_s'] for run in runs),
+                    'wall_s': min(run['wall_s'] for run in runs),
+                    'pandas': runs[0]['pandas'],
+                    'matplotlib': runs[0]['matplotlib'],
+                })
+
+    print(f'startup (best of {repeat}):')
+    for row in rows:
+        loaded: str = ', '.join(name for name in ('pandas', 'matplotlib') if row[name]) or 'numpy only'
+        print(f'    {row["version"]:>10} {row["module"]:<22} import {row["import_s"]:.3f} s, interpreter {row["wall_s"]:.3f} s ({loaded})')
+
+    pool: dict = {'spawn': time_pool_startup(multiprocessing.get_context('spawn'), workers)}
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        pool['forkserver'] = time_pool_startup(get_pool_context(), workers)
+
+    print(f'    pool of {workers} workers: ' + ', '.join(f'{method} {seconds:.3f} s' for method, seconds in pool.items()))
+
+    return {'repeat': repeat, 'workers': workers, 'imports': rows, 'pool_s': pool}
+
+def benchmark_stages(n_samples: int = 2_000_000, n_attempts: int = 3, noise: float = 0.02, seed: int = 0, repeat: int = 3) -> dict:
+    '''Times every stage of the pipeline on a synthetic recording and checks the results against its ground truth.
+        Each stage is timed 'repeat' times (best time kept) and run once more under tracemalloc for its peak memory
+
+    Args:
+        n_samples (int): number of samples of the synthetic recording
+        n_attempts (int): number of attempts in the recording
+        noise (float): SD of the sensor noise (m/s^2)
+        seed (int): seed for the random number generator
+        repeat (int): number of timed runs per stage
+
+    Returns:
+        dict: parameters, per stage results (seconds, samples_per_s, peak_mb) and ground truth check
+    '''
+    stages: list[dict] = []
+
+    def run_stage(name: str, function, *args):
+        # Progress messages of the stages are not shown
+        with redirect_stdout(io.StringIO()):
+            seconds, result = time_function(function, *args, repeat = repeat)
+            peak, _ = measure_peak_memory(function, *args)
+
+        stages.append({'stage': name, 'seconds': seconds, 'samples_per_s': n_samples / seconds, 'peak_mb': peak / 1e6})
+        print(f'    {name:<24}{seconds:9.3f} s{n_samples / seconds / 1e6:9.1f} M samples/s{peak / 1e6:9.1f} MB')
+
+        return result
+
+    print(f'stages ({n_samples} samples, {n_attempts} attempts, noise {noise}):')
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path: str = os.path.join(directory, '900001.csv')
+        ground_truth: dict = write_recording(file_path, n_samples, n_attempts, noise, seed)
+        case: str = rename(file_path)
+
+        run_stage('read_csv_file (csv)', read_csv_file, case, False)
+        with redirect_stdout(io.StringIO()):
+            read_csv_file(case)
+        df: pd.DataFrame = run_stage('read_csv_file (cache)', read_csv_file, case)
+
+        df_filtered: pd.DataFrame = run_stage('initial_filter', initial_filter, df, config.target_value)
+        df_moving_avg: pd.DataFrame = run_stage('apply_moving_average', apply_moving_average, df_filtered, config.target_moving_avg)
+        run_stage('apply_kalman_filter', apply_kalman_filter, df_filtered, config.process_variance, config.measurement_variance, config.estimated_measurement_variance)
+
+        df_avg = pd.DataFrame({'timeStamp': df_moving_avg['timeStamp'], 'Acc_Z': df_moving_avg['Acc_Z']})
+        jerk, snap = run_stage('calculate_derivatives', calculate_derivatives, df_avg)
+        _, _, jerk_threshold_cal = run_stage('set_jerk_threshold', set_jerk_threshold, jerk, config.factor, config.percentile)
+        run_stage('detect_roi_derivative', detect_roi_derivative, jerk, snap, jerk_threshold_cal, config.snap_threshold, config.gap_tolerance)
+
+        AccZ_sd: NDArray[np.float64] = run_stage('calculate_window_sd', calculate_window_sd, jerk, config.window_size, config.step_size, False)
+        roi_sd: NDArray = run_stage('detect_roi_sd', detect_roi_sd, AccZ_sd, config.threshold)
+        AccZ_sd_candidates: NDArray[np.float64] = run_stage('window_sd (candidates)', calculate_window_sd, jerk, config.window_size, config.step_size, False, config.threshold)
+
+        roi_starts, roi_ends = get_roi_bounds_sd(roi_sd, config.window_size, config.step_size, len(df_filtered))
+        acc: NDArray[np.float64] = df_filtered[['Acc_X', 'Acc_Y', 'Acc_Z']].to_numpy(dtype = np.float64)
+        run_stage('get_max_accelerations', get_max_accelerations, acc, roi_starts, roi_ends)
+
+        entry: dict = run_stage('process_case (total)', process_case, file_path)
+        fused_entry: dict = run_stage('score_case_fused (total)', score_case_fused, file_path)
+
+    # Ground truth check: one region of interest per attempt and the expected recovery score
+    detected: dict = {
+        'roi_count': len(roi_sd),
+        'number_failed_attempts': get_attempts(roi_sd),
+        'rs_2axes_py': entry['rs_2axes_py'],
+        'rs_2axes_py_fused': fused_entry['rs_2axes_py'],
+    }
+    check: dict = {
+        'roi_count': detected['roi_count'] == n_attempts,
+        'roi_coarse_to_fine': bool(np.array_equal(detect_roi_sd(AccZ_sd_candidates, config.threshold), roi_sd)),
+        'rs_2axes_py': bool(np.isclose(entry['rs_2axes_py'], ground_truth['rs_2axes_py'], rtol = 1e-12, atol = 0.0)),
+        'rs_2axes_py_fused': bool(np.isclose(fused_entry['rs_2axes_py'], ground_truth['rs_2axes_py'], rtol = 1e-12, atol = 0.0)),
+    }
+
+    print(f'    ROIs: {detected["roi_count"]} (expected {n_attempts}), rs_2axes_py: {entry["rs_2axes_py"]} (expected {ground_truth["rs_2axes_py"]})')
+    print(f'    ground truth matched: {all(check.values())}')
+
+    return {
+        'parameters': {'n_samples': n_samples, 'n_attempts': n_attempts, 'noise': noise, 'seed': seed, 'repeat': repeat},
+        'stages': stages,
+        'ground_truth': ground_truth,
+        'detected': detected,
+        'check': check,
+    }
+
+def get_environment() -> dict:
+    '''Describes where a benchmark ran, so saved results can be compared
+
+    Returns:
+        dict: date, git commit (None outside a git repository), versions and config.py parameters
+    '''
+    try:
+        commit: str | None = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True, check = True, cwd = os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'date': get_date(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {name: value for name, value in vars(config).items() if not name.startswith('_') and isinstance(value, (int, float, str, bool, type(None)))},
+    }
+
+def save_results(results: dict, output_dir: str = 'benchmarks') -> str:
+    '''Saves benchmark results with their environment as <output_dir>/<date>.json (<date>_2.json, ... for later runs in the same minute)
+
+    Args:
+        results (dict): benchmark results
+        output_dir (str): directory of the result files
+
+    Returns:
+        str: path to the saved file
+    '''
+    environment: dict = get_environment()
+    os.makedirs(output_dir, exist_ok = True)
+    file_path: str = os.path.join(output_dir, f'{environment["date"]}.json')
+
+    # Runs within the same minute get a suffix
+    run: int = 1
+    while os.path.exists(file_path):
+        run += 1
+        file_path = os.path.join(output_dir, f'{environment["date"]}_{run}.json')
+
+    with open(file_path, 'w') as file:
+        json.dump({**environment, **results}, file, indent = 2, default = float)
+
+    return file_path
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = 'Benchmarks the processing stages')
+    parser.add_argument('--stages', action = 'store_true', help = 'time every stage on a synthetic recording and save the results as JSON')
+    parser.add_argument('--samples', type = int, default = 2_000_000, help = 'number of samples of the synthetic recording')
+    parser.add_argument('--attempts', type = int, default = 3, help = 'number of attempts in the synthetic recording')
+    parser.add_argument('--noise', type = float, default = 0.02, help = 'SD of the sensor noise (m/s^2)')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed for the random number generator')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'number of timed runs per stage')
+    parser.add_argument('--output-dir', default = 'benchmarks', help = 'directory of the JSON result files')
+    parser.add_argument('--validate-compact', default = None, metavar = 'SOURCE', help = 'compare the compact signal_dtype modes with float64 on the cases of a directory or glob')
+    parser.add_argument('--startup', action = 'store_true', help = 'time the imports of the entry points and the start up of a worker pool, and save the results as JSON')
+    parser.add_argument('--baseline', default = None, metavar = 'REVISION', help = 'git revision whose import times are compared with the working tree (--startup)')
+    args = parser.parse_args()
+
+    if args.startup:
+        results = benchmark_startup(baseline = args.baseline)
+        print(f'Results saved in {save_results(results, args.output_dir)}')
+        return
+
+    if args.validate_compact:
+        results = validate_compact_mode(args.validate_compact)
+        print(f'Results saved in {save_results(results, args.output_dir)}')
+
+        if not results['unchanged']:
+            raise SystemExit('A compact mode changed a ROI count or moved rs_2axes_py beyond its tolerance')
+        return
+
+    if args.stages:
+        results: dict = benchmark_stages(args.samples, args.attempts, args.noise, args.seed, args.repeat)
+        print(f'Results saved in {save_results(results, args.output_dir)}')
+        return
+
+    benchmark_window_sd()
+    benchmark_window_sd(step_size = 833)
+    benchmark_window_sd(step_size = 100)
+    benchmark_detect_roi_sd()
+    benchmark_detect_roi_derivative()
+    benchmark_max_accelerations()
+    benchmark_kalman_filter()
+    benchmark_plot_decimation()
+    benchmark_fused_pipeline()
+    benchmark_archive()
+    benchmark_recumbency_seek()
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,245 @@
+# Recovery Score Calculations: cache_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: binary cache for parsed recordings. The first time a case CSV is read, its columns are saved
+# next to it in '<case>.csv.npycache/' (one .npy file per column, timeStamp as int64 epoch-ns).
+# Later reads memory-map those files instead of parsing the CSV again.
+# The cache is invalidated when the size, modification time and content hash of the CSV no longer match.
+# pandas is only imported to build DataFrames (get_cached_frame): load_cached_columns (fused pipeline) returns numpy arrays.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import numpy as np
+
+from numpy.typing import NDArray
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CACHE_VERSION: int = 1
+CACHE_SUFFIX: str = '.npycache'
+META_FILE: str = 'meta.json'
+COLUMNS: list[str] = ['timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z']
+
+def get_cache_dir(file_path_csv: str) -> str:
+    '''Returns the cache directory of a case file
+
+    Args:
+        file_path_csv (str): path to the case CSV file
+
+    Returns:
+        str: path to the cache directory ('<case>.csv.npycache')
+    '''
+    return file_path_csv + CACHE_SUFFIX
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    '''Calculates the SHA-256 hash of a file, reading it in blocks
+
+    Args:
+        file_path (str): path to the file
+        block_size (int): number of bytes read at a time
+
+    Returns:
+        str: hexadecimal digest
+    '''
+    digest = hashlib.sha256()
+
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+def get_file_fingerprint(file_path: str, content_hash: str | None = None) -> dict:
+    '''Creates the fingerprint used to check that a cached file is still valid
+
+    Args:
+        file_path (str): path to the file
+        content_hash (str | None): SHA-256 of the file if already known, calculated otherwise
+
+    Returns:
+        dict: size (bytes), modification time (ns) and SHA-256 of the file
+    '''
+    stat = os.stat(file_path)
+
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': content_hash if content_hash is not None else hash_file(file_path),
+    }
+
+def is_cache_valid(file_path_csv: str, meta: dict) -> bool:
+    '''Checks a cache entry against the CSV file. Size and modification time are checked first;
+        the content hash is only calculated when the modification time changed (e.g. the file was copied).
+        In that case the stored modification time is updated so the next check is cheap again.
+
+    Args:
+        file_path_csv (str): path to the case CSV file
+        meta (dict): content of the cache meta.json
+
+    Returns:
+        bool: True if the cached columns match the CSV file
+    '''
+    stat = os.stat(file_path_csv)
+
+    if meta.get('version') != CACHE_VERSION or meta.get('size') != stat.st_size:
+        return False
+
+    if meta.get('mtime_ns') == stat.st_mtime_ns:
+        return True
+
+    if meta.get('sha256') != hash_file(file_path_csv):
+        return False
+
+    meta['mtime_ns'] = stat.st_mtime_ns
+    write_meta(get_cache_dir(file_path_csv), meta)
+
+    return True
+
+def get_content_hash(file_path_csv: str) -> str:
+    '''Returns the SHA-256 of a case file, taken from its binary cache when the cache is valid
+        (so an unchanged file is not read again) and calculated otherwise
+
+    Args:
+        file_path_csv (str): path to the case CSV file
+
+    Returns:
+        str: hexadecimal digest
+    '''
+    try:
+        with open(os.path.join(get_cache_dir(file_path_csv), META_FILE)) as file:
+            meta: dict = json.load(file)
+
+        if is_cache_valid(file_path_csv, meta):
+            return meta['sha256']
+
+    except (OSError, ValueError, KeyError):
+        pass
+
+    return hash_file(file_path_csv)
+
+def load_cached_csv(file_path_csv: str) -> pd.DataFrame | None:
+    '''Loads a parsed recording from its binary cache
+
+    Args:
+        file_path_csv (str): path to the case CSV file
+
+    Returns:
+        pd.DataFrame | None: same DataFrame as read_csv_file, or None if there is no valid cache
+    '''
+    columns: dict | None = load_cached_columns(file_path_csv)
+
+    if columns is None:
+        return None
+
+    return get_cached_frame(columns)
+
+def get_cached_frame(columns: dict, start: int = 0) -> pd.DataFrame:
+    '''Copies the cached columns of a recording into the DataFrame returned by read_csv_file, from row 'start' on
+        (only those rows are read from the memory-mapped files)
+
+    Args:
+        columns (dict): arrays returned by load_cached_columns
+        start (int): first row
+
+    Returns:
+        pd.DataFrame: timeStamp, Acc_X, Acc_Y and Acc_Z from row 'start' on (index from 0)
+    '''
+    import pandas as pd
+
+    return pd.DataFrame({
+        'timeStamp': columns['timeStamp'][start:].view('datetime64[ns]'),
+        'Acc_X': columns['Acc_X'][start:],
+        'Acc_Y': columns['Acc_Y'][start:],
+        'Acc_Z': columns['Acc_Z'][start:],
+    })
+
+def load_cached_columns(file_path_csv: str) -> dict | None:
+    '''Memory-maps the cached columns of a recording
+
+    Args:
+        file_path_csv (str): path to the case CSV file
+
+    Returns:
+        dict | None: read-only arrays keyed by column name (timeStamp as int64 ns), or None if there is no valid cache
+    '''
+    cache_dir: str = get_cache_dir(file_path_csv)
+
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as file:
+            meta: dict = json.load(file)
+
+        if not is_cache_valid(file_path_csv, meta):
+            return None
+
+        return {column: np.load(os.path.join(cache_dir, column + '.npy'), mmap_mode = 'r') for column in COLUMNS}
+
+    except (OSError, ValueError):
+        return None
+
+def save_cached_csv(file_path_csv: str, df: pd.DataFrame) -> None:
+    '''Saves the columns of a parsed recording in its binary cache.
+        Columns are written first and meta.json last, so an interrupted write is never seen as a valid cache
+
+    Args:
+        file_path_csv (str): path to the case CSV file
+        df (pd.DataFrame): DataFrame returned by read_csv_file
+    '''
+    cache_dir: str = get_cache_dir(file_path_csv)
+
+    try:
+        os.makedirs(cache_dir, exist_ok = True)
+
+        # Invalidate any previous entry before replacing the columns
+        meta_path: str = os.path.join(cache_dir, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        columns: dict = {
+            'timeStamp': df['timeStamp'].to_numpy(dtype = 'datetime64[ns]').view(np.int64),
+            'Acc_X': df['Acc_X'].to_numpy(dtype = np.float64),
+            'Acc_Y': df['Acc_Y'].to_numpy(dtype = np.float64),
+            'Acc_Z': df['Acc_Z'].to_numpy(dtype = np.float64),
+        }
+        for column, values in columns.items():
+            save_array(os.path.join(cache_dir, column + '.npy'), values)
+
+        meta: dict = get_file_fingerprint(file_path_csv)
+        meta['version'] = CACHE_VERSION
+        meta['rows'] = len(df)
+        write_meta(cache_dir, meta)
+
+    except OSError as e:
+        print('Could not write the binary cache:', str(e))
+
+def save_array(file_path: str, values: NDArray) -> None:
+    '''Saves an array to a .npy file through a temporary file, so readers never see a partial file
+
+    Args:
+        file_path (str): path to the .npy file
+        values (NDArray): array to save
+    '''
+    temporary_path: str = file_path + '.tmp'
+
+    with open(temporary_path, 'wb') as file:
+        np.save(file, np.ascontiguousarray(values))
+
+    os.replace(temporary_path, file_path)
+
+def write_meta(cache_dir: str, meta: dict) -> None:
+    '''Writes the meta.json file of a cache directory
+
+    Args:
+        cache_dir (str): cache directory
+        meta (dict): fingerprint of the CSV file and cache information
+    '''
+    temporary_path: str = os.path.join(cache_dir, META_FILE + '.tmp')
+
+    with open(temporary_path, 'w') as file:
+        json.dump(meta, file)
+
+    os.replace(temporary_path, os.path.join(cache_dir, META_FILE))
@@ -0,0 +1,145 @@
+# Recovery Score Calculations: compact_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: compact representation of the acceleration signals (config.signal_dtype). The sensor writes 6 decimals,
+# so 8 bytes per sample are not needed to hold the raw axes:
+#   - 'float64': original representation
+#   - 'float32': raw axes as float32 (about 7 significant digits)
+#   - 'int16': raw axes as int16 with one scale factor per axis (value = integer * scale); the scale is the
+#     largest absolute value of the axis divided by 32767
+# Only the raw axes are compact. Moving averages, jerk, snap and window SDs are calculated in float64, as the
+# jerk SD threshold (1e-8) needs it. DataFrame stages need real values, so their frames hold the axes as float32
+# in both compact modes (in 'int16' mode the quantized values); the int16 arrays themselves are used by the fused
+# pipeline (batch_helper.py --fused), which decodes them block by block.
+# Validation: python benchmark_helper.py --validate-compact <directory> compares ROI counts and rs_2axes_py with float64
+
+from __future__ import annotations
+
+import numpy as np
+
+from numpy.typing import NDArray
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SIGNAL_DTYPES: tuple = ('float64', 'float32', 'int16')
+
+AXES: list[str] = ['Acc_X', 'Acc_Y', 'Acc_Z']
+
+# Largest int16 value used by the quantization (symmetric, so -32767 ... 32767)
+INT16_MAX: int = 32767
+
+# Values compared at a time by find_first_above (bounds its temporary arrays)
+SEARCH_BLOCK_SIZE: int = 2 ** 16
+
+def check_signal_dtype(signal_dtype: str) -> None:
+    '''Raises ValueError for an unknown signal_dtype
+
+    Args:
+        signal_dtype (str): 'float64', 'float32' or 'int16'
+    '''
+    if signal_dtype not in SIGNAL_DTYPES:
+        raise ValueError(f'Unknown signal_dtype "{signal_dtype}" (use {", ".join(SIGNAL_DTYPES)})')
+
+def get_int16_scale(values: NDArray) -> float:
+    '''Scale factor of an axis quantized to int16: its largest absolute value maps to INT16_MAX
+
+    Args:
+        values (NDArray): axis values
+
+    Returns:
+        float: value of one int16 step (1.0 for an empty or all-zero axis)
+    '''
+    if len(values) == 0:
+        return 1.0
+
+    largest: float = float(max(np.max(values), -np.min(values)))
+
+    if np.isnan(largest):
+        raise ValueError('Axes with NaN values cannot be stored as int16')
+
+    return largest / INT16_MAX if largest > 0 else 1.0
+
+def quantize(values: NDArray, signal_dtype: str) -> tuple:
+    '''Converts an axis to its compact representation
+
+    Args:
+        values (NDArray): axis values
+        signal_dtype (str): 'float64', 'float32' or 'int16'
+
+    Returns:
+        tuple: compact array and scale factor (1.0 unless int16)
+    '''
+    check_signal_dtype(signal_dtype)
+
+    if signal_dtype != 'int16':
+        return np.asarray(values, dtype = signal_dtype), 1.0
+
+    scale: float = get_int16_scale(values)
+
+    # One float64 temporary, rounded in place
+    scaled: NDArray[np.float64] = np.divide(values, scale, dtype = np.float64)
+    np.rint(scaled, out = scaled)
+
+    return scaled.astype(np.int16), scale
+
+def dequantize(values: NDArray, scale: float, dtype = np.float64) -> NDArray:
+    '''Converts a compact axis back to real values
+
+    Args:
+        values (NDArray): compact array
+        scale (float): scale factor from quantize
+        dtype: dtype of the result
+
+    Returns:
+        NDArray: axis values
+    '''
+    if values.dtype.kind == 'f' and scale == 1.0:
+        return values.astype(dtype, copy = False)
+
+    return np.multiply(values, scale, dtype = dtype)
+
+def find_first_above(values: NDArray, target_value: float, scale: float = 1.0, block_size: int = SEARCH_BLOCK_SIZE) -> int | None:
+    '''Index of the first value greater than target_value, searched block by block so a memory-mapped column is
+        only read up to it. Used to find sternal recumbency (first Acc_Z value greater than target_value, the rule
+        of initial_filter) in float64 or compact columns
+
+    Args:
+        values (NDArray): float64 or compact values
+        target_value (float): value to exceed
+        scale (float): scale factor of quantized values (see quantize)
+        block_size (int): number of values compared at a time
+
+    Returns:
+        int | None: index of the first value greater than target_value, None if there is none
+    '''
+    for start in range(0, len(values), block_size):
+        above: NDArray = np.flatnonzero(dequantize(values[start : start + block_size], scale) > target_value)
+
+        if len(above):
+            return start + int(above[0])
+
+    return None
+
+def compact_frame(df: pd.DataFrame, signal_dtype: str) -> pd.DataFrame:
+    '''Converts the axes of a recording read with read_csv_file to the representation used by the DataFrame
+        stages: unchanged for 'float64', float32 otherwise (the int16-quantized values in 'int16' mode)
+
+    Args:
+        df (pd.DataFrame): recording (timeStamp, Acc_X, Acc_Y, Acc_Z)
+        signal_dtype (str): 'float64', 'float32' or 'int16'
+
+    Returns:
+        pd.DataFrame: recording with compact axes (the same DataFrame for 'float64')
+    '''
+    check_signal_dtype(signal_dtype)
+
+    if signal_dtype == 'float64' or df.empty:
+        return df
+
+    for axis in AXES:
+        values, scale = quantize(df[axis].to_numpy(), signal_dtype)
+        df[axis] = dequantize(values, scale, np.float32)
+
+    return df
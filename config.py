@@ -1,7 +1,7 @@
 # Config script
 # This script contains the configuration settings for the analysis of accelerometer data.
 # Script created on 5/19/2025
-# Last revision: 5/19/2025
+# Last revision: 10/17/2026
 
 # acceleration threshold value to signal sternal recumbency for initial filter
 target_value: float = 9.0 
@@ -19,9 +19,19 @@ factor: float = 8.0   # Factor to set jerk threshold (56.55)
 percentile: float = 95.0    # Percentile to set jerk threshold  
 jerk_threshold: float = 4.64e-07 #0.2e-06 #5.7209199129367875e-12  # Threshold for significant jerk
 snap_threshold: float = 1  # Threshold for significant snap (needs re calibration)
+gap_tolerance: int = 1000 # regions closer than this (in cells, 1000 cells are 5secs) are merged into one
 
 # variables for ROI_SD method
 # values that can be changed  to increase/ decrease sensitivity
 window_size: int = 5000 # each cell is 5ms, 10000 cells represent 2secs, 2500 cells are 0.5secs
 step_size: int = 1000 # 2000 cells are 400ms (0.4secs), 833 cells are 166.6ms (0.166secs)
-threshold: float = 1e-08 # default value for SD threshold 1.5 (1.5e-08)
\ No newline at end of file
+threshold: float = 1e-08 # default value for SD threshold 1.5 (1.5e-08)
+standing_time: float = 60.0 # live scoring: seconds without a new attempt after which the horse is considered standing
+
+# variables for reading the csv files
+timestamp_format: str | None = None # format of the timeStamp column (e.g. '%Y-%m-%d %H:%M:%S.%f'), detected from the first rows if None
+timestamp_mode: str = 'parse' # 'parse' or 'sample_rate' (timestamps synthesized from the first one and sample_period_ms)
+sample_period_ms: float = 5.0 # 200 Hz sensor
+
+# representation of the raw acceleration axes in memory: 'float64', or 'float32' / 'int16' to use less memory (see compact_helper)
+signal_dtype: str = 'float64'
\ No newline at end of file
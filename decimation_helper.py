@@ -0,0 +1,65 @@
+# Recovery Score Calculations: decimation_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: reduces long signals to a few thousand points before plotting. The signal is split into buckets
+# of consecutive samples and, for each bucket, the first, last, minimum and maximum samples are kept (M4).
+# A figure a few thousand pixels wide cannot show more than that, and keeping the extremes of every bucket
+# means the spikes that mark attempts are drawn at their original height and timestamp.
+
+import numpy as np
+
+from numpy.typing import NDArray
+
+# Number of buckets per series; with 4 points per bucket a series is reduced to at most 8000 points
+PLOT_BUCKETS: int = 2000
+
+def get_min_max_indices(values: NDArray, n_buckets: int = PLOT_BUCKETS) -> NDArray[np.intp]:
+    '''Finds the samples kept by the min/max (M4) decimation of a signal
+
+    Args:
+        values (NDArray): signal to decimate
+        n_buckets (int): number of buckets the signal is split into
+
+    Returns:
+        NDArray[np.intp]: sorted indices of the first, last, minimum and maximum sample of every bucket
+            (every index if the signal is already short enough)
+    '''
+    values = np.asarray(values, dtype = np.float64)
+    n: int = len(values)
+
+    if n <= 4 * n_buckets:
+        return np.arange(n)
+
+    bucket_size: int = -(-n // n_buckets)
+    n_full: int = n // bucket_size
+    starts: NDArray[np.intp] = np.arange(n_full) * bucket_size
+
+    # Equal-size buckets are reshaped so the extremes of all of them are found in one call
+    buckets: NDArray = values[:n_full * bucket_size].reshape(n_full, bucket_size)
+    indices: list[NDArray] = [
+        starts,
+        starts + bucket_size - 1,
+        starts + np.argmin(buckets, axis = 1),
+        starts + np.argmax(buckets, axis = 1),
+    ]
+
+    # Remaining samples (last, shorter bucket)
+    tail_start: int = n_full * bucket_size
+    if tail_start < n:
+        tail: NDArray = values[tail_start:]
+        indices.append(np.array([tail_start, n - 1, tail_start + np.argmin(tail), tail_start + np.argmax(tail)]))
+
+    return np.unique(np.concatenate(indices))
+
+def get_plot_indices(*series, n_buckets: int = PLOT_BUCKETS) -> NDArray[np.intp]:
+    '''Finds the samples to plot for several signals sharing the same time axis
+        (e.g. the three acceleration axes), so they can all be drawn with the same timestamps
+
+    Args:
+        *series: signals of the same length
+        n_buckets (int): number of buckets each signal is split into
+
+    Returns:
+        NDArray[np.intp]: sorted union of the min/max indices of every signal
+    '''
+    return np.unique(np.concatenate([get_min_max_indices(values, n_buckets) for values in series]))
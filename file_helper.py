@@ -1,171 +1,653 @@
-# Recovery Score Calculations: file_helper Script
-# Script created  3/25/2024
-# Last revision 12/13/2024
-
-import pandas as pd
-import numpy as np
-
-def read_csv_file(file_path) -> pd.DataFrame:
-    '''Adds .csv extension and the reads the first four columns (timeStamp, Acc_X, Acc_Y, Acc_Z) from the csv file
-        using the read_csv function.
-        skips the first row (Sep = ,)
-        Uses the second row as header
-        only reads the first 4 columns to speed up file reading time
-
-    Args:
-        file_path: case number (file_name) entered by user
-
-    Returns:
-        Pandas DataFrame
-    '''
-
-    file_path_csv: str  = add_csv_extension(file_path)
-
-    try:
-        print('reading csv file...')
-
-        df: pd.DataFrame = pd.read_csv(
-            file_path_csv,
-            skiprows = 3, # skip the first 3 rows (separator, headers, units)
-            sep = ',',
-            header = None, # No header in the remaining rows
-            names = ['timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z'],
-            usecols = [0, 1, 2, 3],
-            dtype = {'timeStamp': str, 'Acc_X': float, 'Acc_Y': float, 'Acc_Z': float},
-            encoding ='utf-8',
-            low_memory = False,
-        )
-        
-        # Convert 'TimeStamp' column to datetime format
-        df['timeStamp'] = pd.to_datetime(df['timeStamp'])
-    
-        return df
-
-    except Exception as e:
-
-        print('An error occurred:', str(e))
-        
-        return pd.DataFrame()
-    
-def add_csv_extension(file_path: str) -> str:
-    '''adds '.csv' to the file number
-
-    Args:
-        file_path (str): Case Number
-
-    Returns:
-        str: the Case Number (entered) plus the csv extension (.csv)
-    '''
-
-    file_path_csv: str = file_path + '.csv'
-
-    return file_path_csv
- 
-def initial_filter(df, target_value) -> pd.DataFrame:
-    '''Filters initial csv file and creates a new df ignoring initial acceleration values.
-       Looks into AccZ column (Z axis). Filters out initial values until it finds
-       the first acceleration value on the Z axis that is greater than the 'target value'
-       Signals when horse gains sternal recumbency for the first time.
-        
-    Args:
-        df (pd.DataFrame): first four columns of the initial csv file with formated timeStamp in column 0
-
-    Returns:
-        Pandas DataFrame: A new filtered DataFrame starting from when 'AccZ' exceeds the target value
-    '''
-    
-    try:
-   
-        # Finds the index of the first occurrence of the target value in column 'Acc_Z'
-        start_index: int = df[df['Acc_Z'] > target_value].index[0]
-        
-        # Create the new DataFrame starting from that index
-        filtered_df = df.iloc[start_index:].reset_index(drop = True)
-        
-        return filtered_df
-    
-    except IndexError:
-        # If the target value is not found, return the same dataFrame
-        print(f'No values in "Acc_Z" greater than {target_value} could be found. Returning the original DataFrame')
-
-        return df
-    
-def apply_moving_average(df_filtered, target_moving_avg) -> pd.DataFrame:
-    '''Applies a moving average filter to the acceleration data (Acc_X, Acc_Y, Acc_Z) in the DataFrame.
-
-    Args:
-        df_filtered (pd.DataFrame): DataFrame containing the raw acceleration data.
-        target_moving_avg (int): The window size for the moving average filter.
-
-    Returns:
-        pd.DataFrame: DataFrame with the filtered acceleration data.
-    '''
-    df_moving_avg = df_filtered.copy()
-    
-    df_moving_avg['Acc_X'] = df_filtered['Acc_X'].rolling(window = target_moving_avg, min_periods=1).mean()
-    df_moving_avg['Acc_Y'] = df_filtered['Acc_Y'].rolling(window = target_moving_avg, min_periods=1).mean()
-    df_moving_avg['Acc_Z'] = df_filtered['Acc_Z'].rolling(window = target_moving_avg, min_periods=1).mean()
-    
-    return df_moving_avg
-    
-def clean_data(df, target_value) -> pd.DataFrame:
-    '''Cleans the Acc_Z column in a DataFrame by setting values lower than the threshold to NaN.
-    
-     Args:
-        df (pandas.DataFrame): The input DataFrame that contains an 'Acc_Z' column.
-        target_value (float): The threshold below which values are considered invalid.
-    
-    Returns:
-    pandas.DataFrame: The cleaned DataFrame with values below the threshold set to NaN.
-    '''
-    # Ensure the AccZ column exists
-    if 'Acc_Z' in df.columns:
-        df['Acc_Z'] = df['Acc_Z'].apply(lambda x: x if x >= target_value else np.nan)
-
-    else:
-        raise KeyError('The "Acc_Z" column is not present in the DataFrame.')
-    
-    return df
-
-def apply_kalman_filter(df: pd.DataFrame, process_variance: float, measurement_variance: float, estimated_measurement_variance: float) -> pd.DataFrame:
-    '''Applies a Kalman filter to the Acc_X, Acc_Y, and Acc_Z columns of the input DataFrame.
-
-    Args:
-        df (pd.DataFrame): The input DataFrame containing Acc_X, Acc_Y, and Acc_Z columns.
-        process_variance (float): The process variance (Q).
-        measurement_variance (float): The measurement variance (R).
-        estimated_measurement_variance (float): The estimated measurement variance (P).
-
-    Returns:
-        pd.DataFrame: The DataFrame with Kalman filtered Acc_X, Acc_Y, and Acc_Z columns.
-    '''
-    def kalman_filter(data):
-        n = len(data)
-        xhat = np.zeros(n)       # a posteri estimate of x
-        P = np.zeros(n)          # a posteri error estimate
-        xhatminus = np.zeros(n)  # a priori estimate of x
-        Pminus = np.zeros(n)     # a priori error estimate
-        K = np.zeros(n)          # gain or blending factor
-
-        # initial guesses
-        xhat[0] = data[0]
-        P[0] = estimated_measurement_variance
-
-        for k in range(1, n):
-            # time update
-            xhatminus[k] = xhat[k-1]
-            Pminus[k] = P[k-1] + process_variance
-
-            # measurement update
-            K[k] = Pminus[k] / (Pminus[k] + measurement_variance)
-            xhat[k] = xhatminus[k] + K[k] * (data[k] - xhatminus[k])
-            P[k] = (1 - K[k]) * Pminus[k]
-
-        return xhat
-
-    df_filtered = df.copy()
-    df_filtered['Acc_X'] = kalman_filter(df['Acc_X'].values)
-    df_filtered['Acc_Y'] = kalman_filter(df['Acc_Y'].values)
-    df_filtered['Acc_Z'] = kalman_filter(df['Acc_Z'].values)
-
-    return df_filtered
\ No newline at end of file
+# Recovery Score Calculations: file_helper Script
+# Script created  3/25/2024
+# Last revision 10/17/2026
+
+import pandas as pd
+import numpy as np
+
+from cache_helper import get_cached_frame, load_cached_columns, load_cached_csv, save_cached_csv
+from compact_helper import check_signal_dtype, compact_frame, find_first_above
+from functools import lru_cache
+from instrumentation_helper import instrument
+from numpy.typing import NDArray
+from timestamp_helper import get_fixed_width, get_timestamp_format, parse_fixed_width_timestamps, parse_timestamps, synthesize_timestamps
+from typing import Iterator
+
+# Layout of the sensor csv files, shared by read_csv_file and read_csv_chunks
+READ_CSV_OPTIONS: dict = {
+    'skiprows': 3, # skip the first 3 rows (separator, headers, units)
+    'sep': ',',
+    'header': None, # No header in the remaining rows
+    'names': ['timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z'],
+    'usecols': [0, 1, 2, 3],
+    'dtype': {'timeStamp': str, 'Acc_X': float, 'Acc_Y': float, 'Acc_Z': float},
+    'encoding': 'utf-8',
+}
+
+# Rows of the Acc_Z column read at a time by read_csv_from_recumbency while looking for sternal recumbency
+SEEK_CHUNKSIZE: int = 50_000
+
+# Characters of a blank line for pd.read_csv (get_line_offset)
+WHITESPACE_BYTES: list[int] = [ord(' '), ord('\t'), ord('\r'), ord('\n')]
+
+@instrument('read_csv_file')
+def read_csv_file(file_path, use_cache: bool = True, timestamp_format: str | None = None, timestamp_mode: str = 'parse', sample_period_ms: float = 5.0, signal_dtype: str = 'float64') -> pd.DataFrame:
+    '''Adds .csv extension and the reads the first four columns (timeStamp, Acc_X, Acc_Y, Acc_Z) from the csv file
+        using the read_csv function.
+        skips the first row (Sep = ,)
+        Uses the second row as header
+        only reads the first 4 columns to speed up file reading time
+        If use_cache is True, the parsed columns are saved in a binary cache next to the csv file
+        (see cache_helper) and later reads load them from there while the csv file is unchanged
+        The timeStamp column is parsed with a known format (declared, or detected once from the first rows);
+        in 'sample_rate' mode it is synthesized from the first timestamp and the sample period (see timestamp_helper)
+        With a compact signal_dtype the acceleration columns are returned as float32 (see compact_helper);
+        the binary cache always keeps the float64 values
+
+    Args:
+        file_path: case number (file_name) entered by user
+        use_cache (bool): read from / write to the binary cache (default True)
+        timestamp_format (str | None): format of the timeStamp column (e.g. '%Y-%m-%d %H:%M:%S.%f'), detected if None
+        timestamp_mode (str): 'parse' to parse every timestamp, 'sample_rate' to synthesize them
+            (falls back to 'parse' if the file does not follow the nominal sample period)
+        sample_period_ms (float): nominal sample period used in 'sample_rate' mode (5 ms at 200 Hz)
+        signal_dtype (str): 'float64' (default), 'float32' or 'int16'
+
+    Returns:
+        Pandas DataFrame
+    '''
+
+    check_signal_dtype(signal_dtype)
+    file_path_csv: str  = add_csv_extension(file_path)
+
+    try:
+        if use_cache:
+            df_cached: pd.DataFrame | None = load_cached_csv(file_path_csv)
+
+            if df_cached is not None:
+                print('reading binary cache...')
+                return compact_frame(df_cached, signal_dtype)
+
+        print('reading csv file...')
+
+        if timestamp_mode == 'sample_rate':
+            # Reads the acceleration columns only, the timeStamp strings are never created
+            df: pd.DataFrame = pd.read_csv(file_path_csv, low_memory = False, **{**READ_CSV_OPTIONS, 'usecols': [1, 2, 3]})
+            time_stamp: pd.Series | None = synthesize_timestamps(file_path_csv, len(df), sample_period_ms, timestamp_format)
+
+            if time_stamp is not None:
+                df.insert(0, 'timeStamp', time_stamp)
+                return compact_frame(df, signal_dtype)
+
+            df.insert(0, 'timeStamp', read_csv_parsed(file_path_csv, timestamp_format, usecols = (0,))['timeStamp'])
+
+        elif timestamp_mode == 'parse':
+            df = read_csv_parsed(file_path_csv, timestamp_format)
+
+        else:
+            raise ValueError(f'Unknown timestamp_mode "{timestamp_mode}" (use "parse" or "sample_rate")')
+
+        if use_cache:
+            save_cached_csv(file_path_csv, df)
+    
+        return compact_frame(df, signal_dtype)
+
+    except Exception as e:
+
+        print('An error occurred:', str(e))
+        
+        return pd.DataFrame()
+    
+@instrument('read_csv_from_recumbency')
+def read_csv_from_recumbency(file_path, target_value: float, use_cache: bool = True, timestamp_format: str | None = None, timestamp_mode: str = 'parse', sample_period_ms: float = 5.0, signal_dtype: str = 'float64') -> tuple:
+    '''Reads a recording from sternal recumbency on: same DataFrame as initial_filter(read_csv_file(...)), but the
+        first Acc_Z value greater than target_value is found before the rows are materialized, and the rows before
+        it are never copied:
+        - valid binary cache: the memory-mapped Acc_Z column is searched block by block and only the rows from
+          recumbency on are copied
+        - otherwise: only the Acc_Z column of the csv file is scanned, in chunks, until the first value greater
+          than target_value; the parser then starts at the byte offset of that row (the timestamps of the rows
+          before it are never parsed). The binary cache is not written here, see build_cache
+        If no Acc_Z value is greater than target_value the whole recording is returned, as initial_filter does
+
+    Args:
+        file_path: case number (file_name) entered by user
+        target_value (float): Acc_Z value that signals sternal recumbency
+        use_cache (bool): read from the binary cache when it is valid (default True)
+        timestamp_format (str | None): format of the timeStamp column (e.g. '%Y-%m-%d %H:%M:%S.%f'), detected if None
+        timestamp_mode (str): 'parse' or 'sample_rate' (see read_csv_file)
+        sample_period_ms (float): nominal sample period used in 'sample_rate' mode (5 ms at 200 Hz)
+        signal_dtype (str): 'float64' (default), 'float32' or 'int16'
+
+    Returns:
+        tuple: Pandas DataFrame starting at recumbency (index from 0) and start offset (row of the recording
+            where it starts, 0 if no Acc_Z value is greater than target_value)
+    '''
+    check_signal_dtype(signal_dtype)
+    file_path_csv: str = add_csv_extension(file_path)
+
+    try:
+        columns: dict | None = load_cached_columns(file_path_csv) if use_cache else None
+
+        if columns is not None:
+            print('reading binary cache...')
+            start: int | None = find_first_above(columns['Acc_Z'], target_value)
+            df: pd.DataFrame = get_cached_frame(columns, start or 0)
+
+        else:
+            position: tuple | None = seek_csv_recumbency(file_path_csv, target_value)
+            start, offset = position if position is not None else (None, 0)
+            print(f'reading csv file from row {start or 0}...')
+            df = read_csv_rows(file_path_csv, start or 0, offset, timestamp_format, timestamp_mode, sample_period_ms)
+
+    except Exception as e:
+        print('An error occurred:', str(e))
+        return pd.DataFrame(), 0
+
+    if start is None:
+        print(f'No values in "Acc_Z" greater than {target_value} could be found. Returning the original DataFrame')
+
+    return compact_frame(df, signal_dtype), start or 0
+
+def build_cache(file_path, timestamp_format: str | None = None, timestamp_mode: str = 'parse', sample_period_ms: float = 5.0) -> bool:
+    '''Parses a whole csv file once and saves its binary cache (see cache_helper), so later reads memory-map it
+        (read_csv_from_recumbency then only copies the rows from recumbency on). Does nothing if the cache is valid
+
+    Args:
+        file_path: case number (file_name) entered by user
+        timestamp_format (str | None): format of the timeStamp column, detected if None
+        timestamp_mode (str): 'parse' or 'sample_rate' (see read_csv_file)
+        sample_period_ms (float): nominal sample period used in 'sample_rate' mode
+
+    Returns:
+        bool: True if the cache was written
+    '''
+    file_path_csv: str = add_csv_extension(file_path)
+
+    if load_cached_columns(file_path_csv) is not None:
+        return False
+
+    df: pd.DataFrame = read_csv_file(file_path, False, timestamp_format, timestamp_mode, sample_period_ms)
+
+    if df.empty:
+        return False
+
+    save_cached_csv(file_path_csv, df)
+
+    return True
+
+def seek_csv_recumbency(file_path_csv: str, target_value: float, chunksize: int = SEEK_CHUNKSIZE) -> tuple | None:
+    '''Scans the Acc_Z column of a csv file in chunks until the first value greater than target_value.
+        Blank lines are kept as rows during the scan so the row found is also a line of the file
+
+    Args:
+        file_path_csv (str): path to the csv file
+        target_value (float): Acc_Z value that signals sternal recumbency
+        chunksize (int): number of lines read at a time
+
+    Returns:
+        tuple | None: data row of the first value greater than target_value (counted as pd.read_csv does, without
+            blank lines) and byte offset of its line, None if there is none
+    '''
+    header_lines: int = READ_CSV_OPTIONS['skiprows']
+    lines: int = 0
+
+    with pd.read_csv(file_path_csv, chunksize = chunksize, skip_blank_lines = False, **{**READ_CSV_OPTIONS, 'usecols': [3]}) as reader:
+        for chunk in reader:
+            line: int | None = find_first_above(chunk['Acc_Z'].to_numpy(), target_value)
+
+            if line is not None:
+                offset, blank_lines = get_line_offset(file_path_csv, header_lines + lines + line, header_lines)
+                return lines + line - blank_lines, offset
+
+            lines += len(chunk)
+
+    return None
+
+def read_csv_rows(file_path_csv: str, start_row: int = 0, offset: int = 0, timestamp_format: str | None = None, timestamp_mode: str = 'parse', sample_period_ms: float = 5.0) -> pd.DataFrame:
+    '''Parses the data rows of a csv file from row start_row on, as read_csv_file does (without the binary cache)
+
+    Args:
+        file_path_csv (str): path to the csv file
+        start_row (int): first data row read
+        offset (int): byte offset of that row (see seek_csv_recumbency), 0 to read from the first data row
+        timestamp_format (str | None): format of the timeStamp column, detected if None
+        timestamp_mode (str): 'parse' or 'sample_rate' (see read_csv_file)
+        sample_period_ms (float): nominal sample period used in 'sample_rate' mode
+
+    Returns:
+        Pandas DataFrame (index from 0)
+    '''
+    if timestamp_mode == 'parse':
+        return read_csv_parsed(file_path_csv, timestamp_format, offset = offset)
+
+    if timestamp_mode != 'sample_rate':
+        raise ValueError(f'Unknown timestamp_mode "{timestamp_mode}" (use "parse" or "sample_rate")')
+
+    df: pd.DataFrame = read_csv_from_offset(file_path_csv, offset, low_memory = False, **{**READ_CSV_OPTIONS, 'usecols': [1, 2, 3]})
+
+    # Only the timestamps of the rows read are synthesized (from the first row of the file, checked against its last row)
+    time_stamp: pd.Series | None = synthesize_timestamps(file_path_csv, len(df), sample_period_ms, timestamp_format, start_row = start_row)
+
+    if time_stamp is not None:
+        df.insert(0, 'timeStamp', time_stamp)
+    else:
+        df.insert(0, 'timeStamp', read_csv_parsed(file_path_csv, timestamp_format, usecols = (0,), offset = offset)['timeStamp'])
+
+    return df
+
+def read_csv_from_offset(file_path_csv: str, offset: int = 0, **options) -> pd.DataFrame:
+    '''pd.read_csv of the data rows of a csv file from a byte offset on. The file is opened at that offset, so the
+        parser never reads the rows before it (skiprows would still tokenize them)
+
+    Args:
+        file_path_csv (str): path to the csv file
+        offset (int): byte offset of the first data row read, 0 to read the whole file (header rows skipped)
+        **options: pd.read_csv options (READ_CSV_OPTIONS layout)
+
+    Returns:
+        Pandas DataFrame (index from 0)
+    '''
+    if offset == 0:
+        return pd.read_csv(file_path_csv, **options)
+
+    with open(file_path_csv, 'rb') as file:
+        file.seek(offset)
+        return pd.read_csv(file, **{**options, 'skiprows': 0})
+
+def get_line_offset(file_path: str, line: int, first_line: int = 0, block_size: int = 1 << 20) -> tuple:
+    '''Byte offset of the start of a line of a file, found by counting the newlines block by block, and number of
+        blank lines (whitespace only, dropped by pd.read_csv) from first_line up to it
+
+    Args:
+        file_path (str): path to the file
+        line (int): line number (0 for the first line)
+        first_line (int): first line counted in the blank lines (e.g. after the header rows)
+        block_size (int): number of bytes read at a time
+
+    Returns:
+        tuple: number of bytes before the line (size of the file if it has fewer lines) and number of blank lines
+    '''
+    offset: int = 0
+    lines: int = 0 # lines ended before the current block
+    blank_lines: int = 0
+    has_text: bool = False # the line continuing from the previous block has a non-whitespace character
+
+    with open(file_path, 'rb') as file:
+        while lines < line:
+            block: bytes = file.read(block_size)
+
+            if not block:
+                break
+
+            values: NDArray[np.uint8] = np.frombuffer(block, dtype = np.uint8)
+            newlines: NDArray = np.flatnonzero(values == ord('\n'))[:line - lines]
+
+            # Number of non-whitespace characters up to each newline, per line
+            text: NDArray[np.int64] = np.cumsum(~np.isin(values, WHITESPACE_BYTES), dtype = np.int64)
+            text_per_line: NDArray[np.int64] = np.diff(text[newlines], prepend = 0)
+            blank: NDArray[np.bool_] = text_per_line == 0
+
+            if len(newlines):
+                blank[0] &= not has_text
+                numbers: NDArray = lines + np.arange(len(newlines))
+                blank_lines += int(np.count_nonzero(blank & (numbers >= first_line)))
+                lines += len(newlines)
+
+                if lines == line:
+                    return offset + int(newlines[-1]) + 1, blank_lines
+
+                has_text = bool(text[-1] > text[newlines[-1]])
+
+            else:
+                has_text = has_text or bool(text[-1] > 0)
+
+            offset += len(block)
+
+    return offset, blank_lines
+
+def read_csv_parsed(file_path_csv: str, timestamp_format: str | None = None, usecols: tuple = (0, 1, 2, 3), offset: int = 0) -> pd.DataFrame:
+    '''Reads columns of the csv file and converts 'timeStamp' to datetime format.
+        Fixed-width ISO timestamps are read as bytes objects, copied into a fixed-width bytes array and parsed
+        by NumPy (see timestamp_helper),
+        otherwise they are read as strings and parsed with the declared or detected format
+
+    Args:
+        file_path_csv (str): path to the csv file
+        timestamp_format (str | None): format of the timeStamp column, detected if None
+        usecols (tuple): columns to read, must include 0 (timeStamp)
+        offset (int): byte offset of the first data row read, 0 to read every data row
+
+    Returns:
+        Pandas DataFrame
+    '''
+    timestamp_format = get_timestamp_format(file_path_csv, timestamp_format)
+    width: int | None = get_fixed_width(file_path_csv, timestamp_format)
+
+    if width is not None:
+        dtype: dict = {**READ_CSV_OPTIONS['dtype'], 'timeStamp': f'S{width + 1}'}
+        df: pd.DataFrame = read_csv_from_offset(file_path_csv, offset, low_memory = False, **{**READ_CSV_OPTIONS, 'usecols': list(usecols), 'dtype': dtype})
+        time_stamp: pd.Series | None = parse_fixed_width_timestamps(df['timeStamp'], width)
+
+        if time_stamp is not None:
+            df['timeStamp'] = time_stamp
+            return df
+
+    df = read_csv_from_offset(file_path_csv, offset, low_memory = False, **{**READ_CSV_OPTIONS, 'usecols': list(usecols)})
+
+    # Convert 'TimeStamp' column to datetime format
+    df['timeStamp'] = parse_timestamps(df['timeStamp'], timestamp_format)
+
+    return df
+
+def read_csv_chunks(file_path, chunksize: int = 1_000_000, timestamp_format: str | None = None) -> Iterator[pd.DataFrame]:
+    '''Reads the csv file in chunks of 'chunksize' rows, with the same columns and types as read_csv_file.
+        Only one chunk is kept in memory at a time, so very long recordings can be processed on small machines
+
+    Args:
+        file_path: case number (file_name) entered by user
+        chunksize (int): number of rows per chunk
+        timestamp_format (str | None): format of the timeStamp column, detected if None
+
+    Yields:
+        Pandas DataFrame with the rows of each chunk (index continues across chunks)
+    '''
+
+    file_path_csv: str = add_csv_extension(file_path)
+
+    print('reading csv file in chunks...')
+
+    timestamp_format = get_timestamp_format(file_path_csv, timestamp_format)
+
+    with pd.read_csv(file_path_csv, chunksize = chunksize, **READ_CSV_OPTIONS) as reader:
+        for chunk in reader:
+            chunk['timeStamp'] = parse_timestamps(chunk['timeStamp'], timestamp_format)
+            yield chunk
+
+def add_csv_extension(file_path: str) -> str:
+    '''adds '.csv' to the file number
+
+    Args:
+        file_path (str): Case Number
+
+    Returns:
+        str: the Case Number (entered) plus the csv extension (.csv)
+    '''
+
+    file_path_csv: str = file_path + '.csv'
+
+    return file_path_csv
+ 
+@instrument('initial_filter')
+def initial_filter(df, target_value) -> pd.DataFrame:
+    '''Filters initial csv file and creates a new df ignoring initial acceleration values.
+       Looks into AccZ column (Z axis). Filters out initial values until it finds
+       the first acceleration value on the Z axis that is greater than the 'target value'
+       Signals when horse gains sternal recumbency for the first time.
+        
+    Args:
+        df (pd.DataFrame): first four columns of the initial csv file with formated timeStamp in column 0
+
+    Returns:
+        Pandas DataFrame: A new filtered DataFrame starting from when 'AccZ' exceeds the target value
+    '''
+    
+    try:
+   
+        # Finds the index of the first occurrence of the target value in column 'Acc_Z'
+        start_index: int = df[df['Acc_Z'] > target_value].index[0]
+        
+        # Create the new DataFrame starting from that index
+        filtered_df = df.iloc[start_index:].reset_index(drop = True)
+        
+        return filtered_df
+    
+    except IndexError:
+        # If the target value is not found, return the same dataFrame
+        print(f'No values in "Acc_Z" greater than {target_value} could be found. Returning the original DataFrame')
+
+        return df
+    
+@instrument('apply_moving_average')
+def apply_moving_average(df_filtered, target_moving_avg) -> pd.DataFrame:
+    '''Applies a moving average filter to the acceleration data (Acc_X, Acc_Y, Acc_Z) in the DataFrame.
+
+    Args:
+        df_filtered (pd.DataFrame): DataFrame containing the raw acceleration data.
+        target_moving_avg (int): The window size for the moving average filter.
+
+    Returns:
+        pd.DataFrame: DataFrame with the filtered acceleration data.
+    '''
+    df_moving_avg = df_filtered.copy()
+    
+    # rolling returns float64; compact (float32) axes stay compact
+    df_moving_avg['Acc_X'] = df_filtered['Acc_X'].rolling(window = target_moving_avg, min_periods=1).mean().astype(df_filtered['Acc_X'].dtype, copy = False)
+    df_moving_avg['Acc_Y'] = df_filtered['Acc_Y'].rolling(window = target_moving_avg, min_periods=1).mean().astype(df_filtered['Acc_Y'].dtype, copy = False)
+    df_moving_avg['Acc_Z'] = df_filtered['Acc_Z'].rolling(window = target_moving_avg, min_periods=1).mean().astype(df_filtered['Acc_Z'].dtype, copy = False)
+    
+    return df_moving_avg
+    
+def clean_data(df, target_value) -> pd.DataFrame:
+    '''Cleans the Acc_Z column in a DataFrame by setting values lower than the threshold to NaN.
+    
+     Args:
+        df (pandas.DataFrame): The input DataFrame that contains an 'Acc_Z' column.
+        target_value (float): The threshold below which values are considered invalid.
+    
+    Returns:
+    pandas.DataFrame: The cleaned DataFrame with values below the threshold set to NaN.
+    '''
+    # Ensure the AccZ column exists
+    if 'Acc_Z' in df.columns:
+        df['Acc_Z'] = df['Acc_Z'].apply(lambda x: x if x >= target_value else np.nan)
+
+    else:
+        raise KeyError('The "Acc_Z" column is not present in the DataFrame.')
+    
+    return df
+
+@instrument('apply_kalman_filter')
+def apply_kalman_filter(df: pd.DataFrame, process_variance: float, measurement_variance: float, estimated_measurement_variance: float, fast: bool = True) -> pd.DataFrame:
+    '''Applies a Kalman filter to the Acc_X, Acc_Y, and Acc_Z columns of the input DataFrame.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame containing Acc_X, Acc_Y, and Acc_Z columns.
+        process_variance (float): The process variance (Q).
+        measurement_variance (float): The measurement variance (R).
+        estimated_measurement_variance (float): The estimated measurement variance (P).
+        fast (bool): if True (default) uses kalman_filter_fast on the three axes at once,
+            otherwise runs the original sample by sample loop on each axis.
+
+    Returns:
+        pd.DataFrame: The DataFrame with Kalman filtered Acc_X, Acc_Y, and Acc_Z columns.
+    '''
+    def kalman_filter(data):
+        n = len(data)
+        xhat = np.zeros(n)       # a posteri estimate of x
+        P = np.zeros(n)          # a posteri error estimate
+        xhatminus = np.zeros(n)  # a priori estimate of x
+        Pminus = np.zeros(n)     # a priori error estimate
+        K = np.zeros(n)          # gain or blending factor
+
+        # initial guesses
+        xhat[0] = data[0]
+        P[0] = estimated_measurement_variance
+
+        for k in range(1, n):
+            # time update
+            xhatminus[k] = xhat[k-1]
+            Pminus[k] = P[k-1] + process_variance
+
+            # measurement update
+            K[k] = Pminus[k] / (Pminus[k] + measurement_variance)
+            xhat[k] = xhatminus[k] + K[k] * (data[k] - xhatminus[k])
+            P[k] = (1 - K[k]) * Pminus[k]
+
+        return xhat
+
+    axes: list[str] = ['Acc_X', 'Acc_Y', 'Acc_Z']
+    df_filtered = df.copy()
+
+    if fast:
+        df_filtered[axes] = kalman_filter_fast(df[axes].to_numpy(dtype = np.float64), process_variance, measurement_variance, estimated_measurement_variance).astype(df['Acc_X'].dtype, copy = False)
+
+    else:
+        df_filtered['Acc_X'] = kalman_filter(df['Acc_X'].values)
+        df_filtered['Acc_Y'] = kalman_filter(df['Acc_Y'].values)
+        df_filtered['Acc_Z'] = kalman_filter(df['Acc_Z'].values)
+
+    return df_filtered
+
+def iterate_kalman_gains(P: float, process_variance: float, measurement_variance: float, max_gains: int, tolerance: float = 1e-15) -> tuple:
+    '''Runs the gain recursion of the scalar Kalman filter from the error variance P until the gain converges
+
+    Args:
+        P (float): error variance before the first gain
+        process_variance (float): The process variance (Q).
+        measurement_variance (float): The measurement variance (R).
+        max_gains (int): largest number of gains computed
+        tolerance (float): relative change of K below which the gain is considered converged
+
+    Returns:
+        tuple: (NDArray[np.float64] with the gains, steady-state gain or None if K has not converged within
+            max_gains, error variance after the last gain)
+    '''
+    gains: list[float] = []
+    K_previous: float = np.inf
+    steady_gain: float | None = None
+
+    while len(gains) < max_gains:
+        Pminus: float = P + process_variance
+        K: float = Pminus / (Pminus + measurement_variance)
+        P = (1 - K) * Pminus
+        gains.append(K)
+
+        if abs(K - K_previous) <= tolerance * K:
+            steady_gain = K
+            break
+        K_previous = K
+
+    return np.array(gains, dtype = np.float64), steady_gain, P
+
+@lru_cache(maxsize = 16)
+def get_kalman_gains(process_variance: float, measurement_variance: float, estimated_measurement_variance: float, max_gains: int = 1_000_000) -> tuple:
+    '''Calculates the gain sequence K of the scalar Kalman filter.
+        Q and R are constant, so K does not depend on the data and, for Q > 0, converges to a steady-state gain.
+        The sequence is computed until it converges and is cached for later calls: it only depends on Q, R and P,
+        so recordings of any length reuse it (kalman_filter_fast slices it, or extends it if it has not converged)
+
+    Args:
+        process_variance (float): The process variance (Q).
+        measurement_variance (float): The measurement variance (R).
+        estimated_measurement_variance (float): The estimated measurement variance (P).
+        max_gains (int): largest number of gains computed
+
+    Returns:
+        tuple: (NDArray[np.float64] with the gains K[1], K[2], ... until convergence, steady-state gain or None
+            if K has not converged within max_gains, error variance after the last gain)
+    '''
+    transient_gains, steady_gain, P = iterate_kalman_gains(estimated_measurement_variance, process_variance, measurement_variance, max_gains)
+    transient_gains.flags.writeable = False
+
+    return transient_gains, steady_gain, P
+
+def kalman_filter_fast(data: NDArray[np.float64], process_variance: float, measurement_variance: float, estimated_measurement_variance: float) -> NDArray[np.float64]:
+    '''Kalman filter of several signals at once (one per column), same results as the sample by sample loop.
+        While the gain is converging (first few thousand samples) the recursion is run row by row on all columns.
+        Once the gain is constant, xhat[k] = (1 - K) * xhat[k-1] + K * data[k] is a first-order linear filter,
+        which is evaluated in blocks (see filter_first_order). Only the output array is allocated at full length.
+        With Q = 0 the gain never converges (K[k] = 1 / (k + R / P)): the filter is then the running mean of the
+        signal with data[0] weighted R / P, which is computed in closed form with a cumulative sum. If the gain of
+        another (very small) Q has not converged within the cached gains, the row by row recursion goes on until
+        it converges or the signal ends
+
+    Args:
+        data (NDArray[np.float64]): (n, number of signals) array, e.g. stacked Acc_X, Acc_Y, Acc_Z
+        process_variance (float): The process variance (Q).
+        measurement_variance (float): The measurement variance (R).
+        estimated_measurement_variance (float): The estimated measurement variance (P).
+
+    Returns:
+        NDArray[np.float64]: (n, number of signals) array with the a posteriori estimates (xhat)
+    '''
+    n: int = len(data)
+    xhat: NDArray[np.float64] = np.empty_like(data, dtype = np.float64)
+
+    if n == 0:
+        return xhat
+
+    xhat[0] = data[0]
+
+    # Q = 0: xhat[k] = (R / P * data[0] + data[1] + ... + data[k]) / (k + R / P)
+    if process_variance == 0 and measurement_variance > 0:
+        if estimated_measurement_variance == 0:
+            xhat[1:] = xhat[0] # K = 0: the estimate stays at data[0]
+            return xhat
+
+        weight: float = measurement_variance / estimated_measurement_variance
+        counts: NDArray[np.float64] = (np.arange(1, n, dtype = np.float64) + weight).reshape((n - 1,) + (1,) * (data.ndim - 1))
+        np.cumsum(data[1:], axis = 0, out = xhat[1:])
+        xhat[1:] += weight * xhat[0]
+        xhat[1:] /= counts
+        return xhat
+
+    transient_gains, steady_gain, P = get_kalman_gains(process_variance, measurement_variance, estimated_measurement_variance)
+
+    # Gains not converged within the cached ones: the recursion is continued for this signal
+    if steady_gain is None and len(transient_gains) < n - 1:
+        more_gains, steady_gain, _ = iterate_kalman_gains(P, process_variance, measurement_variance, n - 1 - len(transient_gains))
+        transient_gains = np.concatenate((transient_gains, more_gains))
+
+    # Time-varying gain: exact recursion on all the columns at once
+    n_transient: int = min(len(transient_gains), n - 1)
+    for k in range(1, n_transient + 1):
+        xhat[k] = xhat[k-1] + transient_gains[k-1] * (data[k] - xhat[k-1])
+
+    # Steady-state gain: linear filter
+    if steady_gain is not None and n_transient + 1 < n:
+        filter_first_order(data[n_transient + 1:], 1.0 - steady_gain, steady_gain, xhat[n_transient], out = xhat[n_transient + 1:])
+
+    return xhat
+
+def filter_first_order(data: NDArray[np.float64], a: float, b: float, y_initial: NDArray[np.float64], out: NDArray[np.float64], max_growth: float = 1e6) -> NDArray[np.float64]:
+    '''Evaluates y[k] = a * y[k-1] + b * data[k] (0 < a < 1) along the first axis without a Python loop over samples.
+        The data is split in blocks of L samples for which a**-L stays below max_growth. Inside each block
+        y = b * a**t * cumsum(data * a**-t) gives the response with a zero initial state, then the state at
+        the end of each block is carried to the next one (a loop over blocks only).
+
+    Args:
+        data (NDArray[np.float64]): (n, ...) input signals
+        a (float): feedback coefficient (1 - K)
+        b (float): input coefficient (K)
+        y_initial (NDArray[np.float64]): value of y before the first sample (y[-1])
+        out (NDArray[np.float64]): array where the result is written, same shape as data
+        max_growth (float): largest scaling factor a**-t used inside a block
+
+    Returns:
+        NDArray[np.float64]: out
+    '''
+    n: int = len(data)
+    block_size: int = max(1, min(n, int(np.log(max_growth) / -np.log(a)))) if a > 0 else 1
+    n_blocks: int = -(-n // block_size)
+
+    t: NDArray[np.float64] = np.arange(block_size, dtype = np.float64)
+    shape: tuple = (block_size,) + (1,) * (data.ndim - 1)
+    decay: NDArray[np.float64] = (a ** (t + 1)).reshape(shape)   # a**(t + 1): effect of the previous state
+    growth: NDArray[np.float64] = (a ** -t).reshape(shape)
+    scale: NDArray[np.float64] = (b * a ** t).reshape(shape)
+
+    carry: NDArray[np.float64] = np.array(y_initial, dtype = np.float64)
+    for j in range(n_blocks):
+        block = slice(j * block_size, min((j + 1) * block_size, n))
+        length: int = block.stop - block.start
+        y: NDArray[np.float64] = out[block]
+
+        np.multiply(data[block], growth[:length], out = y)
+        np.cumsum(y, axis = 0, out = y)
+        y *= scale[:length]
+        y += decay[:length] * carry
+
+        carry = y[-1].copy()
+
+    return out
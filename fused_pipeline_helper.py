@@ -0,0 +1,287 @@
+# Recovery Score Calculations: fused_pipeline_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: array-native version of the scoring pipeline (initial_filter -> apply_moving_average -> calculate_derivatives
+# -> set_jerk_threshold -> calculate_window_sd) without DataFrame copies. The recording is loaded once into an (n, 4)
+# buffer (timeStamp in ns, Acc_X, Acc_Y, Acc_Z; column-major so each column is contiguous) and every stage works on
+# views of it or on one work array:
+#   - initial filter: the buffer is sliced from the first row with Acc_Z > target_value (a view, no copy)
+#   - moving average: the rolling mean is a difference of cumulative sums, (C[i] - C[i - w]) / w, so its first
+#     difference is (z[i] - z[i - w]) / w. Jerk is written from that directly into the work array, block by block,
+#     which avoids both the moving average array and the large cumulative sum (and its rounding)
+#   - jerk statistics: the timeStamp column is no longer needed once jerk is calculated and is reused as scratch
+#   - window SD: calculate_window_sd only uses temporary arrays of CHUNK_SIZE elements, and only calculates the
+#     windows that detect_roi_sd could select (the other ones are NaN)
+# The buffer and the work array are the only full-length allocations (snap, only needed by the derivative method,
+# adds a third one). Results match batch_helper.process_case up to rounding (relative differences around 1e-13).
+# With a compact config.signal_dtype (see compact_helper) the buffer is replaced by int64 timestamp offsets and
+# float32 or int16 axes; the kernels decode the compact values to float64 block by block.
+# When the binary cache is valid the pipeline only needs numpy: file_helper (and pandas) is imported on a cache miss.
+# Usage: python batch_helper.py <directory or glob> --fused
+
+import os
+import numpy as np
+
+from numpy.typing import NDArray
+from typing import TYPE_CHECKING
+
+import config
+from acceleration_helper import get_max_accelerations, get_sa_2axes_array, get_sumua_array
+from attempt_detection_helper import calculate_window_sd, detect_roi_sd, get_attempts
+from cache_helper import load_cached_columns
+from compact_helper import AXES, check_signal_dtype, dequantize, find_first_above, quantize
+from CSV_helper import CSV, get_date, rename
+from instrumentation_helper import instrument
+from output_results_helper import get_recovery_score
+from region_helper import get_roi_bounds_sd
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Rows processed at a time by the blockwise kernels (bounds their temporary arrays)
+BLOCK_SIZE: int = 2 ** 16
+
+# Columns of the buffer
+TIME, ACC_X, ACC_Y, ACC_Z = 0, 1, 2, 3
+
+def load_columns(file_path: str) -> dict:
+    '''Loads the columns of a recording from the binary cache when it is valid (memory-mapped),
+        otherwise from the CSV file with read_csv_file
+
+    Args:
+        file_path (str): path to the case CSV file (with or without the .csv extension)
+
+    Returns:
+        dict: timeStamp (int64 ns), Acc_X, Acc_Y and Acc_Z arrays
+    '''
+    columns: dict | None = load_cached_columns(rename(file_path) + '.csv')
+
+    if columns is None:
+        from file_helper import read_csv_file
+
+        df: pd.DataFrame = read_csv_file(rename(file_path), timestamp_format = config.timestamp_format, timestamp_mode = config.timestamp_mode, sample_period_ms = config.sample_period_ms)
+
+        if df.empty:
+            raise ValueError(f'Failed to load DataFrame from {file_path}')
+
+        columns = {
+            'timeStamp': df['timeStamp'].to_numpy(dtype = 'datetime64[ns]').view(np.int64),
+            'Acc_X': df['Acc_X'].to_numpy(),
+            'Acc_Y': df['Acc_Y'].to_numpy(),
+            'Acc_Z': df['Acc_Z'].to_numpy(),
+        }
+
+    return columns
+
+@instrument('load_buffer')
+def load_buffer(file_path: str) -> NDArray[np.float64]:
+    '''Loads a recording into an (n, 4) buffer (columns copied once from load_columns)
+
+    Args:
+        file_path (str): path to the case CSV file (with or without the .csv extension)
+
+    Returns:
+        NDArray[np.float64]: column-major buffer with timeStamp (ns, as float like convert_to_np), Acc_X, Acc_Y and Acc_Z
+    '''
+    columns: dict = load_columns(file_path)
+    buffer: NDArray[np.float64] = np.empty((len(columns['timeStamp']), 4), dtype = np.float64, order = 'F')
+
+    for index, column in enumerate(['timeStamp', 'Acc_X', 'Acc_Y', 'Acc_Z']):
+        buffer[:, index] = columns[column]
+
+    return buffer
+
+@instrument('load_compact')
+def load_compact(file_path: str, signal_dtype: str) -> tuple:
+    '''Loads a recording in a compact representation (see compact_helper): timestamps as int64 ns offsets from
+        the first sample and the axes as float32 or int16 with a scale factor per axis
+
+    Args:
+        file_path (str): path to the case CSV file (with or without the .csv extension)
+        signal_dtype (str): 'float32' or 'int16'
+
+    Returns:
+        tuple: timestamps (NDArray[np.int64]), (n, 3) column-major axes and scale factor of each axis (NDArray[np.float64])
+    '''
+    columns: dict = load_columns(file_path)
+    n: int = len(columns['timeStamp'])
+
+    time_stamp: NDArray[np.int64] = np.subtract(columns['timeStamp'], columns['timeStamp'][0] if n else 0, dtype = np.int64)
+    acc: NDArray = np.empty((n, 3), dtype = np.int16 if signal_dtype == 'int16' else signal_dtype, order = 'F')
+    scales: NDArray[np.float64] = np.ones(3, dtype = np.float64)
+
+    for index, column in enumerate(AXES):
+        acc[:, index], scales[index] = quantize(columns[column], signal_dtype)
+
+    return time_stamp, acc, scales
+
+def calculate_jerk(time_stamp: NDArray, acc_z: NDArray, target_moving_avg: int, out: NDArray[np.float64] | None = None, scale: float = 1.0) -> NDArray[np.float64]:
+    '''Jerk of the moving average of Acc_Z (same as apply_moving_average followed by calculate_derivatives)
+        The first target_moving_avg - 1 means use the rows available (min_periods = 1)
+
+    Args:
+        time_stamp (NDArray): timestamps in ns (float64 column of the buffer or int64 offsets)
+        acc_z (NDArray): Acc_Z column (float64 or compact)
+        target_moving_avg (int): moving average window size
+        out (NDArray[np.float64] | None): array of at least n - 1 elements where jerk is written, allocated if None
+        scale (float): scale factor of a quantized Acc_Z (see compact_helper)
+
+    Returns:
+        NDArray[np.float64]: jerk, n - 1 values
+    '''
+    n: int = len(acc_z)
+    jerk: NDArray[np.float64] = (np.empty(max(n - 1, 0), dtype = np.float64) if out is None else out[:max(n - 1, 0)])
+
+    if n < 2:
+        return jerk
+
+    # Means of the first rows, before the window is full
+    ramp: int = min(target_moving_avg, n)
+    head: NDArray[np.float64] = np.cumsum(dequantize(acc_z[:ramp], scale)) / np.arange(1, ramp + 1)
+    jerk[:ramp - 1] = np.diff(head)
+
+    for start in range(0, n - 1, BLOCK_SIZE):
+        stop: int = min(start + BLOCK_SIZE, n - 1)
+
+        # Difference of two consecutive full-window means (compact values are subtracted in float64)
+        low: int = max(start, target_moving_avg - 1)
+        if low < stop:
+            np.subtract(acc_z[low + 1 : stop + 1], acc_z[low + 1 - target_moving_avg : stop + 1 - target_moving_avg], out = jerk[low:stop], dtype = np.float64)
+            jerk[low:stop] /= target_moving_avg
+            if scale != 1.0:
+                jerk[low:stop] *= scale
+
+        dt: NDArray = time_stamp[start + 1 : stop + 1] - time_stamp[start:stop]
+
+        if np.any(dt <= 0):
+            raise ValueError('Timestamps must be strictly increasing')
+
+        jerk[start:stop] /= dt
+
+    return jerk
+
+def calculate_snap(time_stamp: NDArray, jerk: NDArray[np.float64]) -> NDArray[np.float64]:
+    '''Second derivative (same as calculate_derivatives), calculated block by block
+
+    Args:
+        time_stamp (NDArray): timestamps in ns (float64 column of the buffer or int64 offsets)
+        jerk (NDArray[np.float64]): jerk from calculate_jerk
+
+    Returns:
+        NDArray[np.float64]: snap, n - 2 values
+    '''
+    snap: NDArray[np.float64] = np.empty(max(len(jerk) - 1, 0), dtype = np.float64)
+
+    for start in range(0, len(snap), BLOCK_SIZE):
+        stop: int = min(start + BLOCK_SIZE, len(snap))
+        np.subtract(jerk[start + 1 : stop + 1], jerk[start:stop], out = snap[start:stop])
+        snap[start:stop] /= time_stamp[start + 2 : stop + 2] - time_stamp[start + 1 : stop + 1]
+
+    return snap
+
+def calculate_jerk_threshold(jerk: NDArray[np.float64], factor: float, percentile: float, scratch: NDArray[np.float64]) -> tuple:
+    '''Same as set_jerk_threshold (same operations, so the same numbers), using 'scratch' instead of
+        allocating the temporary arrays of np.std and np.percentile
+
+    Args:
+        jerk (NDArray[np.float64]): jerk values
+        factor (float): multiplication factor for the standard deviation
+        percentile (float): percentile value to use for setting the threshold
+        scratch (NDArray[np.float64]): array of at least len(jerk) elements that can be overwritten
+
+    Returns:
+        tuple: mean jerk, SD of jerk and jerk threshold
+    '''
+    scratch = scratch[:len(jerk)]
+
+    mean_jerk: np.float64 = np.mean(jerk)
+    np.subtract(jerk, mean_jerk, out = scratch)
+    np.multiply(scratch, scratch, out = scratch)
+    std_jerk: np.float64 = np.sqrt(np.add.reduce(scratch) / len(jerk))
+
+    np.copyto(scratch, jerk)
+    percentile_jerk: np.float64 = np.percentile(scratch, percentile, overwrite_input = True)
+
+    return mean_jerk, std_jerk, max(mean_jerk + factor * std_jerk, percentile_jerk)
+
+@instrument('run_fused_pipeline')
+def run_fused_pipeline(time_stamp: NDArray, acc: NDArray, scales: NDArray[np.float64] | None = None, with_snap: bool = False) -> dict:
+    '''Runs the pipeline stages on a loaded recording with the parameters of config.py.
+        time_stamp is overwritten (used as scratch for the jerk statistics)
+
+    Args:
+        time_stamp (NDArray): timestamps in ns: float64 column of a buffer from load_buffer, or int64 offsets from load_compact
+        acc (NDArray): (n, 3) Acc_X, Acc_Y and Acc_Z (columns of the buffer, or compact axes from load_compact)
+        scales (NDArray[np.float64] | None): scale factor of each axis (None: not quantized)
+        with_snap (bool): also calculate snap (one more full-length array)
+
+    Returns:
+        dict: first row of the filtered recording ('start'), jerk, snap (None unless with_snap), jerk statistics
+            and window SDs (NaN below the ROI threshold)
+    '''
+    scale_z: float = 1.0 if scales is None else float(scales[2])
+    start: int | None = find_first_above(acc[:, 2], config.target_value, scale_z)
+
+    if start is None:
+        print(f'No values in "Acc_Z" greater than {config.target_value} could be found. Using the whole recording')
+        start = 0
+
+    time_stamp = time_stamp[start:]
+
+    jerk: NDArray[np.float64] = calculate_jerk(time_stamp, acc[start:, 2], config.target_moving_avg, scale = scale_z)
+    snap: NDArray[np.float64] | None = calculate_snap(time_stamp, jerk) if with_snap else None
+
+    # Timestamps are not needed anymore (int64 offsets are reused as float64, same size)
+    scratch: NDArray[np.float64] = time_stamp if time_stamp.dtype == np.float64 else time_stamp.view(np.float64)
+    mean_jerk, std_jerk, jerk_threshold_cal = calculate_jerk_threshold(jerk, config.factor, config.percentile, scratch)
+
+    return {
+        'start': start,
+        'jerk': jerk,
+        'snap': snap,
+        'mean_jerk': mean_jerk,
+        'std_jerk': std_jerk,
+        'jerk_threshold_cal': jerk_threshold_cal,
+        'AccZ_sd': calculate_window_sd(jerk, config.window_size, config.step_size, threshold = config.threshold),
+    }
+
+def score_case_fused(file_path: str, signal_dtype: str | None = None) -> dict:
+    '''Scores one case like batch_helper.process_case (plots off) with the fused pipeline
+
+    Args:
+        file_path (str): path to the case CSV file
+        signal_dtype (str | None): 'float64', 'float32' or 'int16' (see compact_helper). Defaults to config.signal_dtype
+
+    Returns:
+        dict: entry for RS_output.csv (see CSV.make_entry)
+    '''
+    signal_dtype = signal_dtype or config.signal_dtype
+    check_signal_dtype(signal_dtype)
+
+    if signal_dtype == 'float64':
+        buffer: NDArray[np.float64] = load_buffer(file_path)
+        time_stamp, acc, scales = buffer[:, TIME], buffer[:, ACC_X:], None
+    else:
+        time_stamp, acc, scales = load_compact(file_path, signal_dtype)
+
+    stages: dict = run_fused_pipeline(time_stamp, acc, scales)
+    acc = acc[stages['start']:]
+
+    roi_sd: NDArray = detect_roi_sd(stages['AccZ_sd'], config.threshold)
+    number_failed_attempts: int = get_attempts(roi_sd)
+
+    roi_starts, roi_ends = get_roi_bounds_sd(roi_sd, config.window_size, config.step_size, len(acc))
+    amax: NDArray[np.float64] = get_max_accelerations(acc, roi_starts, roi_ends)
+
+    if scales is not None:
+        amax *= scales
+
+    sa_2axes: float = get_sa_2axes_array(amax)
+    sumua: float = get_sumua_array(amax)
+    rs_2axes_py: float = get_recovery_score(number_failed_attempts, sa_2axes, sumua)
+
+    # Single and successful attempt: there is no value for sumua (same as add_sa)
+    if number_failed_attempts < 1:
+        sumua = None
+
+    return CSV.make_entry(get_date(), rename(os.path.basename(file_path)), config.jerk_threshold, stages['mean_jerk'], stages['std_jerk'], stages['jerk_threshold_cal'], config.threshold, number_failed_attempts, sa_2axes, sumua, rs_2axes_py)
@@ -1,203 +1,265 @@
-# Recovery Score Calculations: Graph_Helper Script
-# Script created  3/25/2024
-# Last revision 12/13/2024
-
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import numpy as np
-import pandas as pd
-
-from numpy.typing import NDArray
-
-def plot_acceleration_data(df_filtered: pd.DataFrame, df_moving_avg: pd.DataFrame, df_kalman: pd.DataFrame) -> None:
-    '''Plots three graphs for df_filtered, df_moving_avg, and df_kalman.
-
-    Args:
-        df_filtered (pd.DataFrame): DataFrame with filtered acceleration data.
-        df_moving_avg (pd.DataFrame): DataFrame with moving average filtered acceleration data.
-        df_kalman (pd.DataFrame): DataFrame with Kalman filtered acceleration data.
-    '''
-    plt.figure(figsize=(15, 10))
-
-    # Plot df_filtered
-    plt.subplot(3, 1, 1)
-    plt.plot(df_filtered['timeStamp'], df_filtered['Acc_X'], label='Acc_X', color='blue')
-    plt.plot(df_filtered['timeStamp'], df_filtered['Acc_Y'], label='Acc_Y', color='green')
-    plt.plot(df_filtered['timeStamp'], df_filtered['Acc_Z'], label='Acc_Z', color='red')
-    plt.title('Filtered Acceleration Data')
-    plt.xlabel('Time')
-    plt.ylabel('Acceleration (m/s^2)')
-    plt.legend()
-    plt.grid(True)
-
-    # Plot df_moving_avg
-    plt.subplot(3, 1, 2)
-    plt.plot(df_moving_avg['timeStamp'], df_moving_avg['Acc_X'], label='Acc_X', color='blue')
-    plt.plot(df_moving_avg['timeStamp'], df_moving_avg['Acc_Y'], label='Acc_Y', color='green')
-    plt.plot(df_moving_avg['timeStamp'], df_moving_avg['Acc_Z'], label='Acc_Z', color='red')
-    plt.title('Moving Average Filtered Acceleration Data')
-    plt.xlabel('Time')
-    plt.ylabel('Acceleration (m/s^2)')
-    plt.legend()
-    plt.grid(True)
-
-    # Plot df_kalman
-    plt.subplot(3, 1, 3)
-    plt.plot(df_kalman['timeStamp'], df_kalman['Acc_X'], label='Acc_X', color='blue')
-    plt.plot(df_kalman['timeStamp'], df_kalman['Acc_Y'], label='Acc_Y', color='green')
-    plt.plot(df_kalman['timeStamp'], df_kalman['Acc_Z'], label='Acc_Z', color='red')
-    plt.title('Kalman Filtered Acceleration Data')
-    plt.xlabel('Time')
-    plt.ylabel('Acceleration (m/s^2)')
-    plt.legend()
-    plt.grid(True)
-
-    plt.tight_layout()
-    plt.show()
-
-def get_plot_jerk_snap(jerk: np.ndarray, snap: np.ndarray, df_avg: pd.DataFrame) -> None:
-    '''Plots jerk and snap
-
-    Args:
-        jerk (np.ndarray): The first derivative of acceleration (jerk)
-        snap (np.ndarray): The second derivative of acceleration (snap)
-        df_avg: provides TimeStamp list for the X axis
-    '''
-    time_stamp_np: NDArray = np.array(df_avg['timeStamp'], dtype=np.float64)
-     # Adjust timeStamp to match the length of jerk and snap
-    timeStamp_jerk = time_stamp_np[:-1]
-    timeStamp_snap = time_stamp_np[:-2]
-    
-    # Plot size
-    plt.figure(figsize=(12, 6))
-    
-    # Jerk plot
-    plt.subplot(2, 1, 1)
-    plt.plot(timeStamp_jerk, jerk, label="Jerk", color="blue")
-    
-    # Convert timestamps to numerical values
-    #timeStamp_jerk_num = mdates.date2num(timeStamp_jerk)
-    # Highlight ROIs
-    #for i in roi_indices['ROI_Indices']:
-    #   plt.axvspan(float(timeStamp_jerk_num[i] - 0.5), float(timeStamp_jerk_num[i] + 0.5), color='grey', alpha=0.3, label="ROI" if i == roi_indices[0] else "")
-        
-    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
-    plt.title("Jerk")
-    plt.xlabel("Time")
-    plt.ylabel("Jerk")
-    plt.legend()
-    plt.grid(True)
-
-    # Snap plot
-    plt.subplot(2, 1, 2)
-    plt.plot(timeStamp_snap, snap, label="Snap", color="blue")
-    #plt.scatter(timeStamp_snap[roi_indices], snap[roi_indices], color="red", label="ROI", zorder=5)
-    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
-    plt.title("Snap")
-    plt.xlabel("Time")
-    plt.ylabel("Snap")
-    plt.legend()
-    plt.grid(True)
-
-    # Show plot
-    plt.tight_layout()
-    plt.show()
-
-def get_plot_jerk_snap_with_roi(jerk: np.ndarray, snap: np.ndarray, roi_indices_df: pd.DataFrame, df_avg: pd.DataFrame) -> None:
-    '''Plots jerk and snap, highlighting regions of interest (ROIs).
-
-    Args:
-        jerk (np.ndarray): The first derivative of acceleration (jerk).
-        snap (np.ndarray): The second derivative of acceleration (snap).
-        roi_indices_df: pd.DataFrame Indices of regions of interest.
-        df_avd: pd.DataFrame: Time array corresponding to jerk and snap.
-    '''
-    time_stamp_np: NDArray = np.array(df_avg['timeStamp'], dtype=np.float64)
-     # Adjust timeStamp to match the length of jerk and snap
-    timeStamp_jerk = time_stamp_np[:-1]
-    timeStamp_snap = time_stamp_np[:-2]
-    
-    # Plot jerk
-    plt.figure(figsize=(12, 6))
-    
-    # Jerk plot
-    plt.subplot(2, 1, 1)
-    plt.plot(timeStamp_jerk, jerk, label="Jerk", color="blue")
-    plt.scatter(timeStamp_jerk[roi_indices_df], jerk[roi_indices_df], color="red", label="ROI", zorder=5)
-    
-    # Convert timestamps to numerical values
-    #timeStamp_jerk_num = mdates.date2num(timeStamp_jerk)
-    # Highlight ROIs
-    #for i in roi_indices['ROI_Indices']:
-    #   plt.axvspan(float(timeStamp_jerk_num[i] - 0.5), float(timeStamp_jerk_num[i] + 0.5), color='grey', alpha=0.3, label="ROI" if i == roi_indices[0] else "")
-        
-    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
-    plt.title("Jerk with Highlighted ROIs")
-    plt.xlabel("Time")
-    plt.ylabel("Jerk")
-    plt.legend()
-    plt.grid(True)
-
-    # Snap plot
-    plt.subplot(2, 1, 2)
-    plt.plot(timeStamp_snap, snap, label="Snap", color="blue")
-    #plt.scatter(timeStamp_snap[roi_indices], snap[roi_indices], color="red", label="ROI", zorder=5)
-    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
-    plt.title("Snap with Highlighted ROIs")
-    plt.xlabel("Time")
-    plt.ylabel("Snap")
-    plt.legend()
-    plt.grid(True)
-
-    # Show plot
-    plt.tight_layout()
-    plt.show()
-
-def get_plot_sd_with_roi(jerk:np.ndarray, df_avg:pd.DataFrame, roi_sd:list, window_size:int, step_size:int, file_path:str) -> None:
-    '''Creates a plot of the Z axis only with the detected Regions of Interest
-    
-    Args:
-        jerk: np.ndarray with the jerk values
-        df_avg: pd.DataFrame with the timeStamp and Acc_Z values
-        roi_sd: list with the regions of interest detected
-        window_size: int with the size of the window
-        step_size: int with the step size
-        file_path: string with the name of the file
-
-    Returns:
-        None
-    '''
-    time_stamp_np: NDArray = np.array(df_avg['timeStamp'])
-    # Adjust timeStamp to match the length of jerk and snap
-    timeStamp_jerk = time_stamp_np[:-1]
-    #timeStamp_snap = time_stamp_np[:-2]
-
-    plt.figure(figsize=(10, 6))
-    
-    plt.plot(timeStamp_jerk, jerk, label="Jerk", color="blue")
-    
-    for k in range(len(roi_sd)):
-        # Vertical lines for the start of the regions of interest
-        plt.vlines(
-            timeStamp_jerk[roi_sd[k][0] * step_size],
-            -1e-06,
-            1e-06,
-            colors= ['r'],
-            linestyles= 'dashed',
-            label= 'ROI',
-        )
-        # Vertical lines for the end of the regions of interest
-        plt.vlines(
-            df_avg['timeStamp'][roi_sd[k][0] * step_size + window_size],
-            -1e-06,
-            1e-06,
-            colors= ['r'],
-            linestyles= 'dashed',
-        )
-    plt.xlabel('timeStamp')
-    plt.ylabel('jerk')
-    plt.title(file_path)
-    plt.grid(which='both')
-    plt.legend()
-    plt.show()
-
+# Recovery Score Calculations: Graph_Helper Script
+# Script created  3/25/2024
+# Last revision 10/17/2026
+# Notes: long signals are decimated (decimation_helper, per-bucket min/max) before plotting, so figures
+# are drawn from a few thousand points whatever the length of the recording. ROI markers use the
+# timestamps of the full signal.
+# matplotlib is imported by the plot functions, on the first plot: runs without plots never load it.
+
+import os
+import numpy as np
+import pandas as pd
+
+from numpy.typing import NDArray
+
+from decimation_helper import get_min_max_indices, get_plot_indices
+from instrumentation_helper import instrument
+
+@instrument('plot_acceleration_data')
+def plot_acceleration_data(df_filtered: pd.DataFrame, df_moving_avg: pd.DataFrame, df_kalman: pd.DataFrame, output_dir: str | None = None, plot_format: str = 'png') -> None:
+    '''Plots three graphs for df_filtered, df_moving_avg, and df_kalman.
+
+    Args:
+        df_filtered (pd.DataFrame): DataFrame with filtered acceleration data.
+        df_moving_avg (pd.DataFrame): DataFrame with moving average filtered acceleration data.
+        df_kalman (pd.DataFrame): DataFrame with Kalman filtered acceleration data.
+        output_dir (str | None): if set, the figure is saved in this directory instead of shown
+        plot_format (str): file format when saving (png, svg, ...)
+    '''
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(15, 10))
+
+    # Plot df_filtered
+    plt.subplot(3, 1, 1)
+    df_plot = decimate_acceleration(df_filtered)
+    plt.plot(df_plot['timeStamp'], df_plot['Acc_X'], label='Acc_X', color='blue')
+    plt.plot(df_plot['timeStamp'], df_plot['Acc_Y'], label='Acc_Y', color='green')
+    plt.plot(df_plot['timeStamp'], df_plot['Acc_Z'], label='Acc_Z', color='red')
+    plt.title('Filtered Acceleration Data')
+    plt.xlabel('Time')
+    plt.ylabel('Acceleration (m/s^2)')
+    plt.legend()
+    plt.grid(True)
+
+    # Plot df_moving_avg
+    plt.subplot(3, 1, 2)
+    df_plot = decimate_acceleration(df_moving_avg)
+    plt.plot(df_plot['timeStamp'], df_plot['Acc_X'], label='Acc_X', color='blue')
+    plt.plot(df_plot['timeStamp'], df_plot['Acc_Y'], label='Acc_Y', color='green')
+    plt.plot(df_plot['timeStamp'], df_plot['Acc_Z'], label='Acc_Z', color='red')
+    plt.title('Moving Average Filtered Acceleration Data')
+    plt.xlabel('Time')
+    plt.ylabel('Acceleration (m/s^2)')
+    plt.legend()
+    plt.grid(True)
+
+    # Plot df_kalman
+    plt.subplot(3, 1, 3)
+    df_plot = decimate_acceleration(df_kalman)
+    plt.plot(df_plot['timeStamp'], df_plot['Acc_X'], label='Acc_X', color='blue')
+    plt.plot(df_plot['timeStamp'], df_plot['Acc_Y'], label='Acc_Y', color='green')
+    plt.plot(df_plot['timeStamp'], df_plot['Acc_Z'], label='Acc_Z', color='red')
+    plt.title('Kalman Filtered Acceleration Data')
+    plt.xlabel('Time')
+    plt.ylabel('Acceleration (m/s^2)')
+    plt.legend()
+    plt.grid(True)
+
+    plt.tight_layout()
+    show_or_save('acceleration_data', output_dir, plot_format)
+
+@instrument('get_plot_jerk_snap')
+def get_plot_jerk_snap(jerk: np.ndarray, snap: np.ndarray, df_avg: pd.DataFrame, output_dir: str | None = None, plot_format: str = 'png') -> None:
+    '''Plots jerk and snap
+
+    Args:
+        jerk (np.ndarray): The first derivative of acceleration (jerk)
+        snap (np.ndarray): The second derivative of acceleration (snap)
+        df_avg: provides TimeStamp list for the X axis
+        output_dir (str | None): if set, the figure is saved in this directory instead of shown
+        plot_format (str): file format when saving (png, svg, ...)
+    '''
+    import matplotlib.pyplot as plt
+
+    time_stamp_np: NDArray = np.array(df_avg['timeStamp'], dtype=np.float64)
+     # Adjust timeStamp to match the length of jerk and snap
+    timeStamp_jerk = time_stamp_np[:-1]
+    timeStamp_snap = time_stamp_np[:-2]
+    
+    # Plot size
+    plt.figure(figsize=(12, 6))
+    
+    # Jerk plot
+    plt.subplot(2, 1, 1)
+    jerk_indices: NDArray[np.intp] = get_min_max_indices(jerk)
+    plt.plot(timeStamp_jerk[jerk_indices], np.asarray(jerk)[jerk_indices], label="Jerk", color="blue")
+    
+    # Convert timestamps to numerical values
+    #timeStamp_jerk_num = mdates.date2num(timeStamp_jerk)
+    # Highlight ROIs
+    #for i in roi_indices['ROI_Indices']:
+    #   plt.axvspan(float(timeStamp_jerk_num[i] - 0.5), float(timeStamp_jerk_num[i] + 0.5), color='grey', alpha=0.3, label="ROI" if i == roi_indices[0] else "")
+        
+    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
+    plt.title("Jerk")
+    plt.xlabel("Time")
+    plt.ylabel("Jerk")
+    plt.legend()
+    plt.grid(True)
+
+    # Snap plot
+    plt.subplot(2, 1, 2)
+    snap_indices: NDArray[np.intp] = get_min_max_indices(snap)
+    plt.plot(timeStamp_snap[snap_indices], np.asarray(snap)[snap_indices], label="Snap", color="blue")
+    #plt.scatter(timeStamp_snap[roi_indices], snap[roi_indices], color="red", label="ROI", zorder=5)
+    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
+    plt.title("Snap")
+    plt.xlabel("Time")
+    plt.ylabel("Snap")
+    plt.legend()
+    plt.grid(True)
+
+    # Show plot
+    plt.tight_layout()
+    show_or_save('jerk_snap', output_dir, plot_format)
+
+@instrument('get_plot_jerk_snap_with_roi')
+def get_plot_jerk_snap_with_roi(jerk: np.ndarray, snap: np.ndarray, roi_indices_df: pd.DataFrame, df_avg: pd.DataFrame, output_dir: str | None = None, plot_format: str = 'png') -> None:
+    '''Plots jerk and snap, highlighting regions of interest (ROIs).
+
+    Args:
+        jerk (np.ndarray): The first derivative of acceleration (jerk).
+        snap (np.ndarray): The second derivative of acceleration (snap).
+        roi_indices_df: pd.DataFrame Indices of regions of interest.
+        df_avd: pd.DataFrame: Time array corresponding to jerk and snap.
+        output_dir (str | None): if set, the figure is saved in this directory instead of shown
+        plot_format (str): file format when saving (png, svg, ...)
+    '''
+    import matplotlib.pyplot as plt
+
+    time_stamp_np: NDArray = np.array(df_avg['timeStamp'], dtype=np.float64)
+     # Adjust timeStamp to match the length of jerk and snap
+    timeStamp_jerk = time_stamp_np[:-1]
+    timeStamp_snap = time_stamp_np[:-2]
+    
+    # Plot jerk
+    plt.figure(figsize=(12, 6))
+    
+    # Jerk plot
+    plt.subplot(2, 1, 1)
+    jerk_indices: NDArray[np.intp] = get_min_max_indices(jerk)
+    plt.plot(timeStamp_jerk[jerk_indices], np.asarray(jerk)[jerk_indices], label="Jerk", color="blue")
+    plt.scatter(timeStamp_jerk[roi_indices_df], jerk[roi_indices_df], color="red", label="ROI", zorder=5)
+    
+    # Convert timestamps to numerical values
+    #timeStamp_jerk_num = mdates.date2num(timeStamp_jerk)
+    # Highlight ROIs
+    #for i in roi_indices['ROI_Indices']:
+    #   plt.axvspan(float(timeStamp_jerk_num[i] - 0.5), float(timeStamp_jerk_num[i] + 0.5), color='grey', alpha=0.3, label="ROI" if i == roi_indices[0] else "")
+        
+    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
+    plt.title("Jerk with Highlighted ROIs")
+    plt.xlabel("Time")
+    plt.ylabel("Jerk")
+    plt.legend()
+    plt.grid(True)
+
+    # Snap plot
+    plt.subplot(2, 1, 2)
+    snap_indices: NDArray[np.intp] = get_min_max_indices(snap)
+    plt.plot(timeStamp_snap[snap_indices], np.asarray(snap)[snap_indices], label="Snap", color="blue")
+    #plt.scatter(timeStamp_snap[roi_indices], snap[roi_indices], color="red", label="ROI", zorder=5)
+    plt.axhline(0, color="gray", linestyle="--", linewidth=0.8)
+    plt.title("Snap with Highlighted ROIs")
+    plt.xlabel("Time")
+    plt.ylabel("Snap")
+    plt.legend()
+    plt.grid(True)
+
+    # Show plot
+    plt.tight_layout()
+    show_or_save('jerk_snap_with_roi', output_dir, plot_format)
+
+@instrument('get_plot_sd_with_roi')
+def get_plot_sd_with_roi(jerk:np.ndarray, df_avg:pd.DataFrame, roi_sd:NDArray, window_size:int, step_size:int, file_path:str, output_dir: str | None = None, plot_format: str = 'png') -> None:
+    '''Creates a plot of the Z axis only with the detected Regions of Interest
+    
+    Args:
+        jerk: np.ndarray with the jerk values
+        df_avg: pd.DataFrame with the timeStamp and Acc_Z values
+        roi_sd: structured array with the regions of interest detected (detect_roi_sd)
+        window_size: int with the size of the window
+        step_size: int with the step size
+        file_path: string with the name of the file
+        output_dir: if set, the figure is saved in this directory instead of shown
+        plot_format: file format when saving (png, svg, ...)
+
+    Returns:
+        None
+    '''
+    import matplotlib.pyplot as plt
+
+    time_stamp_np: NDArray = np.array(df_avg['timeStamp'])
+    # Adjust timeStamp to match the length of jerk and snap
+    timeStamp_jerk = time_stamp_np[:-1]
+    #timeStamp_snap = time_stamp_np[:-2]
+
+    plt.figure(figsize=(10, 6))
+    
+    jerk_indices: NDArray[np.intp] = get_min_max_indices(jerk)
+    plt.plot(timeStamp_jerk[jerk_indices], np.asarray(jerk)[jerk_indices], label="Jerk", color="blue")
+    
+    for peak_window in roi_sd['peak_window']:
+        # Vertical lines for the start of the regions of interest
+        plt.vlines(
+            timeStamp_jerk[peak_window * step_size],
+            -1e-06,
+            1e-06,
+            colors= ['r'],
+            linestyles= 'dashed',
+            label= 'ROI',
+        )
+        # Vertical lines for the end of the regions of interest
+        plt.vlines(
+            df_avg['timeStamp'][peak_window * step_size + window_size],
+            -1e-06,
+            1e-06,
+            colors= ['r'],
+            linestyles= 'dashed',
+        )
+    plt.xlabel('timeStamp')
+    plt.ylabel('jerk')
+    plt.title(file_path)
+    plt.grid(which='both')
+    plt.legend()
+    show_or_save('sd_with_roi', output_dir, plot_format)
+
+def decimate_acceleration(df: pd.DataFrame) -> pd.DataFrame:
+    '''Keeps the rows needed to draw the three acceleration axes (per-bucket min/max of each axis)
+
+    Args:
+        df (pd.DataFrame): DataFrame with timeStamp, Acc_X, Acc_Y and Acc_Z columns
+
+    Returns:
+        pd.DataFrame: decimated DataFrame
+    '''
+    return df.iloc[get_plot_indices(df['Acc_X'], df['Acc_Y'], df['Acc_Z'])]
+
+def show_or_save(file_name: str, output_dir: str | None, plot_format: str = 'png') -> None:
+    '''Shows the current figure, or saves it to a file and closes it (headless / batch runs)
+
+    Args:
+        file_name (str): name of the file without extension
+        output_dir (str | None): directory where the figure is saved. If None, the figure is shown
+        plot_format (str): file format (png, svg, ...)
+    '''
+    import matplotlib.pyplot as plt
+
+    if output_dir is None:
+        plt.show()
+        return
+
+    os.makedirs(output_dir, exist_ok = True)
+    plt.savefig(os.path.join(output_dir, f'{file_name}.{plot_format}'))
+    plt.close()
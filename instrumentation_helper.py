@@ -0,0 +1,320 @@
+# Recovery Score Calculations: instrumentation_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: per-stage timing and memory records. Stage functions are decorated with @instrument; when
+# instrumentation is turned on (configure, or --instrument in main.py / batch_helper.py) every call appends one
+# JSON line to the log: stage, case, wall time, CPU time, number of input samples, growth of the peak RSS and,
+# with trace_memory, the peak of the memory allocated during the stage (tracemalloc). When it is off the
+# decorator only checks a flag. Settings are passed through environment variables so the worker processes of
+# a batch run use them too. instrument_case labels the records of a case and can save a cProfile dump per case.
+# Every module imports this one, so pandas is only imported by the summary functions.
+# Usage: python instrumentation_helper.py instrumentation.jsonl (p50/p95 per stage)
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+try:
+    import resource
+except ImportError:
+    # Windows: no peak RSS
+    resource = None
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+LOG_VARIABLE: str = 'RS_INSTRUMENT_LOG'
+MEMORY_VARIABLE: str = 'RS_INSTRUMENT_MEMORY'
+PROFILE_VARIABLE: str = 'RS_INSTRUMENT_PROFILE_DIR'
+
+# Case of the records written by this process, case being measured (see start_case) and, per thread,
+# the stack of the stages being measured (for nested peaks)
+current_case: str | None = None
+case_state: dict = {}
+local = threading.local()
+
+def configure(log_path: str | None = 'instrumentation.jsonl', trace_memory: bool = False, profile_dir: str | None = None) -> None:
+    '''Turns instrumentation on (or off with log_path = None) for this process and the processes it starts
+
+    Args:
+        log_path (str | None): JSON lines file where the records are appended, None to turn instrumentation off
+        trace_memory (bool): measure the peak memory of each stage with tracemalloc (slows numpy allocations down)
+        profile_dir (str | None): directory where instrument_case saves a cProfile dump per case
+    '''
+    settings: dict = {LOG_VARIABLE: log_path, MEMORY_VARIABLE: '1' if trace_memory else None, PROFILE_VARIABLE: profile_dir}
+
+    for variable, value in settings.items():
+        if value:
+            os.environ[variable] = value
+        else:
+            os.environ.pop(variable, None)
+
+def is_enabled() -> bool:
+    return LOG_VARIABLE in os.environ
+
+def get_sample_count(args: tuple) -> int | None:
+    '''Number of input samples of a stage: length of its first argument that has one (DataFrame, array, list)
+
+    Args:
+        args (tuple): positional arguments of the stage
+
+    Returns:
+        int | None: number of samples, None if no argument has a length
+    '''
+    for arg in args:
+        if hasattr(arg, '__len__') and not isinstance(arg, (str, bytes, dict)):
+            return len(arg)
+
+    return None
+
+def get_peak_rss_mb() -> float | None:
+    '''Peak resident set size of this process in MB (None where it is not available)'''
+    if resource is None:
+        return None
+
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+def write_record(record: dict) -> None:
+    '''Appends a record to the log (one line, written at once so processes do not mix their lines)
+
+    Args:
+        record (dict): stage measurements
+    '''
+    line: str = json.dumps(record, default = str) + '\n'
+
+    with open(os.environ[LOG_VARIABLE], 'a') as file:
+        file.write(line)
+
+@contextmanager
+def stage(name: str, samples: int | None = None):
+    '''Measures a block of code and records it as a stage (does nothing when instrumentation is off).
+        Yields a dict where 'samples' can be set once the number of samples is known
+
+    Args:
+        name (str): stage name
+        samples (int | None): number of input samples
+    '''
+    info: dict = {'samples': samples}
+
+    if not is_enabled():
+        yield info
+        return
+
+    memory_stack: list[dict] = local.__dict__.setdefault('memory_stack', [])
+    trace_memory: bool = MEMORY_VARIABLE in os.environ
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+        # The peak so far belongs to the enclosing stage
+        if memory_stack:
+            memory_stack[-1]['peak'] = max(memory_stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        current: int = tracemalloc.get_traced_memory()[0]
+        memory_stack.append({'start': current, 'peak': current})
+
+    rss_start: float | None = get_peak_rss_mb()
+    wall_start: float = time.perf_counter()
+    cpu_start: float = time.process_time()
+
+    try:
+        yield info
+
+    finally:
+        record: dict = {
+            'stage': name,
+            'case': current_case,
+            'pid': os.getpid(),
+            'time': time.time(),
+            'wall_s': time.perf_counter() - wall_start,
+            'cpu_s': time.process_time() - cpu_start,
+            'samples': info['samples'],
+            'rss_peak_mb': get_peak_rss_mb(),
+            'rss_growth_mb': None if rss_start is None else get_peak_rss_mb() - rss_start,
+        }
+
+        if trace_memory:
+            frame: dict = memory_stack.pop()
+            peak: int = max(tracemalloc.get_traced_memory()[1], frame['peak'])
+            record['alloc_peak_mb'] = (peak - frame['start']) / 1e6
+
+            if memory_stack:
+                memory_stack[-1]['peak'] = max(memory_stack[-1]['peak'], peak)
+
+        write_record(record)
+
+def instrument(name: str):
+    '''Decorator recording every call of a stage function (see stage). The number of samples is the length
+        of the first argument that has one, or of the result (e.g. read_csv_file)
+
+    Args:
+        name (str): stage name
+
+    Returns:
+        decorator
+    '''
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return function(*args, **kwargs)
+
+            with stage(name, get_sample_count(args)) as info:
+                result = function(*args, **kwargs)
+
+                if info['samples'] is None and not isinstance(result, tuple):
+                    info['samples'] = get_sample_count((result,))
+
+                return result
+
+        return wrapper
+
+    return decorator
+
+def start_case(case_number: str) -> None:
+    '''Starts measuring a case: its records are labelled with the case number, the whole case is recorded
+        as the 'case' stage and, when a profile directory is set, it is profiled with cProfile
+        (saved in <profile_dir>/<case>.prof by end_case)
+
+    Args:
+        case_number (str): case number
+    '''
+    global current_case
+
+    if not is_enabled():
+        return
+
+    end_case()
+
+    current_case = str(case_number)
+    case_state['stage'] = stage('case')
+    case_state['stage'].__enter__()
+
+    if os.environ.get(PROFILE_VARIABLE):
+        case_state['profiler'] = cProfile.Profile()
+        case_state['profiler'].enable()
+
+def end_case() -> None:
+    '''Ends the case started by start_case (does nothing if there is none)'''
+    global current_case
+
+    if 'stage' not in case_state:
+        return
+
+    profiler: cProfile.Profile | None = case_state.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        profile_dir: str = os.environ[PROFILE_VARIABLE]
+        os.makedirs(profile_dir, exist_ok = True)
+        profiler.dump_stats(os.path.join(profile_dir, f'{os.path.basename(current_case)}.prof'))
+
+    case_state.pop('stage').__exit__(None, None, None)
+    current_case = None
+
+@contextmanager
+def instrument_case(case_number: str):
+    '''Measures a case (see start_case) for the duration of the block
+
+    Args:
+        case_number (str): case number
+    '''
+    start_case(case_number)
+
+    try:
+        yield
+
+    finally:
+        end_case()
+
+def load_records(log_path: str, since: float | None = None) -> pd.DataFrame:
+    '''Reads the records of a log
+
+    Args:
+        log_path (str): JSON lines file
+        since (float | None): only keep the records written after this time (time.time())
+
+    Returns:
+        pd.DataFrame: one row per record
+    '''
+    import pandas as pd
+
+    records: pd.DataFrame = pd.read_json(log_path, lines = True)
+
+    if since is not None and not records.empty:
+        records = records[records['time'] >= since]
+
+    return records
+
+def summarize(records: pd.DataFrame) -> pd.DataFrame:
+    '''Aggregates the records per stage
+
+    Args:
+        records (pd.DataFrame): records from load_records
+
+    Returns:
+        pd.DataFrame: calls, total, p50 and p95 wall time, p50 CPU time, samples/s and, when measured, p95 allocation peak per stage
+    '''
+    import pandas as pd
+
+    grouped = records.groupby('stage', sort = False)
+
+    summary = pd.DataFrame({
+        'calls': grouped.size(),
+        'total_s': grouped['wall_s'].sum(),
+        'p50_s': grouped['wall_s'].quantile(0.5),
+        'p95_s': grouped['wall_s'].quantile(0.95),
+        'p50_cpu_s': grouped['cpu_s'].quantile(0.5),
+        'samples_per_s': grouped['samples'].sum() / grouped['wall_s'].sum(),
+    })
+
+    if 'alloc_peak_mb' in records:
+        summary['p95_alloc_mb'] = grouped['alloc_peak_mb'].quantile(0.95)
+
+    return summary.sort_values('total_s', ascending = False)
+
+def print_summary(log_path: str | None = None, since: float | None = None) -> None:
+    '''Prints the p50/p95 per stage of a log (by default the log of the current configuration)
+
+    Args:
+        log_path (str | None): JSON lines file
+        since (float | None): only use the records written after this time (e.g. the start of a batch run)
+    '''
+    log_path = log_path or os.environ.get(LOG_VARIABLE)
+
+    if log_path is None or not os.path.exists(log_path):
+        return
+
+    records: pd.DataFrame = load_records(log_path, since)
+
+    if records.empty:
+        return
+
+    import pandas as pd
+
+    with pd.option_context('display.width', 200, 'display.float_format', '{:.4g}'.format):
+        print(f'Stage timings ({records["case"].nunique()} cases, {log_path}):')
+        print(summarize(records).to_string())
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = 'Prints the p50/p95 per stage of an instrumentation log')
+    parser.add_argument('log', help = 'JSON lines file written with --instrument')
+    args = parser.parse_args()
+
+    print_summary(args.log)
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,317 @@
+# Recovery Score Calculations: live_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: incremental scoring of a live recording. Samples are pushed as they arrive (push) and attempt events
+# are read back (poll_events). The filter, moving average, jerk and window SD reuse the streaming_helper states,
+# so the state kept is O(window_size) plus one small record per attempt. Regions of interest are found online
+# with the same rule as detect_roi_sd (run of consecutive windows with SD > 2 * threshold, peak = highest SD).
+# Once no new attempt has started for 'standing_time' seconds after the last one ended, the horse is considered
+# standing and a provisional recovery score is emitted (revised if a new attempt starts afterwards).
+# replay_csv streams an existing recording at real or accelerated speed so everything can be tested offline.
+# Usage: python live_helper.py <case> [--speed 10]
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from collections.abc import Iterator
+from numpy.typing import NDArray
+
+import config
+from acceleration_helper import get_sa_2axes_array, get_sumua_array
+from CSV_helper import rename
+from file_helper import read_csv_chunks
+from output_results_helper import get_recovery_score
+from streaming_helper import InitialFilterState, MovingAverageState, DerivativeState, WindowState
+
+class LiveScorer:
+    '''Scores a recording while it is being recorded
+
+    Usage:
+        scorer = LiveScorer()
+        for samples in replay_csv('36', speed = 10):
+            scorer.push(samples)
+            for event in scorer.poll_events():
+                print(event)
+        scorer.finish()
+    '''
+
+    def __init__(self, target_value: float = config.target_value, target_moving_avg: int = config.target_moving_avg, window_size: int = config.window_size, step_size: int = config.step_size, threshold: float = config.threshold, standing_time: float = config.standing_time) -> None:
+        '''
+        Args:
+            target_value (float): Acc_Z value that signals sternal recumbency (initial filter)
+            target_moving_avg (int): moving average window size
+            window_size (int): window size for the SD method
+            step_size (int): step size for the SD method
+            threshold (float): SD threshold (windows with SD > 2 * threshold belong to an attempt)
+            standing_time (float): seconds without a new attempt after which the horse is considered standing
+        '''
+        self.window_size: int = window_size
+        self.step_size: int = step_size
+        self.threshold: float = threshold
+        self.standing_time_ns: int = int(standing_time * 1e9)
+
+        self.initial_filter_state = InitialFilterState(target_value)
+        self.moving_average_state = MovingAverageState(target_moving_avg)
+        self.derivative_state = DerivativeState()
+        self.window_state = WindowState(window_size, step_size)
+
+        # Timestamps (int64 ns) of the rows not yet consumed by window_state; time_offset is the row of time_buffer[0]
+        self.time_buffer: NDArray[np.int64] = np.empty(0, dtype = np.int64)
+        self.time_offset: int = 0
+        self.n_windows: int = 0
+        self.rows: int = 0
+        self.last_time: int | None = None
+
+        # Region being detected and completed regions (peak window, peak SD, max absolute accelerations at the peak)
+        self.current: dict | None = None
+        self.regions: list[dict] = []
+        self.standing: bool = False
+        self.events: list[dict] = []
+
+    def push(self, samples: pd.DataFrame) -> None:
+        '''Adds the next samples of the recording
+
+        Args:
+            samples (pd.DataFrame): rows with timeStamp, Acc_X, Acc_Y and Acc_Z (as read by read_csv_chunks)
+        '''
+        if samples.empty:
+            return
+
+        self.last_time = int(samples['timeStamp'].to_numpy(dtype = 'datetime64[ns]').view(np.int64)[-1])
+
+        # Nothing is scored before the first sternal recumbency
+        samples = self.initial_filter_state.process(samples)
+
+        if not samples.empty:
+            self.process_rows(samples)
+
+        self.check_standing()
+
+    def process_rows(self, samples: pd.DataFrame) -> None:
+        '''Runs the moving average, jerk and window stages on filtered rows and checks the new windows
+
+        Args:
+            samples (pd.DataFrame): filtered rows
+        '''
+        time_stamp: NDArray[np.int64] = samples['timeStamp'].to_numpy(dtype = 'datetime64[ns]').view(np.int64)
+        acc_z_avg: NDArray[np.float64] = self.moving_average_state.process(samples['Acc_Z'].to_numpy(dtype = np.float64))
+        jerk: NDArray[np.float64] = self.derivative_state.process(acc_z_avg, time_stamp.astype(np.float64))
+
+        self.time_buffer = np.concatenate((self.time_buffer, time_stamp))
+        self.rows += len(samples)
+
+        n_results: int = len(self.window_state.sd)
+        self.window_state.process(jerk, samples[['Acc_X', 'Acc_Y', 'Acc_Z']].to_numpy(dtype = np.float64))
+
+        if len(self.window_state.sd) == n_results:
+            return
+
+        sd: NDArray[np.float64] = self.window_state.sd[-1]
+        abs_max: NDArray[np.float64] = self.window_state.abs_max[-1]
+
+        for k in range(len(sd)):
+            self.check_window(self.n_windows + k, float(sd[k]), abs_max[k])
+
+        # window_state dropped the rows before the next window
+        self.n_windows += len(sd)
+        consumed: int = self.n_windows * self.step_size - self.time_offset
+        self.time_buffer = self.time_buffer[consumed:]
+        self.time_offset += consumed
+
+        # Only the results of the last call are needed, the others are not kept
+        self.window_state.sd = []
+        self.window_state.abs_max = []
+
+    def get_window_time(self, row: int) -> pd.Timestamp:
+        '''Timestamp of a filtered row that has not been consumed yet by window_state
+
+        Args:
+            row (int): row of the filtered recording
+
+        Returns:
+            pd.Timestamp: timestamp of the row
+        '''
+        index: int = row - self.time_offset
+
+        if 0 <= index < len(self.time_buffer):
+            return pd.Timestamp(int(self.time_buffer[index]))
+
+        # Row not received (the recording ended before it): last sample received
+        return pd.Timestamp(self.last_time)
+
+    def check_window(self, window: int, sd: float, abs_max: NDArray[np.float64]) -> None:
+        '''Online version of detect_roi_sd for one window
+
+        Args:
+            window (int): window index
+            sd (float): SD of jerk in the window
+            abs_max (NDArray[np.float64]): max absolute Acc_X, Acc_Y and Acc_Z in the window
+        '''
+        if sd > self.threshold * 2:
+            if self.current is None:
+                self.current = {'start_window': window, 'peak_window': window, 'peak_sd': sd, 'abs_max': abs_max.copy()}
+                self.standing = False
+                self.add_event('attempt_started', window = window, time = self.get_window_time(window * self.step_size))
+
+            elif sd > self.current['peak_sd']:
+                self.current.update(peak_window = window, peak_sd = sd, abs_max = abs_max.copy())
+
+        elif self.current is not None:
+            self.end_region(window - 1, self.get_window_time((window - 1) * self.step_size + self.window_size))
+
+    def end_region(self, end_window: int, end_time: pd.Timestamp) -> None:
+        '''Closes the region being detected
+
+        Args:
+            end_window (int): last window of the region
+            end_time (pd.Timestamp): time of the end of the last window
+        '''
+        self.current['end_window'] = end_window
+        self.current['end_time'] = end_time
+        self.regions.append(self.current)
+        self.current = None
+
+        self.add_event('attempt_ended', window = end_window, time = end_time, peak_window = self.regions[-1]['peak_window'], peak_sd = self.regions[-1]['peak_sd'], attempts = len(self.regions))
+
+    def check_standing(self) -> None:
+        '''Emits a provisional score once no attempt has started for standing_time after the last one ended'''
+        if self.standing or self.current is not None or not self.regions or self.last_time is None:
+            return
+
+        if self.last_time - self.regions[-1]['end_time'].value >= self.standing_time_ns:
+            self.standing = True
+            self.add_event('standing', time = pd.Timestamp(self.last_time), **self.get_score())
+
+    def get_score(self) -> dict:
+        '''Recovery score of the attempts completed so far (the last one is the successful attempt)
+
+        Returns:
+            dict: number of failed attempts, sa_2axes, sumua and recovery score (None if there are no attempts yet)
+        '''
+        if not self.regions:
+            return {'number_failed_attempts': 0, 'sa_2axes': None, 'sumua': None, 'recovery_score': None}
+
+        amax: NDArray[np.float64] = np.array([region['abs_max'] for region in self.regions])
+        number_failed_attempts: int = len(self.regions) - 1
+        sa_2axes: float = get_sa_2axes_array(amax)
+        sumua: float = get_sumua_array(amax)
+
+        return {
+            'number_failed_attempts': number_failed_attempts,
+            'sa_2axes': sa_2axes,
+            'sumua': sumua if number_failed_attempts >= 1 else None,
+            'recovery_score': get_recovery_score(number_failed_attempts, sa_2axes, sumua),
+        }
+
+    def add_event(self, event: str, **details) -> None:
+        '''Queues an event for poll_events
+
+        Args:
+            event (str): 'attempt_started', 'attempt_ended', 'standing' or 'finished'
+            **details: event information
+        '''
+        self.events.append({'event': event, 'detected_at': pd.Timestamp(self.last_time), **details})
+
+    def poll_events(self) -> list[dict]:
+        '''Returns the events emitted since the last call
+
+        Returns:
+            list[dict]: events in the order they were detected
+        '''
+        events: list[dict] = self.events
+        self.events = []
+
+        return events
+
+    def finish(self) -> dict:
+        '''Ends the recording: closes the region being detected (as detect_roi_sd does at the end of the data)
+            and emits the final score
+
+        Returns:
+            dict: final score (see get_score)
+        '''
+        if self.current is not None:
+            self.end_region(self.n_windows - 1, self.get_window_time((self.n_windows - 1) * self.step_size + self.window_size))
+
+        score: dict = self.get_score()
+        self.add_event('finished', time = pd.Timestamp(self.last_time), **score)
+
+        return score
+
+def replay_csv(file_path: str, speed: float = 1.0, batch_rows: int = 20, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    '''Streams an existing recording as a stand-in for the live sensor feed
+
+    Args:
+        file_path (str): case number / path without the .csv extension
+        speed (float): replay speed (1.0 is real time, 10.0 is ten times faster, 0 is as fast as possible)
+        batch_rows (int): number of rows per batch (20 rows are 100 ms at 200 Hz)
+        chunksize (int): number of csv rows read at a time
+
+    Yields:
+        pd.DataFrame: next rows of the recording
+    '''
+    first_time: int | None = None
+    start: float = time.perf_counter()
+
+    for chunk in read_csv_chunks(file_path, chunksize):
+        time_stamp: NDArray[np.int64] = chunk['timeStamp'].to_numpy(dtype = 'datetime64[ns]').view(np.int64)
+
+        if first_time is None:
+            first_time = int(time_stamp[0])
+
+        for batch_start in range(0, len(chunk), batch_rows):
+            if speed > 0:
+                # Waits until the last row of the batch would have been recorded
+                batch_end: int = min(batch_start + batch_rows, len(chunk)) - 1
+                delay: float = (time_stamp[batch_end] - first_time) / 1e9 / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            yield chunk.iloc[batch_start : batch_start + batch_rows]
+
+def run_live(file_path: str, speed: float = 1.0, batch_rows: int = 20) -> dict:
+    '''Replays a recording through the live scorer and prints the events as they are detected
+
+    Args:
+        file_path (str): case number / path without the .csv extension
+        speed (float): replay speed (see replay_csv)
+        batch_rows (int): number of rows per batch
+
+    Returns:
+        dict: final score (see LiveScorer.get_score)
+    '''
+    scorer = LiveScorer()
+
+    for samples in replay_csv(file_path, speed, batch_rows):
+        scorer.push(samples)
+
+        for event in scorer.poll_events():
+            print_event(event)
+
+    score: dict = scorer.finish()
+
+    for event in scorer.poll_events():
+        print_event(event)
+
+    return score
+
+def print_event(event: dict) -> None:
+    '''Prints an event on one line
+
+    Args:
+        event (dict): event from LiveScorer.poll_events
+    '''
+    details: str = ', '.join(f'{key} = {value}' for key, value in event.items() if key not in ('event', 'detected_at'))
+    print(f'[{event["detected_at"]}] {event["event"]}: {details}')
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = 'Scores a recording live, replaying a csv file as the sensor feed')
+    parser.add_argument('case', help = 'case number / path of the csv file')
+    parser.add_argument('--speed', type = float, default = 1.0, help = 'replay speed (1 = real time, 0 = as fast as possible)')
+    parser.add_argument('--batch-rows', type = int, default = 20, help = 'rows per batch pushed to the scorer')
+    args = parser.parse_args()
+
+    run_live(rename(args.case), args.speed, args.batch_rows)
@@ -1,175 +1,246 @@
-# RS: Main Script
-# Script created 3/25/2024
-# Last revision 4/10/2025
-# Notes: this script uses the SD method to detect regions of interest using the jerk/ snap signal. 
-# Then, it uses those indexes on the original Acc_Z, Acc_X, Acc_Y dataset
-
-import pandas as pd
-#import numpy as np
-
-from acceleration_helper import get_max_accelerations_x, get_max_accelerations_y, get_max_accelerations_z, get_sa_2axes, get_sumua
-from attempt_detection_helper import calculate_window_sd, detect_roi_sd, get_roi_derivative, get_roi_indices, get_attempts, set_jerk_threshold
-from derivative_helper import calculate_derivatives
-from file_helper import read_csv_file, add_csv_extension, initial_filter, apply_moving_average, clean_data, apply_kalman_filter
-from graph_helper import plot_acceleration_data, get_plot_jerk_snap, get_plot_jerk_snap_with_roi, get_plot_sd_with_roi
-#from numpy.typing import NDArray
-from region_helper import extract_roi_values, get_number_roi_sd
-from output_results_helper import process_recovery
-#from velocity_helper import get_auc_x, get_auc_y, get_auc_z
-
-def main() -> None:
-
-    # acceleration threshold value to signal sternal recumbency for initial filter
-    target_value: float = 9.0 
-    
-    # variables for moving average filter
-    target_moving_avg: int = 10 # moving average window_size (originally set to 4)
-    
-    # variables for Kalman filter
-    process_variance = 1e-5  # Q
-    measurement_variance = 1e-1  # R
-    estimated_measurement_variance = 1.0  # P   
-    
-    # variables for ROI_Derivative method
-    factor: float = 8.0   # Factor to set jerk threshold (56.55)
-    percentile: float = 95.0    # Percentile to set jerk threshold  
-    jerk_threshold: float = 4.64e-07 #0.2e-06 #5.7209199129367875e-12  # Threshold for significant jerk
-    snap_threshold: float = 1  # Threshold for significant snap (needs re calibration)
-
-    # variables for ROI_SD method
-    # values that can be changed  to increase/ decrease sensitivity
-    window_size: int = 5000 # each cell is 5ms, 10000 cells represent 2secs, 2500 cells are 0.5secs
-    step_size: int = 1000 # 2000 cells are 400ms (0.4secs), 833 cells are 166.6ms (0.166secs)
-    threshold: float = 1e-08 # default value for SD threshold 1.5 (1.5e-08)
-    
-    file_path: str = input('Enter case number: ')
-
-    df: pd.DataFrame = read_csv_file(file_path)
-
-    if df is not None:
-        print('File read successfully...')
-        print("Columns in DataFrame:", df.columns)
-        
-    else:
-        print('Failed to load DataFrame')
-        return # exit if the file cannot be loaded
-    
-    # Creates new df in which Z_axis values are ignored until values reach 'target_value' 
-    # signaling horse getting onto sternal recumbency
-    df_filtered: pd.DataFrame = initial_filter(df, target_value)
-    print('Initial filter applied successfully')
-       
-    # Apply moving average filter with a specified 'target_moving_avg' value
-    df_moving_avg: pd.DataFrame = apply_moving_average(df_filtered, target_moving_avg)
-    print('Moving average applied successfully')
-    
-    df_kalman: pd.DataFrame = apply_kalman_filter(df_filtered, process_variance, measurement_variance, estimated_measurement_variance)
-    #print('Kalman filter applied successfully')
-    
-    # Plot data to review application of filters
-    plot_acceleration_data(df_filtered, df_moving_avg, df_kalman)
-          
-    # Creates new DataFrame after applying avg filter with Acc_Z and timeStamp values only 
-    df_avg = pd.DataFrame({'timeStamp': df_moving_avg['timeStamp'], 'Acc_Z': df_moving_avg['Acc_Z']})
-        
-    # Creates new DataFrame with Acc_Z and timeStamp values only (Kalman filter applied)
-    #df_kalman = pd.DataFrame({'Acc_Z': df_kalman['Acc_Z'], 'timeStamp': df_kalman['timeStamp']})   
-        
-    # Calculates first and second derivatives (jerk and snap) from the avg filtered dataset
-    jerk, snap = calculate_derivatives(df_avg)
-    print('Jerk and Snap calculated successfully')
-
-    get_plot_jerk_snap(jerk, snap, df_avg)          
-    # Converts onto pandas DataFrame
-    #jerkdf = pd.DataFrame({'TimeStamp':timeStamp_np,'Jerk':jerk})
-    #print('Jerk DataFrame created successfully')
-    #snapdf = pd.DataFrame(snap, columns=['TimeStamp','Jerk'])
-    #print('Snap DataFrame created successfully')
-    
-    # Set Jerk threshold and calculate mean Jerk to be able to re calibrate the threshold
-    mean_jerk, std_jerk, jerk_threshold_cal = set_jerk_threshold(jerk, factor, percentile)
-    print('Jerk threshold calculated successfully')
-    #print(f'Mean Jerk = {mean_jerk}')
-    #print(f'Jerk threshold set to {jerk_threshold_cal}')
-        
-    # Get regions of interest for Jerk and Snap
-    #roi_indices_df: list[float] = get_roi_derivative(jerk, snap, jerk_threshold_cal, snap_threshold)
-    #print('ROI calculated successfully')
-    #print(f'ROI Derivative {roi_derivative}')
-    
-    print('Calculating ROIs...')
-
-    # Calculates standard deviation for each window
-    AccZ_sd: list[float] = calculate_window_sd(jerk, window_size, step_size)
-    print('sd_list calculated succesfully using jerk dataset')
-
-    # Detects regions of interest on the jerk signal based on standard deviation method
-    roi_sd: list[float] = detect_roi_sd(AccZ_sd, threshold)
-    print('Regions of Interest detected successfully')  
-
-    # Get indices of regions of interest for Jerk and Snap  
-    #roi_indices_df: pd.DataFrame = get_roi_indices(jerk, snap, jerk_threshold_cal, snap_threshold)
-    #print('ROI indices obtained successfully')
-    #print(f'ROI indices {roi_indices_df}')
-    
-    # Plot jerk and snap with regions of interest
-    #get_plot_jerk_snap_with_roi(jerk, snap, roi_in dices_df, df_avg)
-
-    # Plot jerk and snap with regions of interest using sd method
-    get_plot_sd_with_roi(jerk, df_avg, roi_sd, window_size, step_size, file_path)
-            
-    number_failed_attempts: int = get_attempts(roi_sd)
-    print(f'Number of Failed Attempts = {number_failed_attempts}')
-    
-    # Extract ROI values for each axis
-    axes: list[str] = ['Acc_Z', 'Acc_X', 'Acc_Y']
-    #roi_values_df: pd.DataFrame = extract_roi_values(df_moving_avg, roi_indices_df, axes)
-    #print('ROI values extracted successfully')
-    #print(roi_values_df)
-    #print(f'ROI_Values_length = {len(roi_values_df)}')
-    
-    #selected_data_list: list = get_roi_derivative(jerk, snap, jerk_threshold_cal, snap_threshold)
-            
-    #selected_data_list_jerk_method: list = get_regions_jerk(jerk, roi_indices)
-    #selected_data_list_snap_method: list = get_regions_snap(snap, roi_indices)
-    
-    roi_values: list = get_number_roi_sd(df_filtered, roi_sd, window_size, step_size)
-                            
-    amax_x_list: list[float] = get_max_accelerations_x(roi_values)
-    #print(f'amax_x_list is {amax_x_list}')
-                    
-    amax_y_list: list[float] = get_max_accelerations_y(roi_values)
-    #print(f'amax_y_list is {amax_y_list}')
-                
-    amax_z_list: list[float] = get_max_accelerations_z(roi_values)
-    #print(f'amax_z_list is {amax_z_list}')
-                
-    #sa: float = get_sa(amax_x_list, amax_y_list, amax_z_list)
-    #print(f'sa = {sa}')
-
-    sa_2axes: float = get_sa_2axes(amax_x_list, amax_y_list)
-    #print(f'sa_2axes = {sa_2axes}')
-                
-    sumua:float = get_sumua(amax_x_list, amax_y_list, amax_z_list)
-    #print(f'ua_list = {ua_list}')
-    #print(f'sumua = {sumua}')
-            
-    rs_2axes_py: float = process_recovery(file_path, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, threshold, number_failed_attempts, sa_2axes, sumua)
-
-    # display output_results in terminal
-    print(f'results are:')
-    print(f'file name: {file_path}')
-    print(f'jerk_threshold: {jerk_threshold}')
-    print(f'mean_jerk: {mean_jerk}')
-    print(f'std_jerk:{std_jerk}')
-    print(f'jerk_threshold_cal: {jerk_threshold_cal}')
-    print(f'threshold set at: {threshold}')
-    print(f'len(roi_sd): {len(roi_sd)}')
-    print(f'Number of failed attempts: {number_failed_attempts}')
-    print(f'sa_2axes= {sa_2axes}')
-    print(f'sumua= {sumua}')
-    print(f'rs_2axes_py= {rs_2axes_py}')
- 
-if __name__ == "__main__":
-    
-    main()
\ No newline at end of file
+# RS: Main Script
+# Script created 3/25/2024
+# Last revision 10/17/2026
+# Notes: this script uses the SD method to detect regions of interest using the jerk/ snap signal. 
+# Then, it uses those indexes on the original Acc_Z, Acc_X, Acc_Y dataset
+
+import argparse
+import os
+import time
+import pandas as pd
+import numpy as np
+
+from acceleration_helper import get_max_accelerations, get_sa_2axes_array, get_sumua_array
+from attempt_detection_helper import calculate_window_sd, detect_roi_sd, detect_roi_derivative, get_roi_derivative, get_roi_indices, get_attempts, set_jerk_threshold
+from derivative_helper import calculate_derivatives
+from file_helper import read_csv_from_recumbency, build_cache, add_csv_extension, apply_moving_average, clean_data, apply_kalman_filter
+from graph_helper import plot_acceleration_data, get_plot_jerk_snap, get_plot_jerk_snap_with_roi, get_plot_sd_with_roi
+from numpy.typing import NDArray
+from region_helper import extract_roi_values, get_roi_bounds_sd
+from output_results_helper import process_recovery
+from render_helper import PlotRenderer, PLOT_MODES
+from results_index_helper import ResultsIndex, get_parameters_hash, get_run_parameters
+from instrumentation_helper import configure, start_case, end_case, print_summary
+from CSV_helper import CSV, get_date, rename
+#from velocity_helper import get_auc_x, get_auc_y, get_auc_z
+
+def main(plot_mode: str = 'show', plot_dir: str = 'plots', plot_format: str = 'png', force: bool = False, use_cache: bool = True) -> None:
+    '''Scores one case entered by the user. The case is skipped if it has already been scored
+        from the same file with the same parameters, unless 'force' is True
+
+    Args:
+        plot_mode (str): 'show' (interactive windows), 'save' (files in plot_dir/<case>, rendered in the background) or 'off'
+        plot_dir (str): directory for the plot files in 'save' mode
+        plot_format (str): file format of the plot files (png, svg, ...)
+        force (bool): score the case even if it has not changed
+        use_cache (bool): write the binary cache of the recording the first time it is read and read from it
+            (default True). If False the csv file is read from recumbency on, without writing the cache
+    '''
+
+    # acceleration threshold value to signal sternal recumbency for initial filter
+    target_value: float = 9.0 
+    
+    # variables for moving average filter
+    target_moving_avg: int = 10 # moving average window_size (originally set to 4)
+    
+    # variables for Kalman filter
+    process_variance = 1e-5  # Q
+    measurement_variance = 1e-1  # R
+    estimated_measurement_variance = 1.0  # P   
+    
+    # variables for ROI_Derivative method
+    factor: float = 8.0   # Factor to set jerk threshold (56.55)
+    percentile: float = 95.0    # Percentile to set jerk threshold  
+    jerk_threshold: float = 4.64e-07 #0.2e-06 #5.7209199129367875e-12  # Threshold for significant jerk
+    snap_threshold: float = 1  # Threshold for significant snap (needs re calibration)
+    gap_tolerance: int = 1000 # regions closer than this (in cells, 1000 cells are 5secs) are merged into one
+
+    # variables for ROI_SD method
+    # values that can be changed  to increase/ decrease sensitivity
+    window_size: int = 5000 # each cell is 5ms, 10000 cells represent 2secs, 2500 cells are 0.5secs
+    step_size: int = 1000 # 2000 cells are 400ms (0.4secs), 833 cells are 166.6ms (0.166secs)
+    threshold: float = 1e-08 # default value for SD threshold 1.5 (1.5e-08)
+
+    # representation of the raw acceleration axes: 'float64', or 'float32' / 'int16' to use less memory (see compact_helper)
+    signal_dtype: str = 'float64'
+    
+    file_path: str = input('Enter case number: ')
+
+    # Skips the case if this file has already been scored with these parameters
+    parameters_hash: str = get_parameters_hash(get_run_parameters(CSV.CSV_FILE, 'dataframe', target_value = target_value, target_moving_avg = target_moving_avg, process_variance = process_variance, measurement_variance = measurement_variance, estimated_measurement_variance = estimated_measurement_variance, factor = factor, percentile = percentile, jerk_threshold = jerk_threshold, snap_threshold = snap_threshold, gap_tolerance = gap_tolerance, window_size = window_size, step_size = step_size, threshold = threshold, signal_dtype = signal_dtype))
+    case_key: tuple | None = None
+
+    if os.path.exists(add_csv_extension(file_path)):
+        with ResultsIndex() as index:
+            case_key = index.get_key(rename(file_path), add_csv_extension(file_path), parameters_hash)
+            scored_date: str | None = index.get_scored_date(case_key)
+
+        if scored_date is not None and not force:
+            print(f'Case {file_path} was already scored on {scored_date} from the same file with the same parameters (use --force to score it again)')
+            return
+
+    # Stage records (--instrument) are labelled with the case (closed by end_case, even if the case fails)
+    start_case(file_path)
+    renderer: PlotRenderer | None = None
+
+    try:
+        # The first read of a recording parses it once in full and writes its binary cache
+        if use_cache:
+            build_cache(file_path)
+
+        # Reads the recording from the first Z_axis value greater than 'target_value' on
+        # (signaling horse getting onto sternal recumbency), without copying the rows before it
+        df_filtered, start_offset = read_csv_from_recumbency(file_path, target_value, use_cache, signal_dtype = signal_dtype)
+
+        if df_filtered.empty:
+            print('Failed to load DataFrame')
+            return # exit if the file cannot be loaded
+
+        print('File read successfully...')
+        print("Columns in DataFrame:", df_filtered.columns)
+    
+        print(f'Initial filter applied successfully (recording used from row {start_offset})')
+
+        renderer = PlotRenderer(plot_mode, os.path.join(plot_dir, os.path.basename(file_path)), plot_format)
+       
+        # Apply moving average filter with a specified 'target_moving_avg' value
+        df_moving_avg: pd.DataFrame = apply_moving_average(df_filtered, target_moving_avg)
+        print('Moving average applied successfully')
+    
+        # Kalman filter output is only used for plotting
+        if renderer.enabled:
+            df_kalman: pd.DataFrame = apply_kalman_filter(df_filtered, process_variance, measurement_variance, estimated_measurement_variance)
+            #print('Kalman filter applied successfully')
+    
+            # Plot data to review application of filters
+            renderer.submit(plot_acceleration_data, df_filtered, df_moving_avg, df_kalman)
+          
+        # Creates new DataFrame after applying avg filter with Acc_Z and timeStamp values only 
+        df_avg = pd.DataFrame({'timeStamp': df_moving_avg['timeStamp'], 'Acc_Z': df_moving_avg['Acc_Z']})
+        
+        # Creates new DataFrame with Acc_Z and timeStamp values only (Kalman filter applied)
+        #df_kalman = pd.DataFrame({'Acc_Z': df_kalman['Acc_Z'], 'timeStamp': df_kalman['timeStamp']})   
+        
+        # Calculates first and second derivatives (jerk and snap) from the avg filtered dataset
+        jerk, snap = calculate_derivatives(df_avg)
+        print('Jerk and Snap calculated successfully')
+
+        renderer.submit(get_plot_jerk_snap, jerk, snap, df_avg)
+        # Converts onto pandas DataFrame
+        #jerkdf = pd.DataFrame({'TimeStamp':timeStamp_np,'Jerk':jerk})
+        #print('Jerk DataFrame created successfully')
+        #snapdf = pd.DataFrame(snap, columns=['TimeStamp','Jerk'])
+        #print('Snap DataFrame created successfully')
+    
+        # Set Jerk threshold and calculate mean Jerk to be able to re calibrate the threshold
+        mean_jerk, std_jerk, jerk_threshold_cal = set_jerk_threshold(jerk, factor, percentile)
+        print('Jerk threshold calculated successfully')
+        #print(f'Mean Jerk = {mean_jerk}')
+        #print(f'Jerk threshold set to {jerk_threshold_cal}')
+        
+        # Get regions of interest for Jerk and Snap
+        roi_derivative: NDArray = detect_roi_derivative(jerk, snap, jerk_threshold_cal, snap_threshold, gap_tolerance)
+        print(f'Derivative method: {len(roi_derivative)} regions of interest detected')
+        #print(f'ROI Derivative {roi_derivative}')
+    
+        print('Calculating ROIs...')
+
+        # Calculates standard deviation for each window that can be above the threshold (the other ones are NaN)
+        AccZ_sd: NDArray[np.float64] = calculate_window_sd(jerk, window_size, step_size, threshold = threshold)
+        print('sd_list calculated succesfully using jerk dataset')
+
+        # Detects regions of interest on the jerk signal based on standard deviation method
+        roi_sd: NDArray = detect_roi_sd(AccZ_sd, threshold)
+        print('Regions of Interest detected successfully')  
+
+        # Get indices of regions of interest for Jerk and Snap  
+        #roi_indices_df: pd.DataFrame = get_roi_indices(jerk, snap, jerk_threshold_cal, snap_threshold)
+        #print('ROI indices obtained successfully')
+        #print(f'ROI indices {roi_indices_df}')
+    
+        # Plot jerk and snap with regions of interest
+        #get_plot_jerk_snap_with_roi(jerk, snap, roi_in dices_df, df_avg)
+
+        # Plot jerk and snap with regions of interest using sd method
+        renderer.submit(get_plot_sd_with_roi, jerk, df_avg, roi_sd, window_size, step_size, file_path)
+            
+        number_failed_attempts: int = get_attempts(roi_sd)
+        print(f'Number of Failed Attempts = {number_failed_attempts}')
+    
+        # Extract ROI values for each axis
+        axes: list[str] = ['Acc_Z', 'Acc_X', 'Acc_Y']
+        #roi_values_df: pd.DataFrame = extract_roi_values(df_moving_avg, roi_indices_df, axes)
+        #print('ROI values extracted successfully')
+        #print(roi_values_df)
+        #print(f'ROI_Values_length = {len(roi_values_df)}')
+    
+        #selected_data_list: list = get_roi_derivative(jerk, snap, jerk_threshold_cal, snap_threshold)
+            
+        #selected_data_list_jerk_method: list = get_regions_jerk(jerk, roi_indices)
+        #selected_data_list_snap_method: list = get_regions_snap(snap, roi_indices)
+    
+        # Rows of the window at the peak of each region of interest
+        roi_starts, roi_ends = get_roi_bounds_sd(roi_sd, window_size, step_size, len(df_filtered))
+
+        # Max absolute Acc_X, Acc_Y and Acc_Z of each region (one row per region)
+        amax: NDArray[np.float64] = get_max_accelerations(df_filtered[['Acc_X', 'Acc_Y', 'Acc_Z']].to_numpy(), roi_starts, roi_ends)
+        #print(f'amax is {amax}')
+                
+        #sa: float = get_sa(amax[:, 0], amax[:, 1], amax[:, 2])
+        #print(f'sa = {sa}')
+
+        sa_2axes: float = get_sa_2axes_array(amax)
+        #print(f'sa_2axes = {sa_2axes}')
+                
+        sumua:float = get_sumua_array(amax)
+        #print(f'ua_list = {ua_list}')
+        #print(f'sumua = {sumua}')
+            
+        rs_2axes_py: float = process_recovery(file_path, jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, threshold, number_failed_attempts, sa_2axes, sumua)
+
+        if case_key is not None:
+            with ResultsIndex() as index:
+                index.mark_scored([case_key], [get_date()])
+
+        # display output_results in terminal
+        print(f'results are:')
+        print(f'file name: {file_path}')
+        print(f'jerk_threshold: {jerk_threshold}')
+        print(f'mean_jerk: {mean_jerk}')
+        print(f'std_jerk:{std_jerk}')
+        print(f'jerk_threshold_cal: {jerk_threshold_cal}')
+        print(f'threshold set at: {threshold}')
+        print(f'len(roi_sd): {len(roi_sd)}')
+        print(f'Number of failed attempts: {number_failed_attempts}')
+        print(f'Number of failed attempts (derivative method): {max(get_attempts(roi_derivative), 0)}')
+        print(f'sa_2axes= {sa_2axes}')
+        print(f'sumua= {sumua}')
+        print(f'rs_2axes_py= {rs_2axes_py}')
+
+    finally:
+        # Waits for the plots still being saved and stops the render worker, even if the case fails
+        if renderer is not None:
+            renderer.close()
+        end_case()
+ 
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description = 'Scores one recovery recording (the case number is asked for)')
+    parser.add_argument('--plots', choices = PLOT_MODES, default = 'show', help = 'show plots, save them to files (headless) or turn them off')
+    parser.add_argument('--plot-dir', default = 'plots', help = 'directory for the plot files when saving (one subdirectory per case)')
+    parser.add_argument('--plot-format', default = 'png', help = 'file format of the plot files (png, svg, ...)')
+    parser.add_argument('--force', action = 'store_true', help = 'score the case even if it was already scored with the same file and parameters')
+    parser.add_argument('--no-cache', action = 'store_true', help = 'do not write or read the binary cache (reads the csv file from recumbency on)')
+    parser.add_argument('--instrument', nargs = '?', const = 'instrumentation.jsonl', default = None, help = 'append per-stage timings to a JSON lines file (default: instrumentation.jsonl)')
+    parser.add_argument('--trace-memory', action = 'store_true', help = 'with --instrument, also measure the memory allocated by each stage (slower)')
+    parser.add_argument('--profile-dir', default = None, help = 'with --instrument, save a cProfile dump of the case in this directory')
+    args = parser.parse_args()
+
+    if args.instrument:
+        configure(args.instrument, args.trace_memory, args.profile_dir)
+    start: float = time.time()
+    
+    main(args.plots, args.plot_dir, args.plot_format, args.force, not args.no_cache)
+
+    if args.instrument:
+        print_summary(args.instrument, since = start)
\ No newline at end of file
@@ -0,0 +1,102 @@
+# Recovery Score Calculations: render_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: controls how the graph_helper plots are produced.
+#   'show': interactive windows (plt.show), as in main.py
+#   'save': headless, the Agg backend writes PNG/SVG files into a per-case directory. Plots are rendered on a
+#           background thread so the score is computed while matplotlib draws
+#   'off' : no plots at all
+# matplotlib is only imported when plots are shown or saved (startup of runs without plots)
+
+import os
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+PLOT_MODES: list[str] = ['show', 'save', 'off']
+
+def use_headless_backend() -> None:
+    '''Selects the non-interactive Agg backend (no display needed, safe outside the main thread) and loads pyplot,
+        e.g. once per worker process of a batch run that saves plots instead of on its first plot
+    '''
+    import matplotlib
+
+    matplotlib.use('Agg')
+    import matplotlib.pyplot
+
+class PlotRenderer:
+    '''Runs graph_helper plot functions according to the plot mode
+
+    Usage:
+        with PlotRenderer('save', os.path.join('plots', case_number)) as renderer:
+            renderer.submit(plot_acceleration_data, df_filtered, df_moving_avg, df_kalman)
+            ... keep computing, the plot is saved in the background ...
+    '''
+
+    def __init__(self, mode: str = 'show', output_dir: str | None = None, plot_format: str = 'png') -> None:
+        '''
+        Args:
+            mode (str): 'show', 'save' or 'off'
+            output_dir (str | None): directory for the plot files ('save' mode)
+            plot_format (str): file format of the plot files (png, svg, ...)
+        '''
+        if mode not in PLOT_MODES:
+            raise ValueError(f'Unknown plot mode "{mode}" (use one of {PLOT_MODES})')
+
+        if mode == 'save' and output_dir is None:
+            raise ValueError('An output directory is needed to save plots')
+
+        self.mode: str = mode
+        self.output_dir: str | None = output_dir
+        self.plot_format: str = plot_format
+        self.futures: list[Future] = []
+        self.executor: ThreadPoolExecutor | None = None
+
+        if mode == 'save':
+            use_headless_backend()
+            # A single thread, pyplot keeps global state and is not safe to use from several threads
+            self.executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = 'plot')
+
+    @property
+    def enabled(self) -> bool:
+        '''True unless plots are turned off (lets callers skip data only needed for plots)'''
+        return self.mode != 'off'
+
+    def submit(self, plot_function, *args) -> None:
+        '''Shows, saves in the background or skips a plot
+
+        Args:
+            plot_function: graph_helper function accepting output_dir and plot_format keyword arguments
+            *args: arguments for the plot function
+        '''
+        if self.mode == 'off':
+            return
+
+        if self.mode == 'show':
+            plot_function(*args)
+            return
+
+        self.futures.append(self.executor.submit(plot_function, *args, output_dir = self.output_dir, plot_format = self.plot_format))
+
+    def close(self) -> None:
+        '''Waits for the plots still being rendered and reports the ones that failed'''
+        for future in self.futures:
+            try:
+                future.result()
+
+            except Exception as e:
+                print('An error occurred while saving a plot:', str(e))
+
+        self.futures = []
+
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+        if self.mode == 'save':
+            print(f'Plots saved in {os.path.abspath(self.output_dir)}')
+
+    def __enter__(self) -> 'PlotRenderer':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,141 @@
+# Recovery Score Calculations: results_index_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: records which cases have already been scored, keyed on the case number, the SHA-256 of the case file
+# and a hash of every parameter in config.py, the results store and the pipeline used (see get_run_parameters),
+# so switching the store or the pipeline scores the cases again. Batch runs and main.py skip a case when the same file has already
+# been scored with the same parameters, so re-scoring the whole archive only does work for new or changed
+# files and for all the files after a parameter change. The SHA-256 of each file is kept with its size and
+# modification time, so unchanged files are recognized without reading them again.
+# The index is a small SQLite database (results_index.db); deleting it makes the next run score everything.
+
+import hashlib
+import json
+import os
+import sqlite3
+
+import config
+from cache_helper import get_content_hash
+
+def get_config_parameters(**overrides) -> dict:
+    '''Every parameter of config.py (module level numbers, strings and None), with optional overrides
+
+    Args:
+        **overrides: parameter values replacing the ones of config.py
+
+    Returns:
+        dict: parameters keyed by name
+    '''
+    parameters: dict = {name: value for name, value in vars(config).items() if not name.startswith('_') and isinstance(value, (int, float, str, bool, type(None)))}
+    parameters.update(overrides)
+
+    return parameters
+
+def get_run_parameters(store_path: str, pipeline: str, **overrides) -> dict:
+    '''Parameters that identify how a case was scored: every parameter of config.py (including signal_dtype, see
+        get_config_parameters), the results store the entries are written to and the pipeline
+
+    Args:
+        store_path (str): results store (csv file or SQLite database)
+        pipeline (str): 'dataframe', 'fused' or 'streaming'
+        **overrides: parameter values replacing the ones of config.py
+
+    Returns:
+        dict: parameters keyed by name
+    '''
+    return get_config_parameters(store_path = os.path.abspath(store_path), pipeline = pipeline, **overrides)
+
+def get_parameters_hash(parameters: dict) -> str:
+    '''Hash of a parameter set (independent of the order of the parameters)
+
+    Args:
+        parameters (dict): parameters keyed by name
+
+    Returns:
+        str: hexadecimal SHA-256
+    '''
+    return hashlib.sha256(json.dumps(parameters, sort_keys = True).encode('utf-8')).hexdigest()
+
+class ResultsIndex:
+    '''Index of the (case, file content, parameters) combinations already scored'''
+
+    def __init__(self, file_path: str = 'results_index.db', timeout: float = 30.0) -> None:
+        '''
+        Args:
+            file_path (str): SQLite database file (created if needed)
+            timeout (float): seconds to wait while another process is writing
+        '''
+        self.connection = sqlite3.connect(file_path, timeout = timeout)
+
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha256 TEXT)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS scored (Case_Number TEXT, sha256 TEXT, parameters_hash TEXT, Date TEXT, PRIMARY KEY (Case_Number, sha256, parameters_hash))')
+
+    def get_file_hash(self, file_path: str) -> str:
+        '''SHA-256 of a case file. Taken from the index when the size and modification time have not changed,
+            otherwise from the binary cache or by reading the file (and saved in the index)
+
+        Args:
+            file_path (str): path to the case CSV file
+
+        Returns:
+            str: hexadecimal digest
+        '''
+        path: str = os.path.abspath(file_path)
+        stat = os.stat(path)
+        row = self.connection.execute('SELECT size, mtime_ns, sha256 FROM files WHERE path = ?', (path,)).fetchone()
+
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        sha256: str = get_content_hash(path)
+
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)', (path, stat.st_size, stat.st_mtime_ns, sha256))
+
+        return sha256
+
+    def get_key(self, case_number: str, file_path: str, parameters_hash: str) -> tuple:
+        '''Key of a case in the index
+
+        Args:
+            case_number (str): case number written in the results
+            file_path (str): path to the case CSV file
+            parameters_hash (str): see get_parameters_hash
+
+        Returns:
+            tuple: case number, SHA-256 of the file and parameters hash
+        '''
+        return (case_number, self.get_file_hash(file_path), parameters_hash)
+
+    def get_scored_date(self, key: tuple) -> str | None:
+        '''Date of the results of a case with this file content and these parameters
+
+        Args:
+            key (tuple): see get_key
+
+        Returns:
+            str | None: date of the results, None if the case has not been scored this way yet
+        '''
+        row = self.connection.execute('SELECT Date FROM scored WHERE Case_Number = ? AND sha256 = ? AND parameters_hash = ?', key).fetchone()
+
+        return None if row is None else row[0]
+
+    def mark_scored(self, keys: list[tuple], dates: list[str]) -> None:
+        '''Records cases whose results have been saved
+
+        Args:
+            keys (list[tuple]): see get_key
+            dates (list[str]): date of the results of each case
+        '''
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO scored VALUES (?, ?, ?, ?)', [(*key, date) for key, date in zip(keys, dates)])
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,258 @@
+# Recovery Score Calculations: results_store_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: persistent stores for the scoring results (one entry per case, as created by CSV.make_entry).
+# SQLiteStore keeps the whole history in one SQLite database indexed by Case_Number and Date, so looking up
+# the latest score of a case does not read the history, and entries are inserted in batches (one transaction
+# per batch). SQLite locks the database itself, so several processes can write to it at the same time.
+# CSVStore keeps the RS_output.csv layout; it buffers entries and appends each batch under a file lock.
+# Both have the same methods (add, add_entries, flush, close) and can be used with 'with'.
+# Usage: python results_store_helper.py latest <case> [--db results.db]
+#        python results_store_helper.py export RS_output.csv [--db results.db] [--case <case>]
+#        python results_store_helper.py import RS_output.csv [--db results.db]
+
+import argparse
+import csv
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from CSV_helper import CSV
+
+# SQLite types of the CSV.COLUMNS
+COLUMN_TYPES: dict = {
+    'Date': 'TEXT',
+    'Case_Number': 'TEXT',
+    'Number_failed_attempts': 'INTEGER',
+}
+
+class CSVStore:
+    '''Buffered results store with the RS_output.csv layout'''
+
+    def __init__(self, file_path: str = CSV.CSV_FILE, batch_size: int = 100) -> None:
+        '''
+        Args:
+            file_path (str): CSV file
+            batch_size (int): number of entries kept in memory before they are written
+        '''
+        self.file_path: str = file_path
+        self.batch_size: int = batch_size
+        self.buffer: list[dict] = []
+
+    def add(self, entry: dict) -> None:
+        '''Adds an entry; it is written once batch_size entries are buffered (or on flush/close)
+
+        Args:
+            entry (dict): entry created with CSV.make_entry
+        '''
+        self.buffer.append(entry)
+
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def add_entries(self, entries: list[dict]) -> None:
+        '''Adds several entries
+
+        Args:
+            entries (list[dict]): entries created with CSV.make_entry
+        '''
+        for entry in entries:
+            self.add(entry)
+
+    def flush(self) -> None:
+        '''Writes the buffered entries'''
+        if self.buffer:
+            CSV.write_entries(self.buffer, self.file_path)
+            self.buffer = []
+
+    def close(self) -> None:
+        '''Writes the buffered entries'''
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+class SQLiteStore(CSVStore):
+    '''Buffered results store in an SQLite database indexed by Case_Number and Date'''
+
+    def __init__(self, file_path: str = 'results.db', batch_size: int = 100, timeout: float = 30.0) -> None:
+        '''
+        Args:
+            file_path (str): SQLite database file (created if needed)
+            batch_size (int): number of entries kept in memory before they are inserted
+            timeout (float): seconds to wait while another process is writing
+        '''
+        super().__init__(file_path, batch_size)
+
+        self.connection = sqlite3.connect(file_path, timeout = timeout)
+        self.connection.row_factory = sqlite3.Row
+
+        columns: str = ', '.join(f'{column} {COLUMN_TYPES.get(column, "REAL")}' for column in CSV.COLUMNS)
+
+        with self.connection:
+            # Write-ahead log: readers are not blocked while another process writes
+            self.connection.execute('PRAGMA journal_mode = WAL')
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY, {columns})')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS results_case_date ON results (Case_Number, Date)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS results_date ON results (Date)')
+
+    def flush(self) -> None:
+        '''Inserts the buffered entries in one transaction'''
+        if not self.buffer:
+            return
+
+        placeholders: str = ', '.join('?' for _ in CSV.COLUMNS)
+        rows: list[tuple] = [tuple(to_sql_value(entry.get(column)) for column in CSV.COLUMNS) for entry in self.buffer]
+
+        with self.connection:
+            self.connection.executemany(f'INSERT INTO results ({", ".join(CSV.COLUMNS)}) VALUES ({placeholders})', rows)
+
+        self.buffer = []
+
+    def close(self) -> None:
+        '''Inserts the buffered entries and closes the database'''
+        self.flush()
+        self.connection.close()
+
+    def get_latest(self, case_number: str) -> dict | None:
+        '''Latest entry of a case (uses the (Case_Number, Date) index)
+
+        Args:
+            case_number (str): case number
+
+        Returns:
+            dict | None: entry with the CSV.COLUMNS, None if the case has never been scored
+        '''
+        self.flush()
+        row = self.connection.execute(f'SELECT {", ".join(CSV.COLUMNS)} FROM results WHERE Case_Number = ? ORDER BY Date DESC, id DESC LIMIT 1', (str(case_number),)).fetchone()
+
+        return None if row is None else dict(row)
+
+    def get_history(self, case_number: str) -> list[dict]:
+        '''Every entry of a case, oldest first
+
+        Args:
+            case_number (str): case number
+
+        Returns:
+            list[dict]: entries with the CSV.COLUMNS
+        '''
+        self.flush()
+        rows: list = self.connection.execute(f'SELECT {", ".join(CSV.COLUMNS)} FROM results WHERE Case_Number = ? ORDER BY Date, id', (str(case_number),)).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def export_csv(self, file_path: str, case_number: str | None = None) -> int:
+        '''Writes the entries (all of them or those of one case) with the RS_output.csv layout.
+            Rows are streamed from the database, the history is not loaded in memory
+
+        Args:
+            file_path (str): CSV file (overwritten)
+            case_number (str | None): only export this case
+
+        Returns:
+            int: number of entries written
+        '''
+        self.flush()
+        query: str = f'SELECT {", ".join(CSV.COLUMNS)} FROM results'
+        parameters: tuple = ()
+
+        if case_number is not None:
+            query += ' WHERE Case_Number = ?'
+            parameters = (str(case_number),)
+
+        n_rows: int = 0
+
+        with open(file_path, 'w', newline = '') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(CSV.COLUMNS)
+
+            for row in self.connection.execute(query + ' ORDER BY id', parameters):
+                writer.writerow(row)
+                n_rows += 1
+
+        return n_rows
+
+    def import_csv(self, file_path: str, chunksize: int = 10_000) -> int:
+        '''Adds the entries of an existing RS_output.csv file, reading it in chunks
+
+        Args:
+            file_path (str): CSV file with the CSV.COLUMNS
+            chunksize (int): number of rows read at a time
+
+        Returns:
+            int: number of entries added
+        '''
+        n_rows: int = 0
+
+        for chunk in pd.read_csv(file_path, chunksize = chunksize, dtype = {'Date': str, 'Case_Number': str}, float_precision = 'round_trip'):
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            self.add_entries(chunk.to_dict('records'))
+            n_rows += len(chunk)
+
+        self.flush()
+
+        return n_rows
+
+def to_sql_value(value):
+    '''Converts numpy scalars and NaN to values SQLite accepts
+
+    Args:
+        value: value of an entry
+
+    Returns:
+        int, float, str or None
+    '''
+    if isinstance(value, np.generic):
+        value = value.item()
+
+    if isinstance(value, float) and np.isnan(value):
+        return None
+
+    return value
+
+def get_store(file_path: str, batch_size: int = 100) -> CSVStore:
+    '''Opens the results store matching the file extension (.db, .sqlite or .sqlite3: SQLite, otherwise CSV)
+
+    Args:
+        file_path (str): store file
+        batch_size (int): number of entries kept in memory before they are written
+
+    Returns:
+        CSVStore: SQLiteStore or CSVStore
+    '''
+    if file_path.lower().endswith(('.db', '.sqlite', '.sqlite3')):
+        return SQLiteStore(file_path, batch_size)
+
+    return CSVStore(file_path, batch_size)
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = 'Queries, exports and imports the results database')
+    parser.add_argument('command', choices = ['latest', 'export', 'import'], help = 'latest score of a case, export to csv or import a csv')
+    parser.add_argument('target', help = 'case number (latest) or csv file (export, import)')
+    parser.add_argument('--db', default = 'results.db', help = 'SQLite results database')
+    parser.add_argument('--case', default = None, help = 'only export this case')
+    args = parser.parse_args()
+
+    with SQLiteStore(args.db) as store:
+        if args.command == 'latest':
+            entry: dict | None = store.get_latest(args.target)
+            if entry is None:
+                print(f'No results for case {args.target}')
+            else:
+                for column, value in entry.items():
+                    print(f'{column}: {value}')
+
+        elif args.command == 'export':
+            print(f'{store.export_csv(args.target, args.case)} entries exported to {args.target}')
+
+        else:
+            print(f'{store.import_csv(args.target)} entries imported from {args.target}')
+
+if __name__ == "__main__":
+
+    main()
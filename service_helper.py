@@ -0,0 +1,302 @@
+# Recovery Score Calculations: service_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: long-running scoring service for the lab server. New recordings are picked up from an inbox directory
+# (or uploaded to a local HTTP endpoint, which saves them in the inbox), put on a bounded asyncio queue and
+# scored by a pool of worker processes running batch_helper.process_case. When the queue is full the inbox
+# scan waits and uploads are refused with 503, so a clinic uploading a day of recordings cannot exhaust memory.
+# An upload with the name of a recording that is queued or being scored is refused with 409 (never replaced).
+# A single writer task saves the results in the results store (SQLite database by default, see results_store_helper),
+# in batches of the results that are ready, so no two processes write the results at once.
+# Scored files are moved to <inbox>/processed, files that could not be scored to <inbox>/failed.
+# Usage: python service_helper.py --inbox inbox [--store results.db] [--workers N] [--queue-size 16] [--port 8765]
+#   upload: curl -X PUT --data-binary @36.csv http://127.0.0.1:8765/upload/36.csv
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_helper import get_pool_context, process_case
+from cache_helper import get_cache_dir
+from results_store_helper import get_store
+
+class ScoringService:
+    '''Watches an inbox directory and scores new recordings with a bounded queue and a process pool'''
+
+    def __init__(self, inbox: str, store_path: str = 'results.db', max_workers: int | None = None, queue_size: int = 16, poll_interval: float = 2.0, host: str = '127.0.0.1', port: int = 8765) -> None:
+        '''
+        Args:
+            inbox (str): directory watched for new case CSV files
+            store_path (str): results store: SQLite database (.db) or csv file
+            max_workers (int | None): number of worker processes. Defaults to the number of CPUs
+            queue_size (int): maximum number of recordings waiting to be scored
+            poll_interval (float): seconds between two scans of the inbox
+            host (str): address of the upload endpoint
+            port (int): port of the upload endpoint (0 to disable it)
+        '''
+        self.inbox: str = inbox
+        self.processed_dir: str = os.path.join(inbox, 'processed')
+        self.failed_dir: str = os.path.join(inbox, 'failed')
+        self.store_path: str = store_path
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.poll_interval: float = poll_interval
+        self.host: str = host
+        self.port: int = port
+
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize = queue_size)
+        self.results: asyncio.Queue = asyncio.Queue()
+        self.queued: set[str] = set() # queued or being scored
+        self.uploading: set[str] = set()
+        self.sizes: dict = {}
+        self.counts: dict = {'scored': 0, 'failed': 0}
+        self.executor: ProcessPoolExecutor | None = None
+
+        for directory in (inbox, self.processed_dir, self.failed_dir):
+            os.makedirs(directory, exist_ok = True)
+
+    async def run(self) -> None:
+        '''Runs the service until it is cancelled (Ctrl+C)'''
+        self.executor = ProcessPoolExecutor(max_workers = self.max_workers, mp_context = get_pool_context())
+        tasks: list[asyncio.Task] = [asyncio.create_task(self.watch_inbox()), asyncio.create_task(self.write_results())]
+        tasks += [asyncio.create_task(self.score_recordings()) for _ in range(self.max_workers)]
+
+        server: asyncio.Server | None = None
+        if self.port:
+            server = await asyncio.start_server(self.handle_request, self.host, self.port)
+            print(f'Upload endpoint listening on http://{self.host}:{self.port}/upload/<case>.csv')
+
+        print(f'Watching {os.path.abspath(self.inbox)} with {self.max_workers} workers, results in {self.store_path}')
+
+        try:
+            await asyncio.gather(*tasks)
+
+        finally:
+            if server is not None:
+                server.close()
+            for task in tasks:
+                task.cancel()
+            self.executor.shutdown(cancel_futures = True)
+
+    def find_new_files(self) -> list[str]:
+        '''Lists the CSV files of the inbox that are complete (same size as in the previous scan) and not queued yet
+
+        Returns:
+            list[str]: paths to the new case files, oldest first
+        '''
+        new_files: list[tuple] = []
+        sizes: dict = {}
+
+        with os.scandir(self.inbox) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.lower().endswith('.csv') or entry.path in self.queued:
+                    continue
+
+                stat = entry.stat()
+                sizes[entry.path] = stat.st_size
+
+                # Files still being copied keep growing; wait until the size is stable
+                if self.sizes.get(entry.path) == stat.st_size:
+                    new_files.append((stat.st_mtime_ns, entry.path))
+
+        self.sizes = sizes
+
+        return [path for _, path in sorted(new_files)]
+
+    async def watch_inbox(self) -> None:
+        '''Puts new recordings on the queue. Waits while the queue is full (backpressure)'''
+        while True:
+            for file_path in self.find_new_files():
+                self.queued.add(file_path)
+                await self.queue.put(file_path)
+                print(f'{file_path} queued ({self.queue.qsize()} waiting)')
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def score_recordings(self) -> None:
+        '''Takes recordings from the queue and scores them in the process pool'''
+        loop = asyncio.get_running_loop()
+
+        while True:
+            file_path: str = await self.queue.get()
+
+            try:
+                entry: dict = await loop.run_in_executor(self.executor, process_case, file_path)
+                self.move_recording(file_path, self.processed_dir)
+                await self.results.put(entry)
+
+            except Exception as e:
+                print(f'An error occurred while scoring {file_path}:', str(e))
+                self.move_recording(file_path, self.failed_dir)
+                self.counts['failed'] += 1
+
+            finally:
+                self.queued.discard(file_path)
+                self.queue.task_done()
+
+    def move_recording(self, file_path: str, directory: str) -> None:
+        '''Moves a recording (and its binary cache) out of the inbox
+
+        Args:
+            file_path (str): path to the case CSV file
+            directory (str): destination directory
+        '''
+        for path in (file_path, get_cache_dir(file_path)):
+            if not os.path.exists(path):
+                continue
+
+            destination: str = os.path.join(directory, os.path.basename(path))
+            if os.path.isdir(destination):
+                shutil.rmtree(destination)
+
+            shutil.move(path, destination)
+
+    async def write_results(self) -> None:
+        '''Single writer: saves the results in the store. Results that arrive together are written in one batch'''
+        with get_store(self.store_path) as store:
+            while True:
+                store.add(await self.results.get())
+                self.counts['scored'] += 1
+
+                while not self.results.empty():
+                    store.add(self.results.get_nowait())
+                    self.counts['scored'] += 1
+
+                store.flush()
+                print(f'{self.counts["scored"]} scored, {self.counts["failed"]} failed, {self.queue.qsize()} waiting')
+
+    async def handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        '''Minimal HTTP endpoint:
+            PUT or POST /upload/<case>.csv with the CSV file as body -> saved in the inbox (503 if the queue is full)
+            GET /status -> queue length and number of recordings scored
+
+        Args:
+            reader (asyncio.StreamReader): request stream
+            writer (asyncio.StreamWriter): response stream
+        '''
+        try:
+            request_line: str = (await reader.readline()).decode('latin-1').strip()
+            method, path, _ = request_line.split(' ', 2)
+
+            headers: dict = {}
+            while (line := (await reader.readline()).decode('latin-1').strip()):
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            if method == 'GET' and path == '/status':
+                status: dict = {'waiting': self.queue.qsize(), 'queue_size': self.queue.maxsize, **self.counts}
+                await self.send_response(writer, 200, json.dumps(status))
+
+            elif method in ('PUT', 'POST') and path.startswith('/upload/'):
+                await self.save_upload(reader, writer, os.path.basename(path[len('/upload/'):]), int(headers.get('content-length', 0)))
+
+            else:
+                await self.send_response(writer, 404, 'Not found')
+
+        except (ValueError, ConnectionError) as e:
+            await self.send_response(writer, 400, f'Bad request: {e}')
+
+        finally:
+            writer.close()
+
+    async def save_upload(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, file_name: str, length: int) -> None:
+        '''Saves an uploaded recording in the inbox, through a temporary file so the inbox scan never sees a partial file.
+            A file that is queued, being scored or being uploaded is never replaced (409), and the temporary file of
+            an interrupted upload is removed
+
+        Args:
+            reader (asyncio.StreamReader): request stream, positioned at the body
+            writer (asyncio.StreamWriter): response stream
+            file_name (str): name of the case file
+            length (int): size of the body in bytes
+        '''
+        if not file_name.lower().endswith('.csv'):
+            await self.send_response(writer, 400, 'Only .csv files are accepted')
+            return
+
+        if self.queue.full():
+            await self.send_response(writer, 503, 'Queue is full, try again later', {'Retry-After': str(int(self.poll_interval * 5))})
+            return
+
+        file_path: str = os.path.join(self.inbox, file_name)
+        temporary_path: str = file_path + '.part'
+
+        if file_path in self.queued or file_path in self.uploading:
+            await self.send_response(writer, 409, f'{file_name} is already queued or being scored, try again later')
+            return
+
+        self.uploading.add(file_path)
+
+        try:
+            with open(temporary_path, 'wb') as file:
+                remaining: int = length
+                while remaining > 0:
+                    block: bytes = await reader.read(min(remaining, 1 << 20))
+                    if not block:
+                        raise ConnectionError('upload interrupted')
+                    file.write(block)
+                    remaining -= len(block)
+
+            # The file may have been queued by the inbox scan while it was uploaded
+            if file_path in self.queued:
+                os.remove(temporary_path)
+                await self.send_response(writer, 409, f'{file_name} is already queued or being scored, try again later')
+                return
+
+            os.replace(temporary_path, file_path)
+
+        except BaseException:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            raise
+
+        finally:
+            self.uploading.discard(file_path)
+
+        await self.send_response(writer, 202, f'{file_name} accepted')
+
+    async def send_response(self, writer: asyncio.StreamWriter, status: int, body: str, headers: dict | None = None) -> None:
+        '''Sends an HTTP response
+
+        Args:
+            writer (asyncio.StreamWriter): response stream
+            status (int): HTTP status code
+            body (str): response body
+            headers (dict | None): extra headers
+        '''
+        reasons: dict = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 409: 'Conflict', 503: 'Service Unavailable'}
+        data: bytes = (body + '\n').encode('utf-8')
+        lines: list[str] = [f'HTTP/1.1 {status} {reasons.get(status, "")}', f'Content-Length: {len(data)}', 'Connection: close']
+        lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + data)
+        await writer.drain()
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = 'Scores recordings dropped in an inbox directory or uploaded over HTTP')
+    parser.add_argument('--inbox', default = 'inbox', help = 'directory watched for new case CSV files')
+    parser.add_argument('--store', default = 'results.db', help = 'results store: SQLite database (.db) or csv file')
+    parser.add_argument('--workers', type = int, default = None, help = 'number of worker processes (default: number of CPUs)')
+    parser.add_argument('--queue-size', type = int, default = 16, help = 'maximum number of recordings waiting to be scored')
+    parser.add_argument('--poll-interval', type = float, default = 2.0, help = 'seconds between two scans of the inbox')
+    parser.add_argument('--host', default = '127.0.0.1', help = 'address of the upload endpoint')
+    parser.add_argument('--port', type = int, default = 8765, help = 'port of the upload endpoint (0 to disable it)')
+    args = parser.parse_args()
+
+    service = ScoringService(args.inbox, args.store, args.workers, args.queue_size, args.poll_interval, args.host, args.port)
+
+    try:
+        asyncio.run(service.run())
+
+    except KeyboardInterrupt:
+        print('Service stopped')
+
+if __name__ == "__main__":
+
+    main()
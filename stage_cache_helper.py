@@ -0,0 +1,334 @@
+# Recovery Score Calculations: stage_cache_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: content-addressed cache for the stages of the SD pipeline. The output of a stage is stored on disk
+# (one .npy file per array, loaded memory-mapped) under a key made of the stage name, its parameters and the
+# key of its input. The first input is the SHA-256 of the case CSV file, and each stage passes its own key on
+# to the next one, so a key identifies the data and every parameter used upstream.
+# Changing a downstream parameter (threshold, window_size, ...) only recomputes the stages that use it;
+# changing the file or an upstream parameter (target_value, target_moving_avg) gives new keys for every stage below.
+# Entries are evicted least recently used first when the cache grows over its maximum size (the total size is
+# counted once, then kept up to date on every write; the directory is only scanned again to evict).
+# Usage: python stage_cache_helper.py <directory or glob> [--cache-dir DIR] [--max-size-mb MB] [--threshold X]
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+from numpy.typing import NDArray
+
+import config
+from acceleration_helper import get_max_accelerations, get_sa_2axes_array, get_sumua_array
+from attempt_detection_helper import calculate_window_sd, detect_roi_sd, get_attempts, set_jerk_threshold
+from batch_helper import find_case_files
+from cache_helper import get_content_hash, save_array
+from CSV_helper import CSV, get_date, rename
+from derivative_helper import calculate_derivatives
+from file_helper import add_csv_extension, read_csv_file, initial_filter, apply_moving_average
+from output_results_helper import get_recovery_score
+from region_helper import get_roi_bounds_sd
+
+META_FILE: str = 'meta.json'
+
+class StageCache:
+    '''On-disk cache of pipeline stage outputs with LRU eviction and hit/miss statistics per stage
+
+    Usage:
+        cache = StageCache('stage_cache')
+        key, outputs = cache.run('derivatives', input_key, {}, compute_derivatives)
+        cache.report()
+    '''
+
+    def __init__(self, cache_dir: str = 'stage_cache', max_size_mb: float = 2048.0) -> None:
+        '''
+        Args:
+            cache_dir (str): directory of the cache (one subdirectory per entry)
+            max_size_mb (float): maximum total size of the cached arrays in MB
+        '''
+        self.cache_dir: str = cache_dir
+        self.max_bytes: int = int(max_size_mb * 1024 * 1024)
+        self.stats: dict = {}
+        self.total_bytes: int | None = None # total size of the entries, counted at the first write
+
+        os.makedirs(cache_dir, exist_ok = True)
+
+    def make_key(self, stage: str, input_key: str, parameters: dict) -> str:
+        '''Creates the key of a stage output
+
+        Args:
+            stage (str): stage name
+            input_key (str): content hash of the input file, or key of the upstream stage
+            parameters (dict): parameters of the stage
+
+        Returns:
+            str: hexadecimal SHA-256 of the stage, input key and parameters
+        '''
+        description: str = json.dumps({'stage': stage, 'input': input_key, 'parameters': parameters}, sort_keys = True)
+
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        '''Loads a cached stage output (memory-mapped) and marks it as recently used
+
+        Args:
+            key (str): key of the entry
+
+        Returns:
+            dict | None: read-only arrays keyed by name, or None if the entry is not cached
+        '''
+        entry_dir: str = os.path.join(self.cache_dir, key)
+        meta_path: str = os.path.join(entry_dir, META_FILE)
+
+        try:
+            with open(meta_path) as file:
+                meta: dict = json.load(file)
+
+            arrays: dict = {name: np.load(os.path.join(entry_dir, name + '.npy'), mmap_mode = 'r') for name in meta['arrays']}
+
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # The modification time of meta.json is the last use of the entry (LRU order)
+        os.utime(meta_path)
+
+        return arrays
+
+    def put(self, key: str, stage: str, arrays: dict) -> None:
+        '''Saves a stage output. The arrays are written first and meta.json last,
+            so an interrupted write is never seen as a cached entry
+
+        Args:
+            key (str): key of the entry
+            stage (str): stage name
+            arrays (dict): output arrays keyed by name
+        '''
+        entry_dir: str = os.path.join(self.cache_dir, key)
+
+        try:
+            os.makedirs(entry_dir, exist_ok = True)
+
+            for name, values in arrays.items():
+                save_array(os.path.join(entry_dir, name + '.npy'), np.asarray(values))
+
+            size: int = int(sum(np.asarray(values).nbytes for values in arrays.values()))
+            meta: dict = {
+                'stage': stage,
+                'arrays': list(arrays),
+                'size': size,
+            }
+            temporary_path: str = os.path.join(entry_dir, META_FILE + '.tmp')
+            with open(temporary_path, 'w') as file:
+                json.dump(meta, file)
+            os.replace(temporary_path, os.path.join(entry_dir, META_FILE))
+
+        except OSError as e:
+            print('Could not write the stage cache:', str(e))
+            return
+
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for _, size, _ in self.get_entries())
+        else:
+            self.total_bytes += size
+
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def run(self, stage: str, input_key: str, parameters: dict, compute) -> tuple:
+        '''Returns the output of a stage from the cache, or computes and caches it
+
+        Args:
+            stage (str): stage name
+            input_key (str): content hash of the input file, or key of the upstream stage
+            parameters (dict): parameters of the stage (JSON serializable)
+            compute: function without arguments returning the output arrays of the stage as a dict
+
+        Returns:
+            tuple: key of the output (input key for the next stages) and dict of output arrays
+        '''
+        key: str = self.make_key(stage, input_key, parameters)
+        stats: dict = self.stats.setdefault(stage, {'hits': 0, 'misses': 0, 'hit_s': 0.0, 'miss_s': 0.0})
+        start: float = time.perf_counter()
+
+        arrays: dict | None = self.get(key)
+
+        if arrays is not None:
+            stats['hits'] += 1
+            stats['hit_s'] += time.perf_counter() - start
+            return key, arrays
+
+        arrays = compute()
+        self.put(key, stage, arrays)
+
+        stats['misses'] += 1
+        stats['miss_s'] += time.perf_counter() - start
+
+        return key, arrays
+
+    def get_entries(self) -> list[tuple]:
+        '''Lists the cached entries
+
+        Returns:
+            list[tuple]: (last use, size in bytes, entry directory) of every entry, least recently used first
+        '''
+        entries: list[tuple] = []
+
+        for key in os.listdir(self.cache_dir):
+            meta_path: str = os.path.join(self.cache_dir, key, META_FILE)
+
+            try:
+                with open(meta_path) as file:
+                    size: int = json.load(file)['size']
+                entries.append((os.stat(meta_path).st_mtime_ns, size, os.path.join(self.cache_dir, key)))
+
+            except (OSError, ValueError, KeyError):
+                continue
+
+        return sorted(entries)
+
+    def evict(self) -> None:
+        '''Removes the least recently used entries until the cache is under its maximum size.
+            The entries are listed again, so the total size also accounts for other processes using the cache'''
+        entries: list[tuple] = self.get_entries()
+        total_size: int = sum(size for _, size, _ in entries)
+
+        for _, size, entry_dir in entries:
+            if total_size <= self.max_bytes:
+                break
+
+            shutil.rmtree(entry_dir, ignore_errors = True)
+            total_size -= size
+
+        self.total_bytes = total_size
+
+    def report(self) -> pd.DataFrame:
+        '''Prints the cache hits, misses and time spent per stage
+
+        Returns:
+            pd.DataFrame: one row per stage
+        '''
+        report = pd.DataFrame.from_dict(self.stats, orient = 'index')
+        report.index.name = 'stage'
+
+        print(report.to_string())
+
+        return report
+
+def get_parameters(**overrides) -> dict:
+    '''Pipeline parameters from config.py, with optional overrides
+
+    Args:
+        **overrides: parameter values replacing the ones of config.py (None values are ignored)
+
+    Returns:
+        dict: parameters used by score_case_cached
+    '''
+    names: list[str] = ['target_value', 'target_moving_avg', 'factor', 'percentile', 'window_size', 'step_size', 'threshold', 'jerk_threshold', 'timestamp_format', 'timestamp_mode', 'sample_period_ms']
+
+    return {name: overrides[name] if overrides.get(name) is not None else getattr(config, name) for name in names}
+
+def score_case_cached(file_path: str, cache: StageCache, parameters: dict | None = None) -> dict:
+    '''Scores one case like batch_helper.process_case, taking every stage it can from the stage cache
+
+    Args:
+        file_path (str): path to the case CSV file
+        cache (StageCache): stage cache
+        parameters (dict | None): pipeline parameters (see get_parameters), config.py values if None
+
+    Returns:
+        dict: entry for RS_output.csv (see CSV.make_entry)
+    '''
+    if parameters is None:
+        parameters = get_parameters()
+
+    file_path_csv: str = add_csv_extension(rename(file_path))
+
+    def compute_filtered() -> dict:
+        df: pd.DataFrame = read_csv_file(rename(file_path), timestamp_format = parameters['timestamp_format'], timestamp_mode = parameters['timestamp_mode'], sample_period_ms = parameters['sample_period_ms'])
+
+        if df.empty:
+            raise ValueError(f'Failed to load DataFrame from {file_path}')
+
+        df_filtered: pd.DataFrame = initial_filter(df, parameters['target_value'])
+
+        return {
+            'timeStamp': df_filtered['timeStamp'].to_numpy(dtype = 'datetime64[ns]').view(np.int64),
+            'acc': df_filtered[['Acc_X', 'Acc_Y', 'Acc_Z']].to_numpy(dtype = np.float64),
+        }
+
+    filtered_key, filtered = cache.run('initial_filter', get_content_hash(file_path_csv), {'target_value': parameters['target_value'], 'timestamp_format': parameters['timestamp_format'], 'timestamp_mode': parameters['timestamp_mode'], 'sample_period_ms': parameters['sample_period_ms']}, compute_filtered)
+
+    def compute_moving_average() -> dict:
+        df_filtered = pd.DataFrame(filtered['acc'], columns = ['Acc_X', 'Acc_Y', 'Acc_Z'])
+
+        return {'Acc_Z': apply_moving_average(df_filtered, parameters['target_moving_avg'])['Acc_Z'].to_numpy()}
+
+    moving_avg_key, moving_avg = cache.run('moving_average', filtered_key, {'target_moving_avg': parameters['target_moving_avg']}, compute_moving_average)
+
+    def compute_derivatives() -> dict:
+        df_avg = pd.DataFrame({'timeStamp': np.asarray(filtered['timeStamp']).view('datetime64[ns]'), 'Acc_Z': moving_avg['Acc_Z']})
+        jerk, snap = calculate_derivatives(df_avg)
+
+        return {'jerk': jerk, 'snap': snap}
+
+    derivatives_key, derivatives = cache.run('derivatives', moving_avg_key, {}, compute_derivatives)
+    jerk: NDArray[np.float64] = derivatives['jerk']
+
+    _, jerk_stats = cache.run('jerk_threshold', derivatives_key, {'factor': parameters['factor'], 'percentile': parameters['percentile']},
+                              lambda: {'values': np.array(set_jerk_threshold(jerk, parameters['factor'], parameters['percentile']), dtype = np.float64)})
+    mean_jerk, std_jerk, jerk_threshold_cal = (float(value) for value in jerk_stats['values'])
+
+    _, window_sd = cache.run('window_sd', derivatives_key, {'window_size': parameters['window_size'], 'step_size': parameters['step_size']},
+                             lambda: {'sd': calculate_window_sd(jerk, parameters['window_size'], parameters['step_size'])})
+
+    # ROI detection and scoring are cheap, they always run
+    roi_sd: NDArray = detect_roi_sd(window_sd['sd'], parameters['threshold'])
+    number_failed_attempts: int = get_attempts(roi_sd)
+
+    roi_starts, roi_ends = get_roi_bounds_sd(roi_sd, parameters['window_size'], parameters['step_size'], len(filtered['acc']))
+    amax: NDArray[np.float64] = get_max_accelerations(filtered['acc'], roi_starts, roi_ends)
+
+    sa_2axes: float = get_sa_2axes_array(amax)
+    sumua: float = get_sumua_array(amax)
+    rs_2axes_py: float = get_recovery_score(number_failed_attempts, sa_2axes, sumua)
+
+    if number_failed_attempts < 1:
+        sumua = None
+
+    return CSV.make_entry(get_date(), rename(os.path.basename(file_path)), parameters['jerk_threshold'], mean_jerk, std_jerk, jerk_threshold_cal, parameters['threshold'], number_failed_attempts, sa_2axes, sumua, rs_2axes_py)
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = 'Scores a batch of recovery recordings using the stage cache')
+    parser.add_argument('source', help = 'directory with the case CSV files, or a glob pattern')
+    parser.add_argument('--cache-dir', default = 'stage_cache', help = 'directory of the stage cache')
+    parser.add_argument('--max-size-mb', type = float, default = 2048.0, help = 'maximum size of the stage cache in MB')
+    parser.add_argument('--threshold', type = float, default = None, help = 'SD threshold (default: config.threshold)')
+    parser.add_argument('--window-size', type = int, default = None, help = 'window size (default: config.window_size)')
+    parser.add_argument('--step-size', type = int, default = None, help = 'step size (default: config.step_size)')
+    args = parser.parse_args()
+
+    cache = StageCache(args.cache_dir, args.max_size_mb)
+    parameters: dict = get_parameters(threshold = args.threshold, window_size = args.window_size, step_size = args.step_size)
+
+    entries: list[dict] = []
+    for file_path in find_case_files(args.source):
+        try:
+            entries.append(score_case_cached(file_path, cache, parameters))
+            print(f'{file_path} scored successfully')
+
+        except Exception as e:
+            print(f'An error occurred while scoring {file_path}:', str(e))
+
+    if entries:
+        CSV.add_entries(entries)
+
+    cache.report()
+
+if __name__ == "__main__":
+
+    main()
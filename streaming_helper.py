@@ -0,0 +1,344 @@
+# Recovery Score Calculations: streaming_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: bounded-memory version of the SD pipeline for very long recordings.
+# The csv file is read in chunks (read_csv_chunks) and each stage keeps only the state it needs across chunk
+# boundaries, so peak memory is O(chunksize + window_size) plus one value per window instead of several full
+# copies of the recording:
+#   InitialFilterState   -> initial_filter (first Acc_Z > target_value)
+#   MovingAverageState   -> apply_moving_average (rolling mean, min_periods = 1), Acc_Z only
+#   DerivativeState      -> calculate_derivatives (jerk; snap is not used for scoring)
+#   WindowState          -> calculate_window_sd on jerk and the max absolute accelerations of each window
+#   JerkStatsState       -> set_jerk_threshold (mean, SD and percentile of jerk)
+
+import os
+import numpy as np
+import pandas as pd
+
+from numpy.lib.stride_tricks import sliding_window_view
+from numpy.typing import NDArray
+
+import config
+from acceleration_helper import get_sa_2axes_array, get_sumua_array
+from attempt_detection_helper import calculate_window_sd, detect_roi_sd, get_attempts
+from CSV_helper import CSV, get_date, rename
+from file_helper import read_csv_chunks
+from output_results_helper import get_recovery_score
+
+class InitialFilterState:
+    '''Streaming initial_filter: drops rows until the first Acc_Z value greater than target_value
+        (None keeps every row, even if Acc_Z is blank)'''
+
+    def __init__(self, target_value: float | None) -> None:
+        self.target_value: float | None = target_value
+        self.started: bool = False
+        self.start_index: int | None = None # row of the recording where the filtered data starts
+
+    def process(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        '''Filters one chunk
+
+        Args:
+            chunk (pd.DataFrame): next rows of the recording
+
+        Returns:
+            pd.DataFrame: rows of the chunk that belong to the filtered recording
+        '''
+        if self.started or chunk.empty:
+            return chunk
+
+        if self.target_value is None:
+            self.started = True
+            self.start_index = int(chunk.index[0])
+            return chunk
+
+        above: NDArray[np.bool_] = chunk['Acc_Z'].to_numpy() > self.target_value
+
+        if not above.any():
+            return chunk.iloc[0:0]
+
+        first: int = int(np.argmax(above))
+        self.started = True
+        self.start_index = int(chunk.index[first])
+
+        return chunk.iloc[first:]
+
+class MovingAverageState:
+    '''Streaming rolling mean (same as Series.rolling(window, min_periods = 1).mean())'''
+
+    def __init__(self, window: int) -> None:
+        self.window: int = window
+        self.tail: NDArray[np.float64] = np.empty(0, dtype = np.float64) # last window - 1 values
+
+    def process(self, values: NDArray[np.float64]) -> NDArray[np.float64]:
+        '''Applies the moving average to the next values
+
+        Args:
+            values (NDArray[np.float64]): next values of the signal
+
+        Returns:
+            NDArray[np.float64]: moving average of those values
+        '''
+        combined: NDArray[np.float64] = np.concatenate((self.tail, values))
+        means: NDArray[np.float64] = pd.Series(combined).rolling(window = self.window, min_periods = 1).mean().to_numpy()
+
+        self.tail = combined[len(combined) - (self.window - 1):] if self.window > 1 else combined[:0]
+
+        return means[len(combined) - len(values):]
+
+class DerivativeState:
+    '''Streaming first derivative (jerk), same as calculate_derivatives'''
+
+    def __init__(self) -> None:
+        self.last_acc: NDArray[np.float64] = np.empty(0, dtype = np.float64)
+        self.last_time: NDArray[np.float64] = np.empty(0, dtype = np.float64)
+
+    def process(self, acc: NDArray[np.float64], time_stamp: NDArray[np.float64]) -> NDArray[np.float64]:
+        '''Calculates jerk for the next samples, using the last sample of the previous chunk
+
+        Args:
+            acc (NDArray[np.float64]): moving average of Acc_Z
+            time_stamp (NDArray[np.float64]): timestamps in ns (as float, see convert_to_np)
+
+        Returns:
+            NDArray[np.float64]: jerk values ending at each of the new samples
+        '''
+        acc = np.concatenate((self.last_acc, acc))
+        time_stamp = np.concatenate((self.last_time, time_stamp))
+
+        dt: NDArray[np.float64] = np.diff(time_stamp)
+
+        if np.any(dt <= 0):
+            raise ValueError('Timestamps must be strictly increasing')
+
+        self.last_acc = acc[-1:]
+        self.last_time = time_stamp[-1:]
+
+        return np.diff(acc) / dt
+
+class WindowState:
+    '''Streaming window calculations. Keeps the values that are not yet part of a complete window and,
+    for each complete window (window i starts at i * step_size), calculates:
+        - the SD of jerk (calculate_window_sd)
+        - the max absolute value of Acc_X, Acc_Y and Acc_Z on the same rows (used by get_roi_bounds_sd and
+          get_max_accelerations, so the raw data of each region does not need to be kept)
+    '''
+
+    def __init__(self, window_size: int, step_size: int) -> None:
+        self.window_size: int = window_size
+        self.step_size: int = step_size
+        self.jerk: NDArray[np.float64] = np.empty(0, dtype = np.float64)
+        self.acc: NDArray[np.float64] = np.empty((0, 3), dtype = np.float64)
+        self.sd: list = []
+        self.abs_max: list = []
+
+    def process(self, jerk: NDArray[np.float64], acc: NDArray[np.float64]) -> None:
+        '''Adds the next jerk values and acceleration rows and calculates every window that is now complete
+
+        Args:
+            jerk (NDArray[np.float64]): next jerk values
+            acc (NDArray[np.float64]): next (n, 3) rows of Acc_X, Acc_Y, Acc_Z (filtered data, no moving average)
+        '''
+        self.jerk = np.concatenate((self.jerk, jerk))
+        self.acc = np.concatenate((self.acc, acc))
+
+        # Windows are limited by jerk, which is one value shorter than the acceleration data
+        if len(self.jerk) < self.window_size:
+            return
+
+        sd: NDArray[np.float64] = calculate_window_sd(self.jerk, self.window_size, self.step_size, verbose = False)
+        n_windows: int = len(sd)
+        rows: int = (n_windows - 1) * self.step_size + self.window_size
+
+        self.sd.append(sd)
+        self.abs_max.append(calculate_window_abs_max(self.acc[:rows], self.window_size, self.step_size))
+
+        consumed: int = n_windows * self.step_size
+        self.jerk = self.jerk[consumed:]
+        self.acc = self.acc[consumed:]
+
+    def get_results(self) -> tuple:
+        '''Returns the SD and the max absolute accelerations of all the windows processed
+
+        Returns:
+            tuple[NDArray[np.float64], NDArray[np.float64]]: SD of each window and (number of windows, 3) max absolute accelerations
+        '''
+        sd: NDArray[np.float64] = np.concatenate(self.sd) if self.sd else np.empty(0, dtype = np.float64)
+        abs_max: NDArray[np.float64] = np.concatenate(self.abs_max) if self.abs_max else np.empty((0, 3), dtype = np.float64)
+
+        return sd, abs_max
+
+class JerkStatsState:
+    '''Streaming mean, SD (ddof = 0) and percentile of jerk, as in set_jerk_threshold.
+    Mean and SD are exact (chunks are merged with the pairwise/Chan update). The percentile is calculated on
+    evenly spaced jerk values: every value while there are fewer than max_samples, then every 2nd, 4th, ... value,
+    so it is exact on shorter recordings and a close estimate on longer ones.
+    '''
+
+    def __init__(self, max_samples: int = 1_000_000) -> None:
+        self.count: int = 0
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+        self.max_samples: int = max_samples
+        self.stride: int = 1
+        self.samples: list = []
+        self.n_samples: int = 0
+
+    def process(self, jerk: NDArray[np.float64]) -> None:
+        '''Adds the next jerk values
+
+        Args:
+            jerk (NDArray[np.float64]): next jerk values
+        '''
+        if len(jerk) == 0:
+            return
+
+        count: int = len(jerk)
+        mean: float = float(np.mean(jerk))
+        m2: float = float(np.sum((jerk - mean) ** 2))
+
+        total: int = self.count + count
+        delta: float = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+
+        # Keeps every 'stride'-th value of the whole signal
+        first: int = (-self.count) % self.stride
+        self.samples.append(jerk[first::self.stride].copy())
+        self.n_samples += len(self.samples[-1])
+        self.count = total
+
+        if self.n_samples > self.max_samples:
+            # samples[i] is jerk[i * stride], keep the values at multiples of 2 * stride
+            samples: NDArray[np.float64] = np.concatenate(self.samples)[::2]
+            self.stride *= 2
+            self.samples = [samples]
+            self.n_samples = len(samples)
+
+    def get_threshold(self, factor: float, percentile: float) -> tuple:
+        '''Same outputs as set_jerk_threshold
+
+        Args:
+            factor (float): Multiplication factor for the standard deviation
+            percentile (float): Percentile value to use for setting the threshold
+
+        Returns:
+            tuple: mean jerk, SD of jerk and calibrated jerk threshold
+        '''
+        std_jerk: float = float(np.sqrt(self.m2 / self.count))
+        percentile_jerk: float = float(np.percentile(np.concatenate(self.samples), percentile))
+        jerk_threshold_cal: float = max(self.mean + factor * std_jerk, percentile_jerk)
+
+        return self.mean, std_jerk, jerk_threshold_cal
+
+def calculate_window_abs_max(acc: NDArray[np.float64], window_size: int, step_size: int) -> NDArray[np.float64]:
+    '''Calculates the max absolute value of each column over windows of 'window_size' rows every 'step_size' rows
+
+    Args:
+        acc (NDArray[np.float64]): (n, 3) Acc_X, Acc_Y and Acc_Z values
+        window_size (int): window size
+        step_size (int): number of rows by which the window advances
+
+    Returns:
+        NDArray[np.float64]: (number of windows, 3) max absolute values
+    '''
+    windows: NDArray = sliding_window_view(np.abs(acc), window_size, axis = 0)[::step_size]
+
+    return windows.max(axis = -1)
+
+def stream_case(file_path: str, target_value: float, target_moving_avg: int, window_size: int, step_size: int, chunksize: int = 1_000_000, apply_initial_filter: bool = True, timestamp_format: str | None = None) -> dict:
+    '''Runs initial_filter -> apply_moving_average -> calculate_derivatives -> calculate_window_sd
+        over the csv file chunk by chunk
+
+    Args:
+        file_path (str): case number / path without the .csv extension
+        target_value (float): Acc_Z value that signals sternal recumbency (initial filter)
+        target_moving_avg (int): moving average window size
+        window_size (int): window size for the SD method
+        step_size (int): step size for the SD method
+        chunksize (int): number of csv rows per chunk
+        apply_initial_filter (bool): if False, the whole recording is used
+        timestamp_format (str | None): format of the timeStamp column, detected if None
+
+    Returns:
+        dict: 'sd' (SD of each window), 'abs_max' (max absolute accelerations of each window),
+              'jerk_stats' (JerkStatsState), 'start_index' (first row used) and 'rows' (number of rows used)
+    '''
+    initial_filter_target: float | None = target_value if apply_initial_filter else None
+
+    # At most two passes: the second one (whole recording) only if the initial filter found no row to start from
+    while True:
+        initial_filter_state = InitialFilterState(initial_filter_target)
+        moving_average_state = MovingAverageState(target_moving_avg)
+        derivative_state = DerivativeState()
+        window_state = WindowState(window_size, step_size)
+        jerk_stats_state = JerkStatsState()
+        rows: int = 0
+        usable_rows: int = 0 # rows with a finite Acc_Z value
+
+        for chunk in read_csv_chunks(file_path, chunksize, timestamp_format):
+            chunk = initial_filter_state.process(chunk)
+
+            if chunk.empty:
+                continue
+
+            rows += len(chunk)
+            acc_z: NDArray[np.float64] = chunk['Acc_Z'].to_numpy(dtype = np.float64)
+            usable_rows += int(np.count_nonzero(np.isfinite(acc_z)))
+            acc_z_avg: NDArray[np.float64] = moving_average_state.process(acc_z)
+            jerk: NDArray[np.float64] = derivative_state.process(acc_z_avg, np.array(chunk['timeStamp'], dtype = np.float64))
+
+            jerk_stats_state.process(jerk)
+            window_state.process(jerk, chunk[['Acc_X', 'Acc_Y', 'Acc_Z']].to_numpy(dtype = np.float64))
+
+        if initial_filter_state.started or initial_filter_target is None:
+            break
+
+        # Same as initial_filter: use the whole recording (needs a second pass since rows were not kept)
+        print(f'No values in "Acc_Z" greater than {target_value} could be found. Using the whole recording')
+        initial_filter_target = None
+
+    if usable_rows == 0:
+        raise ValueError(f'{file_path}: no usable samples')
+
+    sd, abs_max = window_state.get_results()
+
+    return {
+        'sd': sd,
+        'abs_max': abs_max,
+        'jerk_stats': jerk_stats_state,
+        'start_index': initial_filter_state.start_index,
+        'rows': rows,
+    }
+
+def score_case_streaming(file_path: str, chunksize: int = 1_000_000) -> dict:
+    '''Scores one case with the bounded-memory pipeline (parameters from config.py).
+        Same output as batch_helper.process_case
+
+    Args:
+        file_path (str): path to the case CSV file
+        chunksize (int): number of csv rows per chunk
+
+    Returns:
+        dict: entry for RS_output.csv (see CSV.make_entry)
+    '''
+    results: dict = stream_case(rename(file_path), config.target_value, config.target_moving_avg, config.window_size, config.step_size, chunksize, timestamp_format = config.timestamp_format)
+
+    if len(results['sd']) == 0:
+        raise ValueError(f'{file_path} is shorter than one window ({config.window_size} samples)')
+
+    mean_jerk, std_jerk, jerk_threshold_cal = results['jerk_stats'].get_threshold(config.factor, config.percentile)
+
+    roi_sd: NDArray = detect_roi_sd(results['sd'], config.threshold)
+    number_failed_attempts: int = get_attempts(roi_sd)
+
+    # Max absolute accelerations of the window at the peak of each region (same rows as get_roi_bounds_sd)
+    amax: NDArray[np.float64] = results['abs_max'][roi_sd['peak_window']]
+
+    sa_2axes: float = get_sa_2axes_array(amax)
+    sumua: float = get_sumua_array(amax)
+    rs_2axes_py: float = get_recovery_score(number_failed_attempts, sa_2axes, sumua)
+
+    if number_failed_attempts < 1:
+        sumua = None
+
+    return CSV.make_entry(get_date(), rename(os.path.basename(file_path)), config.jerk_threshold, mean_jerk, std_jerk, jerk_threshold_cal, config.threshold, number_failed_attempts, sa_2axes, sumua, rs_2axes_py)
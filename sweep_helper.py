@@ -0,0 +1,195 @@
+# Recovery Score Calculations: sweep_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: parameter sweeps for calibrating the ROI_SD method (threshold, window_size, step_size, factor, percentile).
+# The expensive stages (read_csv_file, initial_filter, apply_moving_average, calculate_derivatives) only depend
+# on the case, so they run once per case and are reused for its whole grid. Window SDs only depend on window_size and step_size,
+# so they are calculated once per (window_size, step_size) and reused for every threshold.
+# Cases are processed in parallel by a pool of worker processes, each worker scoring the whole grid for one case.
+# Usage: python sweep_helper.py <directory or glob> --threshold 1e-08 1.5e-08 --window-size 2500 5000 [--output sweep_results.csv]
+
+import argparse
+import itertools
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from numpy.typing import NDArray
+
+import config
+from acceleration_helper import get_max_accelerations, get_sa_2axes_array, get_sumua_array
+from attempt_detection_helper import calculate_window_sd, detect_roi_sd, get_attempts, set_jerk_threshold
+from batch_helper import find_case_files, get_pool_context
+from CSV_helper import rename
+from derivative_helper import calculate_derivatives
+from file_helper import read_csv_file, initial_filter, apply_moving_average
+from output_results_helper import get_recovery_score
+from region_helper import get_roi_bounds_sd
+
+# ROI parameters that can be swept, the others are read from config.py
+SWEEP_PARAMETERS: list[str] = ['threshold', 'window_size', 'step_size', 'factor', 'percentile']
+
+def make_grid(**values) -> list[dict]:
+    '''Creates every combination of the given parameter values. Parameters that are not given
+        take their value from config.py
+
+    Args:
+        **values: list of values for any of SWEEP_PARAMETERS (e.g. threshold = [1e-08, 1.5e-08])
+
+    Returns:
+        list[dict]: one dict of parameters per combination
+    '''
+    unknown: list[str] = [name for name in values if name not in SWEEP_PARAMETERS]
+    if unknown:
+        raise ValueError(f'Unknown sweep parameters {unknown} (use {SWEEP_PARAMETERS})')
+
+    value_lists: list[list] = [list(values.get(name) or [getattr(config, name)]) for name in SWEEP_PARAMETERS]
+
+    return [dict(zip(SWEEP_PARAMETERS, combination)) for combination in itertools.product(*value_lists)]
+
+def load_case_stages(file_path: str) -> dict:
+    '''Runs the stages that do not depend on the ROI parameters, once per case (sweep_case reuses them for the
+        whole grid, and each case is sent to one worker only, so they are not kept after the case is scored)
+        read_csv_file -> initial_filter -> apply_moving_average -> calculate_derivatives
+
+    Args:
+        file_path (str): path to the case CSV file
+
+    Returns:
+        dict: case number, jerk, and (n, 3) array of the filtered Acc_X, Acc_Y and Acc_Z
+    '''
+    df: pd.DataFrame = read_csv_file(rename(file_path), timestamp_format = config.timestamp_format, timestamp_mode = config.timestamp_mode, sample_period_ms = config.sample_period_ms)
+
+    if df.empty:
+        raise ValueError(f'Failed to load DataFrame from {file_path}')
+
+    df_filtered: pd.DataFrame = initial_filter(df, config.target_value)
+    df_moving_avg: pd.DataFrame = apply_moving_average(df_filtered, config.target_moving_avg)
+    df_avg = pd.DataFrame({'timeStamp': df_moving_avg['timeStamp'], 'Acc_Z': df_moving_avg['Acc_Z']})
+    jerk, _ = calculate_derivatives(df_avg)
+
+    return {
+        'case_number': rename(os.path.basename(file_path)),
+        'jerk': jerk,
+        'acc': df_filtered[['Acc_X', 'Acc_Y', 'Acc_Z']].to_numpy(dtype = np.float64),
+    }
+
+def sweep_case(file_path: str, grid: list[dict]) -> list[dict]:
+    '''Scores one case for every combination of ROI parameters
+
+    Args:
+        file_path (str): path to the case CSV file
+        grid (list[dict]): parameter combinations (see make_grid)
+
+    Returns:
+        list[dict]: one row per combination with the parameters, attempts and recovery score
+    '''
+    stages: dict = load_case_stages(file_path)
+    jerk: NDArray[np.float64] = stages['jerk']
+
+    jerk_thresholds: dict = {}
+    window_sds: dict = {}
+    rows: list[dict] = []
+
+    for parameters in grid:
+        jerk_key: tuple = (parameters['factor'], parameters['percentile'])
+        if jerk_key not in jerk_thresholds:
+            jerk_thresholds[jerk_key] = set_jerk_threshold(jerk, *jerk_key)
+        mean_jerk, std_jerk, jerk_threshold_cal = jerk_thresholds[jerk_key]
+
+        window_key: tuple = (parameters['window_size'], parameters['step_size'])
+        if window_key not in window_sds:
+            window_sds[window_key] = calculate_window_sd(jerk, *window_key)
+
+        roi_sd: NDArray = detect_roi_sd(window_sds[window_key], parameters['threshold'])
+        number_failed_attempts: int = get_attempts(roi_sd)
+
+        roi_starts, roi_ends = get_roi_bounds_sd(roi_sd, parameters['window_size'], parameters['step_size'], len(stages['acc']))
+        amax: NDArray[np.float64] = get_max_accelerations(stages['acc'], roi_starts, roi_ends)
+
+        sa_2axes: float = get_sa_2axes_array(amax)
+        sumua: float = get_sumua_array(amax)
+        rs_2axes_py: float = get_recovery_score(number_failed_attempts, sa_2axes, sumua)
+
+        rows.append({
+            'Case_Number': stages['case_number'],
+            **parameters,
+            'mean_jerk': mean_jerk,
+            'std_jerk': std_jerk,
+            'jerk_threshold_cal': jerk_threshold_cal,
+            'Number_failed_attempts': number_failed_attempts,
+            'sa_2axes_py': sa_2axes,
+            'sumua_py': sumua if number_failed_attempts >= 1 else None,
+            'rs_2axes_py': rs_2axes_py,
+        })
+
+    return rows
+
+def run_sweep(source: str, grid: list[dict], max_workers: int | None = None) -> pd.DataFrame:
+    '''Scores every case found in 'source' for every combination of ROI parameters, one case per worker process.
+        Cases that fail are reported and skipped
+
+    Args:
+        source (str): directory or glob pattern with the case CSV files
+        grid (list[dict]): parameter combinations (see make_grid)
+        max_workers (int | None): number of worker processes. Defaults to the number of CPUs
+
+    Returns:
+        pd.DataFrame: one row per case and parameter combination, in case file order
+    '''
+    file_paths: list[str] = find_case_files(source)
+
+    if not file_paths:
+        print(f'No case files found in {source}')
+        return pd.DataFrame()
+
+    print(f'Sweeping {len(grid)} parameter sets over {len(file_paths)} cases...')
+    start: float = time.perf_counter()
+
+    results: dict = {}
+
+    with ProcessPoolExecutor(max_workers = max_workers, mp_context = get_pool_context()) as executor:
+        futures: dict = {executor.submit(partial(sweep_case, grid = grid), file_path): file_path for file_path in file_paths}
+
+        for future in as_completed(futures):
+            file_path: str = futures[future]
+
+            try:
+                results[file_path] = future.result()
+                print(f'{file_path} swept successfully')
+
+            except Exception as e:
+                print(f'An error occurred while sweeping {file_path}:', str(e))
+
+    rows: list[dict] = [row for file_path in file_paths if file_path in results for row in results[file_path]]
+
+    print(f'{len(results)} of {len(file_paths)} cases swept in {time.perf_counter() - start:.1f} s')
+
+    return pd.DataFrame(rows)
+
+def main() -> None:
+
+    parser = argparse.ArgumentParser(description = 'Scores a batch of recovery recordings over a grid of ROI parameters')
+    parser.add_argument('source', help = 'directory with the case CSV files, or a glob pattern')
+    parser.add_argument('--threshold', type = float, nargs = '+', help = 'SD thresholds (default: config.threshold)')
+    parser.add_argument('--window-size', type = int, nargs = '+', help = 'window sizes (default: config.window_size)')
+    parser.add_argument('--step-size', type = int, nargs = '+', help = 'step sizes (default: config.step_size)')
+    parser.add_argument('--factor', type = float, nargs = '+', help = 'jerk threshold factors (default: config.factor)')
+    parser.add_argument('--percentile', type = float, nargs = '+', help = 'jerk threshold percentiles (default: config.percentile)')
+    parser.add_argument('--workers', type = int, default = None, help = 'number of worker processes (default: number of CPUs)')
+    parser.add_argument('--output', default = 'sweep_results.csv', help = 'csv file for the results table')
+    args = parser.parse_args()
+
+    grid: list[dict] = make_grid(threshold = args.threshold, window_size = args.window_size, step_size = args.step_size, factor = args.factor, percentile = args.percentile)
+    results: pd.DataFrame = run_sweep(args.source, grid, args.workers)
+
+    if not results.empty:
+        results.to_csv(args.output, index = False)
+        print(f'Results saved in {args.output}')
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,205 @@
+# Recovery Score Calculations: timestamp_helper Script
+# Script created 10/17/2026
+# Last revision 10/17/2026
+# Notes: fast parsing of the timeStamp column. pd.to_datetime without a format guesses the format
+# row by row; with a known format it uses the vectorized parser. The format is either declared
+# (config.timestamp_format) or detected once from the first rows of the file.
+# ISO timestamps of constant width (e.g. '2024-03-25 10:00:00.005') are read as bytes (pandas still creates one
+# Python bytes object per row), copied once into a fixed-width NumPy bytes array and parsed by NumPy straight
+# into int64 ns, which is several times faster than pd.to_datetime on strings.
+# In 'sample_rate' mode the timeStamp column is not parsed at all: timestamps are synthesized from the
+# first timestamp plus the nominal sample period and checked against the first rows and the last row.
+
+import os
+import numpy as np
+import pandas as pd
+
+from numpy.typing import NDArray
+
+# Formats tried (in order) when the timestamp format is not declared
+TIMESTAMP_FORMATS: list[str] = [
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%m/%d/%Y %H:%M:%S.%f',
+    '%d/%m/%Y %H:%M:%S.%f',
+    '%Y/%m/%d %H:%M:%S.%f',
+    '%H:%M:%S.%f',
+    'ISO8601',
+]
+
+# Formats that NumPy parses directly (ISO 8601 with a space or 'T' separator)
+NUMPY_FORMATS: list[str] = [
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+]
+
+def read_first_timestamps(file_path_csv: str, n_rows: int = 1000, skiprows: int = 3) -> pd.Series:
+    '''Reads the timeStamp column of the first rows of a csv file
+
+    Args:
+        file_path_csv (str): path to the csv file
+        n_rows (int): number of rows to read
+        skiprows (int): header rows to skip (separator, headers, units)
+
+    Returns:
+        pd.Series: timeStamp strings
+    '''
+    head: pd.DataFrame = pd.read_csv(file_path_csv, skiprows = skiprows, header = None, usecols = [0], nrows = n_rows, dtype = str, encoding = 'utf-8')
+
+    return head[0]
+
+def read_last_timestamp(file_path_csv: str, block_size: int = 4096) -> str:
+    '''Reads the timeStamp of the last row of a csv file without reading the whole file
+
+    Args:
+        file_path_csv (str): path to the csv file
+        block_size (int): number of bytes read from the end of the file
+
+    Returns:
+        str: timeStamp string of the last row
+    '''
+    with open(file_path_csv, 'rb') as file:
+        file.seek(0, os.SEEK_END)
+        file.seek(max(0, file.tell() - block_size))
+        lines: list[bytes] = [line for line in file.read().splitlines() if line.strip()]
+
+    return lines[-1].split(b',')[0].decode('utf-8').strip()
+
+def detect_timestamp_format(timestamps: pd.Series) -> str | None:
+    '''Finds the first format of TIMESTAMP_FORMATS that parses every sample timestamp
+
+    Args:
+        timestamps (pd.Series): sample of timeStamp strings (e.g. the first rows of the file)
+
+    Returns:
+        str | None: timestamp format, or None if none of the formats match
+    '''
+    for timestamp_format in TIMESTAMP_FORMATS:
+        try:
+            pd.to_datetime(timestamps, format = timestamp_format)
+            return timestamp_format
+
+        except (ValueError, TypeError):
+            continue
+
+    return None
+
+def parse_timestamps(timestamps: pd.Series, timestamp_format: str | None) -> pd.Series:
+    '''Parses timeStamp strings into datetime64[ns] (int64 ns since epoch)
+
+    Args:
+        timestamps (pd.Series): timeStamp strings
+        timestamp_format (str | None): strftime format, or None to let pandas infer it
+
+    Returns:
+        pd.Series: parsed timestamps
+    '''
+    if timestamp_format is None:
+        return pd.to_datetime(timestamps)
+
+    return pd.to_datetime(timestamps, format = timestamp_format)
+
+def get_timestamp_format(file_path_csv: str, timestamp_format: str | None = None) -> str | None:
+    '''Returns the declared timestamp format, or detects it from the first rows of the file
+
+    Args:
+        file_path_csv (str): path to the csv file
+        timestamp_format (str | None): declared format (config.timestamp_format)
+
+    Returns:
+        str | None: timestamp format, or None if it could not be detected (pandas will infer it)
+    '''
+    if timestamp_format is not None:
+        return timestamp_format
+
+    detected_format: str | None = detect_timestamp_format(read_first_timestamps(file_path_csv, n_rows = 100))
+
+    if detected_format is None:
+        print('Timestamp format could not be detected, it will be inferred (slower)')
+
+    return detected_format
+
+def get_fixed_width(file_path_csv: str, timestamp_format: str | None) -> int | None:
+    '''Checks whether the timestamps can be read as fixed-width bytes and parsed by NumPy
+
+    Args:
+        file_path_csv (str): path to the csv file
+        timestamp_format (str | None): format of the timeStamp column
+
+    Returns:
+        int | None: width of the timestamps if they all have the same width in the first rows
+            and their format is one of NUMPY_FORMATS, None otherwise
+    '''
+    if timestamp_format not in NUMPY_FORMATS:
+        return None
+
+    widths: NDArray = read_first_timestamps(file_path_csv, n_rows = 100).str.len().to_numpy()
+
+    if len(widths) == 0 or np.any(widths != widths[0]):
+        return None
+
+    return int(widths[0])
+
+def parse_fixed_width_timestamps(timestamps: pd.Series, width: int) -> pd.Series | None:
+    '''Parses timestamps read with dtype 'S{width + 1}' (see read_csv_parsed) into datetime64[ns].
+        pandas returns them as an object column of bytes; they are copied once into a fixed-width bytes array,
+        which NumPy parses without pd.to_datetime. One extra byte is read so that longer timestamps further
+        down the file are detected
+
+    Args:
+        timestamps (pd.Series): timestamps as bytes objects
+        width (int): expected width of every timestamp
+
+    Returns:
+        pd.Series | None: parsed timestamps, or None if some timestamps do not have the expected width
+    '''
+    values: NDArray = np.array(timestamps.to_numpy(), dtype = f'S{width + 1}')
+
+    if np.any(np.char.str_len(values) != width):
+        return None
+
+    return pd.Series(values.astype('datetime64[ns]'), index = timestamps.index)
+
+def synthesize_timestamps(file_path_csv: str, n_rows: int, sample_period_ms: float, timestamp_format: str | None = None, n_check: int = 1000, tolerance: float = 0.2, start_row: int = 0) -> pd.Series | None:
+    '''Creates the timestamps of a recording from its first timestamp and the nominal sample period.
+        They are checked against the first n_check timestamps and the last timestamp of the file;
+        if any of them is more than tolerance * sample period away, the recording has gaps or jitter
+        and None is returned so the timestamps are parsed instead
+
+    Args:
+        file_path_csv (str): path to the csv file
+        n_rows (int): number of data rows created (the file has start_row + n_rows data rows)
+        sample_period_ms (float): nominal sample period in ms (5 ms at 200 Hz)
+        timestamp_format (str | None): format of the timeStamp column
+        n_check (int): number of first rows used for the check
+        tolerance (float): maximum difference allowed, as a fraction of the sample period
+        start_row (int): data row of the first timestamp created (the rows before it are not created)
+
+    Returns:
+        pd.Series | None: datetime64[ns] timestamps of rows start_row to start_row + n_rows - 1, or None if they do
+            not match the file
+    '''
+    head: pd.Series = read_first_timestamps(file_path_csv, n_rows = n_check)
+
+    if timestamp_format is None:
+        timestamp_format = detect_timestamp_format(head)
+
+    head_ns: NDArray[np.int64] = parse_timestamps(head, timestamp_format).to_numpy(dtype = 'datetime64[ns]').view(np.int64)
+    last_ns: int = parse_timestamps(pd.Series([read_last_timestamp(file_path_csv)]), timestamp_format).to_numpy(dtype = 'datetime64[ns]').view(np.int64)[0]
+
+    period_ns: int = int(round(sample_period_ms * 1e6))
+    expected_head_ns: NDArray[np.int64] = head_ns[0] + np.arange(len(head_ns), dtype = np.int64) * period_ns
+    expected_last_ns: int = head_ns[0] + (start_row + n_rows - 1) * period_ns
+    max_error_ns: float = tolerance * period_ns
+
+    if np.any(np.abs(expected_head_ns - head_ns) > max_error_ns) or abs(expected_last_ns - last_ns) > max_error_ns:
+        print('Timestamps do not follow the nominal sample period, parsing them instead')
+        return None
+
+    time_stamp_ns: NDArray[np.int64] = head_ns[0] + np.arange(start_row, start_row + n_rows, dtype = np.int64) * period_ns
+
+    return pd.Series(time_stamp_ns.view('datetime64[ns]'))